@@ -41,8 +41,11 @@ def main():
             ciphertext = aes_crypto.ler_mensagem_encriptada(nome_arquivo)
             
             if ciphertext:
-                mensagem_decriptada = aes_crypto.decrypt(ciphertext, chave)
-                print(f"Mensagem decriptada: {mensagem_decriptada}")
+                try:
+                    mensagem_decriptada = aes_crypto.decrypt(ciphertext, chave)
+                    print(f"Mensagem decriptada: {mensagem_decriptada}")
+                except ValueError:
+                    print("Chave incorreta ou mensagem corrompida.")
             else:
                 print("Não foi possível ler a mensagem encriptada.")
                 
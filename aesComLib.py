@@ -20,7 +20,9 @@ Você pode instalar essas bibliotecas usando pip com os seguintes comandos:
 
 Bibliotecas Importadas:
 -Crypto.Cipher e Crypto.Random: Módulos da biblioteca PyCryptodome para criptografia AES e geração de bytes aleatórios.
--rich.console, rich.panel, rich.prompt, rich.text: Módulos da biblioteca Rich para melhorar a interface do usuário no console.
+-rich.console, rich.panel, rich.prompt: Módulos da biblioteca Rich para a interface do usuário no console, importados apenas em main().
+ As funções de cifra e de arquivo não dependem da Rich, então importar este módulo como biblioteca não carrega a interface.
+-aes_metricas: Instrumentação opcional (tempos e contadores) das chamadas à PyCryptodome.
 
 Funções Principais:
 -encriptar_mensagem(mensagem, chave): Encripta uma mensagem usando AES no modo EAX.
@@ -35,12 +37,8 @@ Função Principal:
 
 from Crypto.Cipher import AES  # Biblioteca para criptografia AES
 from Crypto.Random import get_random_bytes  # Função para gerar bytes aleatórios
-from rich.console import Console  # Biblioteca Rich para melhorar a saída no console
-from rich.panel import Panel  # Painel da biblioteca Rich para formatar texto
-from rich.prompt import Prompt  # Biblioteca Rich para obter entrada do usuário
-from rich.text import Text  # Biblioteca Rich para manipulação de texto
 
-console = Console()  # Inicializa o console Rich
+import aes_metricas  # Instrumentação opcional das etapas de cifra
 
 def encriptar_mensagem(mensagem, chave):
     """
@@ -50,9 +48,12 @@ def encriptar_mensagem(mensagem, chave):
     :param chave: Chave de encriptação (16 bytes)
     :return: nonce, texto cifrado e tag de autenticação
     """
-    cipher = AES.new(chave, AES.MODE_EAX)  # Cria um objeto de cifra AES no modo EAX
-    nonce = cipher.nonce  # Obtém o nonce (número aleatório único) usado na cifra
-    ciphertext, tag = cipher.encrypt_and_digest(mensagem.encode('utf-8'))  # Encripta a mensagem e gera um tag de autenticação
+    with aes_metricas.etapa('pycryptodome_encrypt', modo='eax'):  # Mede a etapa apenas se houver coletores registrados
+        cipher = AES.new(chave, AES.MODE_EAX)  # Cria um objeto de cifra AES no modo EAX
+        nonce = cipher.nonce  # Obtém o nonce (número aleatório único) usado na cifra
+        ciphertext, tag = cipher.encrypt_and_digest(mensagem.encode('utf-8'))  # Encripta a mensagem e gera um tag de autenticação
+    if aes_metricas.coletores:
+        aes_metricas.contar('bytes', len(ciphertext), operacao='encrypt', engine='pycryptodome')  # Conta os bytes cifrados
     return nonce, ciphertext, tag  # Retorna o nonce, o texto cifrado e o tag
 
 def descriptar_mensagem(nonce, ciphertext, tag, chave):
@@ -65,8 +66,11 @@ def descriptar_mensagem(nonce, ciphertext, tag, chave):
     :param chave: Chave de encriptação (16 bytes)
     :return: Mensagem descriptada ou mensagem de erro
     """
-    cipher = AES.new(chave, AES.MODE_EAX, nonce=nonce)  # Cria um objeto de cifra AES no modo EAX com o nonce fornecido
-    mensagem = cipher.decrypt(ciphertext)  # Descripta o texto cifrado
+    if aes_metricas.coletores:
+        aes_metricas.contar('bytes', len(ciphertext), operacao='decrypt', engine='pycryptodome')  # Conta os bytes decifrados
+    with aes_metricas.etapa('pycryptodome_decrypt', modo='eax'):  # Mede a etapa apenas se houver coletores registrados
+        cipher = AES.new(chave, AES.MODE_EAX, nonce=nonce)  # Cria um objeto de cifra AES no modo EAX com o nonce fornecido
+        mensagem = cipher.decrypt(ciphertext)  # Descripta o texto cifrado
     try:
         cipher.verify(tag)  # Verifica a integridade da mensagem com o tag
         return mensagem.decode('utf-8')  # Retorna a mensagem descriptada se a verificação for bem-sucedida
@@ -81,36 +85,39 @@ def salvar_mensagem_encriptada(nonce, ciphertext, tag, arquivo):
     :param ciphertext: Texto cifrado
     :param tag: Tag de autenticação
     :param arquivo: Nome do arquivo para salvar a mensagem encriptada
+    :raises IOError: Se o arquivo não puder ser escrito
     """
-    try:
-        with open(arquivo, 'wb') as file:  # Abre o arquivo para escrita em modo binário
-            file.write(nonce)  # Escreve o nonce no arquivo
-            file.write(tag)  # Escreve o tag no arquivo
-            file.write(ciphertext)  # Escreve o texto cifrado no arquivo
-    except IOError as e:
-        console.print(f"[red]Erro ao salvar a mensagem encriptada:[/red] {e}")  # Imprime um erro se a operação falhar
+    with aes_metricas.etapa('io_escrita'), open(arquivo, 'wb') as file:  # Abre o arquivo para escrita em modo binário
+        file.write(nonce)  # Escreve o nonce no arquivo
+        file.write(tag)  # Escreve o tag no arquivo
+        file.write(ciphertext)  # Escreve o texto cifrado no arquivo
 
 def ler_mensagem_encriptada(arquivo):
     """
     Lê a mensagem encriptada de um arquivo.
 
     :param arquivo: Nome do arquivo contendo a mensagem encriptada
-    :return: nonce, texto cifrado e tag de autenticação ou None em caso de erro
+    :return: nonce, texto cifrado e tag de autenticação
+    :raises IOError: Se o arquivo não puder ser lido
     """
-    try:
-        with open(arquivo, 'rb') as file:  # Abre o arquivo para leitura em modo binário
-            nonce = file.read(16)  # Lê os primeiros 16 bytes como nonce
-            tag = file.read(16)  # Lê os próximos 16 bytes como tag
-            ciphertext = file.read()  # Lê o restante do arquivo como texto cifrado
-        return nonce, ciphertext, tag  # Retorna o nonce, o texto cifrado e o tag
-    except IOError as e:
-        console.print(f"[red]Erro ao ler a mensagem encriptada:[/red] {e}")  # Imprime um erro se a operação falhar
-        return None, None, None  # Retorna None em caso de erro
+    with aes_metricas.etapa('io_leitura'), open(arquivo, 'rb') as file:  # Abre o arquivo para leitura em modo binário
+        nonce = file.read(16)  # Lê os primeiros 16 bytes como nonce
+        tag = file.read(16)  # Lê os próximos 16 bytes como tag
+        ciphertext = file.read()  # Lê o restante do arquivo como texto cifrado
+    return nonce, ciphertext, tag  # Retorna o nonce, o texto cifrado e o tag
 
 def main():
     """
     Função principal que coordena a interação com o usuário para encriptar e descriptar mensagens.
+
+    A Rich é importada aqui, e não no topo do módulo, para que o uso como
+    biblioteca não pague a importação da interface.
     """
+    from rich.console import Console  # Biblioteca Rich para melhorar a saída no console
+    from rich.panel import Panel  # Painel da biblioteca Rich para formatar texto
+    from rich.prompt import Prompt  # Biblioteca Rich para obter entrada do usuário
+
+    console = Console()  # Inicializa o console Rich
     console.print(Panel.fit("[bold yellow]Trabalho de Segurança da Informação[/bold yellow]\n\n"
                             "[bold]Realizado por:[/bold] Filipe Nava\n"
                             "[bold]Professor:[/bold] Ronaldo Toshiaki Oikawa", title="Informações do Trabalho"))
@@ -124,10 +131,13 @@ def main():
             nonce, ciphertext, tag = encriptar_mensagem(mensagem, chave)  # Encripta a mensagem com a chave gerada
             
             nome_arquivo = Prompt.ask("Digite o nome do arquivo para salvar a mensagem encriptada")  # Pede ao usuário para digitar o nome do arquivo
-            salvar_mensagem_encriptada(nonce, ciphertext, tag, nome_arquivo)  # Salva a mensagem encriptada no arquivo
-            
-            console.print(Panel(f"[green]Mensagem encriptada salva no arquivo [bold]{nome_arquivo}[/bold][/green]\n"
-                                f"Chave para decriptação (guarde com segurança): [bold]{chave.hex()}[/bold]", title="Sucesso"))
+            try:
+                salvar_mensagem_encriptada(nonce, ciphertext, tag, nome_arquivo)  # Salva a mensagem encriptada no arquivo
+            except IOError as e:
+                console.print(f"[red]Erro ao salvar a mensagem encriptada:[/red] {e}")  # Imprime um erro se a operação falhar
+            else:
+                console.print(Panel(f"[green]Mensagem encriptada salva no arquivo [bold]{nome_arquivo}[/bold][/green]\n"
+                                    f"Chave para decriptação (guarde com segurança): [bold]{chave.hex()}[/bold]", title="Sucesso"))
             
         elif acao == '2':
             nome_arquivo = Prompt.ask("Digite o nome do arquivo que contém a mensagem encriptada")  # Pede ao usuário para digitar o nome do arquivo
@@ -143,6 +153,8 @@ def main():
                 else:
                     console.print(Panel("[red]Não foi possível ler a mensagem encriptada.[/red]", title="Erro"))
                 
+            except IOError as e:
+                console.print(f"[red]Erro ao ler a mensagem encriptada:[/red] {e}")  # Imprime um erro se a operação falhar
             except ValueError:
                 console.print(Panel("[red]Formato de chave inválido. Certifique-se de que está em hexadecimal.[/red]", title="Erro"))
                 
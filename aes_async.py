@@ -0,0 +1,184 @@
+"""
+Módulo com a API assíncrona (asyncio) para encriptar e decriptar fluxos de rede.
+
+As funções leem de um asyncio.StreamReader parte por parte, cifram cada
+parte com os encriptadores em fluxo de aes_stream e escrevem no
+asyncio.StreamWriter aguardando drain() a cada escrita, o que respeita o
+controle de fluxo do transporte. Nas partes maiores, a cifra dos blocos e a
+geração do fluxo de chave (em Python puro) são enviadas a um executor
+configurável, para que o laço de eventos não fique parado enquanto são
+calculadas. Só esse trabalho sem estado sai do laço: o contador do CTR, o
+GHASH do GCM, o iv e os buffers ficam nos objetos de aes_stream, no laço de
+eventos, de modo que o executor pode ser de threads ou de processos
+(ProcessPoolExecutor), que recebe cópias dos argumentos.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-asyncio é importada para o laço de eventos e os executores.
+-aes_stream fornece os encriptadores em fluxo e os formatos; aes_modos é usada por eles.
+
+Variáveis Globais:
+-LIMIAR_EXECUTOR: Tamanho mínimo de uma parte para processá-la fora do laço de eventos.
+
+Funções Principais:
+-ler_chunks_async(reader, chunk_size): Gerador assíncrono das partes lidas de um StreamReader.
+-encrypt_aiter(chunks, key, mode, iv, engine, executor): Gerador assíncrono que encripta partes de dados.
+-decrypt_aiter(chunks, key, mode, engine, executor): Gerador assíncrono que decripta partes de dados.
+-encrypt_stream_async(reader, writer, key, chunk_size, mode, iv, engine, executor): Encripta de um StreamReader para um StreamWriter.
+-decrypt_stream_async(reader, writer, key, chunk_size, mode, engine, executor): Decripta de um StreamReader para um StreamWriter.
+
+"""
+
+import asyncio
+
+import aes_stream
+
+# Partes menores que isto são processadas no próprio laço de eventos (16 KiB),
+# pois o custo de enviá-las ao executor supera o da cifra
+LIMIAR_EXECUTOR = 16 * 1024
+
+async def _executar(executor, funcao, *args, tamanho=0):
+    """
+    Executa uma etapa da cifra no executor, ou diretamente se a parte for pequena.
+
+    :param executor: Executor de concurrent.futures; None usa o executor padrão do laço
+    :param funcao: Função a executar
+    :param args: Argumentos da função
+    :param tamanho: Tamanho da parte processada
+    :return: Resultado da função
+    """
+    if tamanho < LIMIAR_EXECUTOR:
+        return funcao(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, funcao, *args)
+
+async def _conduzir(executor, etapas, tamanho):
+    """
+    Conduz um gerador de etapas (atualizar_em_etapas), executando cada etapa no executor.
+
+    O gerador, e com ele todo o estado do fluxo, permanece no laço de
+    eventos; o executor só recebe funções sem estado e os seus argumentos.
+
+    :param executor: Executor de concurrent.futures; None usa o executor padrão do laço
+    :param etapas: Gerador que produz tuplas (função, argumentos) e recebe o resultado de cada uma
+    :param tamanho: Tamanho da parte processada
+    :return: Valor retornado pelo gerador
+    """
+    try:
+        funcao, args = next(etapas)
+        while True:
+            funcao, args = etapas.send(await _executar(executor, funcao, *args, tamanho=tamanho))
+    except StopIteration as fim:
+        return fim.value
+
+async def ler_chunks_async(reader, chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO):
+    """
+    Lê um StreamReader em partes de até chunk_size bytes, até o fim do fluxo.
+
+    :param reader: asyncio.StreamReader
+    :param chunk_size: Tamanho máximo de cada parte
+    :return: Gerador assíncrono das partes lidas
+    """
+    while True:
+        chunk = await reader.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+async def encrypt_aiter(chunks, key, mode=aes_stream.MODO_PADRAO, iv=None, engine=None, executor=None):
+    """
+    Encripta partes de dados recebidas de um iterável assíncrono.
+
+    :param chunks: Iterável assíncrono de partes dos dados
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param iv: Vetor de inicialização (16 bytes no CTR, 12 no GCM, nenhum no ECB); None gera um aleatório
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param executor: Executor (de threads ou de processos) para as partes grandes; None usa o executor padrão do laço
+    :return: Gerador assíncrono das partes cifradas
+    """
+    encriptador = aes_stream.EncriptadorFluxo(key, mode, iv, engine)
+    async for chunk in chunks:
+        parte = await _conduzir(executor, encriptador.atualizar_em_etapas(chunk), len(chunk))
+        if parte:
+            yield parte
+    yield encriptador.finalizar()
+
+async def decrypt_aiter(chunks, key, mode=aes_stream.MODO_PADRAO, engine=None, executor=None):
+    """
+    Decripta partes de dados recebidas de um iterável assíncrono.
+
+    No modo GCM o texto decriptado é entregue antes da verificação do tag;
+    se o tag não conferir, ValueError é lançado ao término.
+
+    :param chunks: Iterável assíncrono de partes dos dados cifrados
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param executor: Executor (de threads ou de processos) para as partes grandes; None usa o executor padrão do laço
+    :return: Gerador assíncrono das partes decriptadas
+    :raises ValueError: Se o fluxo estiver truncado, o preenchimento for inválido ou o tag não conferir
+    """
+    decriptador = aes_stream.DecriptadorFluxo(key, mode, engine)
+    async for chunk in chunks:
+        parte = await _conduzir(executor, decriptador.atualizar_em_etapas(chunk), len(chunk))
+        if parte:
+            yield parte
+    yield decriptador.finalizar()
+
+async def _copiar(partes, writer):
+    """
+    Escreve as partes no StreamWriter, aguardando drain() a cada escrita.
+
+    :param partes: Iterável assíncrono das partes
+    :param writer: asyncio.StreamWriter
+    :return: Quantidade de bytes escritos
+    """
+    escritos = 0
+    async for parte in partes:
+        writer.write(parte)
+        await writer.drain()
+        escritos += len(parte)
+    return escritos
+
+async def encrypt_stream_async(reader, writer, key, chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO,
+                               mode=aes_stream.MODO_PADRAO, iv=None, engine=None, executor=None):
+    """
+    Encripta tudo o que for lido do StreamReader, escrevendo no StreamWriter.
+
+    O writer não é fechado, para que o chamador decida quando encerrar a conexão.
+
+    :param reader: asyncio.StreamReader
+    :param writer: asyncio.StreamWriter
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param chunk_size: Tamanho das partes lidas do reader
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param iv: Vetor de inicialização (16 bytes no CTR, 12 no GCM, nenhum no ECB); None gera um aleatório
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param executor: Executor (de threads ou de processos) para as partes grandes; None usa o executor padrão do laço
+    :return: Quantidade de bytes escritos
+    """
+    partes = encrypt_aiter(ler_chunks_async(reader, chunk_size), key, mode, iv, engine, executor)
+    return await _copiar(partes, writer)
+
+async def decrypt_stream_async(reader, writer, key, chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO,
+                               mode=aes_stream.MODO_PADRAO, engine=None, executor=None):
+    """
+    Decripta tudo o que for lido do StreamReader, escrevendo no StreamWriter.
+
+    :param reader: asyncio.StreamReader
+    :param writer: asyncio.StreamWriter
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param chunk_size: Tamanho das partes lidas do reader
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param executor: Executor (de threads ou de processos) para as partes grandes; None usa o executor padrão do laço
+    :return: Quantidade de bytes escritos
+    :raises ValueError: Se o fluxo estiver truncado, o preenchimento for inválido ou o tag não conferir
+    """
+    partes = decrypt_aiter(ler_chunks_async(reader, chunk_size), key, mode, engine, executor)
+    return await _copiar(partes, writer)
@@ -0,0 +1,358 @@
+"""
+Módulo de benchmark da implementação própria do AES, com comparação com a PyCryptodome.
+
+Mede a vazão (MB/s) e a latência por bloco de cada engine e modo de operação
+para vários tamanhos de mensagem, o custo da expansão de chave separadamente
+e os caminhos bloco a bloco, em lote e em vários processos. O resultado pode
+ser salvo em JSON ou CSV e comparado com um baseline salvo anteriormente,
+para detectar regressões nos caminhos críticos antes de publicá-las.
+
+Uso:
+    python aes_benchmark.py --tamanhos 16 1K 64K 1M --saida atual.json
+    python aes_benchmark.py --baseline atual.json --tolerancia 0.15
+    python aes_benchmark.py --importacao
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-argparse, csv, json, os, sys e time são importadas para a linha de comando, a saída e a medição.
+-subprocess é importada para medir a importação dos módulos em interpretadores novos (-X importtime).
+-aes_crypto, aes_modos e aes_paralelo fornecem os engines e modos medidos.
+-Crypto.Cipher (opcional) é importada para a comparação com a PyCryptodome.
+
+Variáveis Globais:
+-TAMANHOS_PADRAO: Tamanhos de mensagem medidos por padrão.
+-TEMPO_MINIMO_PADRAO: Tempo mínimo de medição de cada caso.
+-TOLERANCIA_PADRAO: Queda de vazão aceita antes de considerar regressão.
+-LIMITE_REFERENCE: Maior tamanho medido com o engine "reference", que é muito mais lento.
+-LIMITES_IMPORTACAO: Tempo máximo de importação aceito para os módulos usados como biblioteca.
+-MODULOS_PROIBIDOS_IMPORTACAO: Dependências pesadas que não podem ser carregadas só pela importação.
+
+Funções Principais:
+-medir(funcao, tamanho, tempo_minimo): Mede uma operação repetindo-a até atingir o tempo mínimo.
+-gerar_casos(tamanhos, engines, paralelo, pycryptodome): Monta a lista de casos a medir.
+-executar_benchmark(tamanhos, engines, paralelo, pycryptodome, tempo_minimo): Mede todos os casos.
+-comparar_baseline(resultados, baseline, tolerancia): Lista os casos mais lentos que o baseline.
+-medir_importacao(modulo, repeticoes): Mede a importação de um módulo com -X importtime.
+-verificar_importacao(limites, proibidos, repeticoes): Lista os módulos lentos ou que carregam dependências pesadas.
+-salvar_resultados(resultados, arquivo, formato): Salva os resultados em JSON ou CSV.
+-main(argv): Interface de linha de comando.
+
+"""
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+import aes_crypto
+import aes_modos
+import aes_paralelo
+
+try:
+    from Crypto.Cipher import AES
+except ImportError:  # PyCryptodome é opcional; sem ela a comparação é omitida
+    AES = None
+
+# Tamanhos de mensagem medidos por padrão, em bytes
+TAMANHOS_PADRAO = [16, 1024, 64 * 1024, 1 << 20]
+
+# Tempo mínimo de medição de cada caso, em segundos
+TEMPO_MINIMO_PADRAO = 0.2
+
+# Queda de vazão aceita antes de considerar regressão (10%)
+TOLERANCIA_PADRAO = 0.10
+
+# Maior tamanho medido com o engine "reference"
+LIMITE_REFERENCE = 64 * 1024
+
+# Tempo máximo de importação (segundos) dos módulos usados como biblioteca; conferido sob demanda
+# (--importacao ou AES_TESTAR_TEMPO_IMPORTACAO=1 nos testes), pois depende da máquina
+LIMITES_IMPORTACAO = {
+    'aes_crypto': 0.025,
+    'aes_modos': 0.03,
+    'aes_stream': 0.03,
+    'AesSemLib': 0.025,
+    'aesComLib': 0.08,
+}
+
+# Dependências que só podem ser importadas quando usadas (engines vetorizados e interface de console)
+MODULOS_PROIBIDOS_IMPORTACAO = ('numpy', 'rich')
+
+# Execuções por módulo na medição da importação; vale a mais rápida
+REPETICOES_IMPORTACAO = 5
+
+# Tamanho mínimo medido com vários processos
+_MINIMO_PARALELO = 1 << 20
+
+_CAMPOS = ('caso', 'operacao', 'engine', 'tamanho', 'repeticoes', 'segundos', 'mb_s', 'latencia_bloco_us')
+
+def _interpretar_tamanho(texto):
+    """
+    Converte um tamanho como "64K" ou "1M" em bytes.
+
+    :param texto: Tamanho com sufixo opcional K, M ou G
+    :return: Tamanho em bytes
+    """
+    multiplicadores = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    texto = texto.strip().upper()
+    if texto and texto[-1] in multiplicadores:
+        return int(texto[:-1]) * multiplicadores[texto[-1]]
+    return int(texto)
+
+def medir(funcao, tamanho, tempo_minimo=TEMPO_MINIMO_PADRAO):
+    """
+    Mede uma operação, repetindo-a até atingir o tempo mínimo.
+
+    :param funcao: Função sem argumentos que processa `tamanho` bytes
+    :param tamanho: Quantidade de bytes processados em cada chamada
+    :param tempo_minimo: Tempo mínimo total de medição, em segundos
+    :return: Dicionário com repetições, segundos por chamada, MB/s e latência por bloco
+    """
+    funcao()  # aquecimento: caches de chave e tabelas
+    repeticoes = 0
+    inicio = time.perf_counter()
+    decorrido = 0.0
+    while decorrido < tempo_minimo or repeticoes == 0:
+        funcao()
+        repeticoes += 1
+        decorrido = time.perf_counter() - inicio
+    segundos = decorrido / repeticoes
+    blocos = max(1, tamanho // 16)
+    return {
+        'repeticoes': repeticoes,
+        'segundos': segundos,
+        'mb_s': tamanho / segundos / 1e6 if tamanho else 0.0,
+        'latencia_bloco_us': segundos / blocos * 1e6,
+    }
+
+def gerar_casos(tamanhos=TAMANHOS_PADRAO, engines=None, paralelo=True, pycryptodome=True):
+    """
+    Monta a lista de casos a medir.
+
+    :param tamanhos: Tamanhos de mensagem, em bytes
+    :param engines: Engines de aes_crypto a medir; None mede todos
+    :param paralelo: Inclui os casos com vários processos
+    :param pycryptodome: Inclui a comparação com a PyCryptodome, se instalada
+    :return: Lista de tuplas (operacao, engine, tamanho, funcao)
+    """
+    engines = engines or list(aes_crypto.ENGINES)
+    chave = os.urandom(16)
+    key = aes_crypto.AESKey(chave)
+    iv = os.urandom(16)
+    nonce = os.urandom(12)
+    casos = [
+        ('key_expansion', 'AESKey', 16, lambda: aes_crypto.AESKey(chave)),
+        ('key_expansion', 'cache', 16, lambda: aes_crypto.expandir_chave(chave)),
+    ]
+    bloco = os.urandom(16)
+    for engine in engines:
+        casos.append(('encrypt_block', engine, 16, lambda engine=engine: aes_crypto.encrypt_block(bloco, key, engine)))
+        casos.append(('decrypt_block', engine, 16, lambda engine=engine: aes_crypto.decrypt_block(bloco, key, engine)))
+
+    for tamanho in tamanhos:
+        tamanho -= tamanho % 16
+        if not tamanho:
+            continue
+        dados = os.urandom(tamanho)
+        for engine in engines:
+            if engine == 'reference' and tamanho > LIMITE_REFERENCE:
+                continue
+            casos.append(('ecb', engine, tamanho, lambda dados=dados, engine=engine: aes_crypto.encrypt_blocks(dados, key, engine)))
+        casos.append(('ctr', 'auto', tamanho, lambda dados=dados: aes_modos.encrypt_ctr(dados, key, iv)))
+        casos.append(('gcm', 'auto', tamanho, lambda dados=dados: aes_modos.encrypt_gcm(dados, key, nonce)))
+        if paralelo and tamanho >= _MINIMO_PARALELO:
+            casos.append(('ecb', 'paralelo', tamanho,
+                          lambda dados=dados: aes_paralelo.encrypt_blocks_paralelo(dados, key, limiar=0)))
+        if pycryptodome and AES is not None:
+            casos.append(('ecb', 'pycryptodome', tamanho, lambda dados=dados: AES.new(chave, AES.MODE_ECB).encrypt(dados)))
+            casos.append(('ctr', 'pycryptodome', tamanho,
+                          lambda dados=dados: AES.new(chave, AES.MODE_CTR, initial_value=iv, nonce=b'').encrypt(dados)))
+            casos.append(('gcm', 'pycryptodome', tamanho,
+                          lambda dados=dados: AES.new(chave, AES.MODE_GCM, nonce=nonce).encrypt_and_digest(dados)))
+            casos.append(('eax', 'pycryptodome', tamanho,
+                          lambda dados=dados: AES.new(chave, AES.MODE_EAX, nonce=nonce).encrypt_and_digest(dados)))
+    return casos
+
+def executar_benchmark(tamanhos=TAMANHOS_PADRAO, engines=None, paralelo=True, pycryptodome=True,
+                       tempo_minimo=TEMPO_MINIMO_PADRAO, progresso=None):
+    """
+    Mede todos os casos.
+
+    :param tamanhos: Tamanhos de mensagem, em bytes
+    :param engines: Engines de aes_crypto a medir; None mede todos
+    :param paralelo: Inclui os casos com vários processos
+    :param pycryptodome: Inclui a comparação com a PyCryptodome, se instalada
+    :param tempo_minimo: Tempo mínimo de medição de cada caso, em segundos
+    :param progresso: Função opcional chamada com cada resultado assim que é medido
+    :return: Lista de dicionários de resultado
+    """
+    resultados = []
+    for operacao, engine, tamanho, funcao in gerar_casos(tamanhos, engines, paralelo, pycryptodome):
+        resultado = {'caso': f"{operacao}/{engine}/{tamanho}", 'operacao': operacao, 'engine': engine, 'tamanho': tamanho}
+        resultado.update(medir(funcao, tamanho, tempo_minimo))
+        resultados.append(resultado)
+        if progresso:
+            progresso(resultado)
+    return resultados
+
+def comparar_baseline(resultados, baseline, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Lista os casos mais lentos que o baseline além da tolerância.
+
+    A comparação usa os segundos por chamada, que valem também para os casos
+    sem vazão (expansão de chave).
+
+    :param resultados: Resultados atuais
+    :param baseline: Resultados salvos anteriormente
+    :param tolerancia: Aumento relativo de tempo aceito (0.10 = 10%)
+    :return: Lista de tuplas (caso, segundos no baseline, segundos atuais)
+    """
+    anteriores = {r['caso']: float(r['segundos']) for r in baseline}
+    regressoes = []
+    for resultado in resultados:
+        anterior = anteriores.get(resultado['caso'])
+        if anterior and resultado['segundos'] > anterior * (1 + tolerancia):
+            regressoes.append((resultado['caso'], anterior, resultado['segundos']))
+    return regressoes
+
+def medir_importacao(modulo, repeticoes=REPETICOES_IMPORTACAO):
+    """
+    Mede o tempo de importação de um módulo em um interpretador novo.
+
+    Cada repetição executa `python -X importtime -c "import modulo"` e lê da
+    saída de erro o tempo acumulado do módulo e os módulos importados. Vale
+    a execução mais rápida, o que descarta a compilação dos .pyc na primeira
+    vez e parte do ruído do sistema.
+
+    :param modulo: Nome do módulo
+    :param repeticoes: Quantidade de execuções
+    :return: Tupla (segundos, conjunto dos módulos importados)
+    """
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    melhor = None
+    importados = set()
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'], cwd=diretorio,
+                               capture_output=True, text=True, check=True).stderr
+        tempos = {}
+        for linha in saida.splitlines():
+            campos = linha.partition('import time:')[2].split('|')
+            if len(campos) == 3 and campos[1].strip().isdigit():
+                tempos[campos[2].strip()] = int(campos[1]) / 1e6
+        importados = set(tempos)
+        if melhor is None or tempos[modulo] < melhor:
+            melhor = tempos[modulo]
+    return melhor, importados
+
+def verificar_importacao(limites=LIMITES_IMPORTACAO, proibidos=MODULOS_PROIBIDOS_IMPORTACAO,
+                         repeticoes=REPETICOES_IMPORTACAO, progresso=None):
+    """
+    Confere se a importação dos módulos continua rápida e sem dependências pesadas.
+
+    :param limites: Dicionário módulo -> tempo máximo de importação em segundos
+    :param proibidos: Pacotes que a importação não pode carregar
+    :param repeticoes: Execuções por módulo
+    :param progresso: Função opcional chamada com (módulo, segundos) após cada medição
+    :return: Lista de mensagens descrevendo os problemas encontrados
+    """
+    problemas = []
+    for modulo, limite in limites.items():
+        segundos, importados = medir_importacao(modulo, repeticoes)
+        if progresso:
+            progresso(modulo, segundos)
+        if segundos > limite:
+            problemas.append(f"{modulo}: {segundos * 1e3:.1f} ms (limite {limite * 1e3:.1f} ms)")
+        carregados = sorted({nome.split('.')[0] for nome in importados} & set(proibidos))
+        if carregados:
+            problemas.append(f"{modulo}: importa {', '.join(carregados)}")
+    return problemas
+
+def carregar_resultados(arquivo):
+    """
+    Carrega resultados salvos em JSON ou CSV (conforme a extensão).
+
+    :param arquivo: Caminho do arquivo
+    :return: Lista de dicionários de resultado
+    """
+    with open(arquivo, newline='') as f:
+        if arquivo.endswith('.csv'):
+            return list(csv.DictReader(f))
+        return json.load(f)['resultados']
+
+def salvar_resultados(resultados, arquivo=None, formato='json'):
+    """
+    Salva os resultados em JSON ou CSV.
+
+    :param resultados: Lista de dicionários de resultado
+    :param arquivo: Caminho do arquivo; None escreve na saída padrão
+    :param formato: "json" ou "csv"
+    """
+    destino = open(arquivo, 'w', newline='') if arquivo else sys.stdout
+    try:
+        if formato == 'csv':
+            escritor = csv.DictWriter(destino, fieldnames=_CAMPOS)
+            escritor.writeheader()
+            escritor.writerows(resultados)
+        else:
+            json.dump({'python': sys.version.split()[0], 'numpy': aes_crypto.carregar_numpy() is not None,
+                       'resultados': resultados}, destino, indent=2)
+            destino.write('\n')
+    finally:
+        if arquivo:
+            destino.close()
+
+def main(argv=None):
+    """
+    Interface de linha de comando do benchmark.
+
+    :param argv: Argumentos (None usa sys.argv)
+    :return: Código de saída (1 se houver regressão em relação ao baseline ou na importação)
+    """
+    parser = argparse.ArgumentParser(description="Benchmark do AES próprio e da PyCryptodome")
+    parser.add_argument('--tamanhos', nargs='+', default=[str(t) for t in TAMANHOS_PADRAO],
+                        help="tamanhos de mensagem (aceita sufixos K, M e G)")
+    parser.add_argument('--engines', nargs='+', choices=list(aes_crypto.ENGINES), help="engines a medir (padrão: todos)")
+    parser.add_argument('--sem-paralelo', action='store_true', help="não mede os casos com vários processos")
+    parser.add_argument('--sem-pycryptodome', action='store_true', help="não mede a PyCryptodome")
+    parser.add_argument('--tempo-minimo', type=float, default=TEMPO_MINIMO_PADRAO, help="segundos de medição por caso")
+    parser.add_argument('--formato', choices=('json', 'csv'), default='json')
+    parser.add_argument('--saida', help="arquivo de saída (padrão: saída padrão)")
+    parser.add_argument('--baseline', help="resultados anteriores (JSON ou CSV) para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="aumento de tempo aceito (0.10 = 10%%)")
+    parser.add_argument('--importacao', action='store_true',
+                        help="mede só a importação dos módulos (-X importtime) e falha acima de LIMITES_IMPORTACAO")
+    args = parser.parse_args(argv)
+
+    if args.importacao:
+        problemas = verificar_importacao(progresso=lambda modulo, segundos: print(f"{modulo:<40} {segundos * 1e3:10.2f} ms",
+                                                                                    file=sys.stderr))
+        for problema in problemas:
+            print(f"REGRESSÃO importação {problema}", file=sys.stderr)
+        return 1 if problemas else 0
+
+    def progresso(resultado):
+        print(f"{resultado['caso']:<40} {resultado['mb_s']:10.2f} MB/s {resultado['latencia_bloco_us']:10.2f} us/bloco",
+              file=sys.stderr)
+
+    resultados = executar_benchmark([_interpretar_tamanho(t) for t in args.tamanhos], args.engines,
+                                    not args.sem_paralelo, not args.sem_pycryptodome, args.tempo_minimo, progresso)
+    salvar_resultados(resultados, args.saida, args.formato)
+
+    if args.baseline:
+        regressoes = comparar_baseline(resultados, carregar_resultados(args.baseline), args.tolerancia)
+        for caso, anterior, atual in regressoes:
+            print(f"REGRESSÃO {caso}: {anterior * 1e6:.2f} us -> {atual * 1e6:.2f} us", file=sys.stderr)
+        if regressoes:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
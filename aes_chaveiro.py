@@ -0,0 +1,547 @@
+"""
+Módulo com um chaveiro: registro de chaves por identificador, com escalonamentos já expandidos.
+
+Os arquivos gerados por aes_crypto.salvar_mensagem_encriptada e por
+aesComLib não guardam qual chave foi usada, então decriptar um conjunto de
+arquivos exige tentar as chaves às cegas. Aqui cada mensagem e cada
+arquivo levam no cabeçalho um identificador curto da chave; o chaveiro
+resolve o identificador com uma consulta a um dicionário e devolve a
+AESKey já expandida, que fica guardada para os próximos usos.
+
+As chaves ficam em um armazém plugável: em memória, em um arquivo JSON ou
+em um banco SQLite. Qualquer objeto com os métodos obter, guardar,
+remover, listar, obter_ativa e definir_ativa pode ser usado como armazém.
+Os armazéns em arquivo guardam as chaves sem proteção adicional; o arquivo
+deve ter as permissões restritas ao dono.
+
+Estrutura de uma mensagem selada:
+-Cabeçalho: magic, versão, tamanho e bytes do identificador da chave.
+-iv (12 bytes), texto cifrado e tag (16 bytes) do GCM, com o cabeçalho como dados adicionais autenticados.
+
+Os arquivos usam o contêiner de aes_container, que já grava o
+identificador da chave no cabeçalho.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-json, os, secrets, sqlite3, struct e threading são importadas para os armazéns, os identificadores e o cabeçalho.
+-concurrent.futures é importada para a reencriptação em lote.
+-aes_crypto, aes_modos, aes_container e aes_kdf fornecem a expansão das chaves, o GCM, o contêiner e a geração de chaves.
+-aes_stream fornece a gravação atômica do armazém JSON e dos contêineres reencriptados.
+
+Variáveis Globais:
+-MAGIC / VERSAO: Identificador e versão do cabeçalho das mensagens seladas.
+
+Classes:
+-ArmazemMemoria(): Armazém de chaves em um dicionário.
+-ArmazemJSON(caminho): Armazém de chaves em um arquivo JSON, gravado de forma atômica.
+-ArmazemSQLite(caminho): Armazém de chaves em um banco SQLite.
+-Chaveiro(armazem): Resolve identificadores em AESKey já expandidas e mantém a chave ativa.
+
+Funções Principais:
+-ler_key_id(mensagem): Lê o identificador da chave de uma mensagem selada.
+-selar(data, chaveiro, key_id, engine): Encripta uma mensagem com o identificador da chave no cabeçalho.
+-abrir(mensagem, chaveiro, engine): Decripta uma mensagem selada com a chave indicada no cabeçalho.
+-encrypt_file(origem, destino, chaveiro, key_id, chunk_size, engine): Encripta um arquivo em contêiner com a chave do chaveiro.
+-decrypt_file(origem, destino, chaveiro, engine): Decripta um contêiner com a chave indicada no cabeçalho.
+-reencriptar_arquivo(caminho, chave_antiga, chave_nova, key_id_novo, engine): Reencripta um contêiner com outra chave.
+-reencriptar_lote(caminhos, chaveiro, key_id_novo, workers, engine): Reencripta vários contêineres com a chave ativa.
+
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import struct
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import aes_container
+import aes_crypto
+import aes_kdf
+import aes_modos
+import aes_stream
+
+# Identificador e versão do cabeçalho das mensagens seladas
+MAGIC = b'AESK'
+VERSAO = 1
+
+# magic, versão, tamanho do identificador da chave
+_FORMATO_CABECALHO = '>4sBB'
+
+def _normalizar_id(key_id):
+    """
+    Converte um identificador de chave em str.
+
+    :param key_id: Identificador (str ou bytes, como o lido de um cabeçalho)
+    :return: Identificador como str
+    """
+    if isinstance(key_id, (bytes, bytearray)):
+        key_id = bytes(key_id).decode('utf-8')
+    if not key_id or len(key_id.encode('utf-8')) > 255:
+        raise ValueError("O identificador da chave deve ter entre 1 e 255 bytes")
+    return key_id
+
+class ArmazemMemoria:
+    """
+    Armazém de chaves em um dicionário, sem persistência.
+    """
+
+    def __init__(self):
+        self._chaves = {}
+        self._ativa = None
+
+    def obter(self, key_id):
+        """
+        :param key_id: Identificador da chave
+        :return: Chave (bytes) ou None
+        """
+        return self._chaves.get(key_id)
+
+    def guardar(self, key_id, chave):
+        """
+        :param key_id: Identificador da chave
+        :param chave: Chave (bytes)
+        """
+        self._chaves[key_id] = bytes(chave)
+
+    def remover(self, key_id):
+        """
+        :param key_id: Identificador da chave
+        """
+        self._chaves.pop(key_id, None)
+        if self._ativa == key_id:
+            self._ativa = None
+
+    def listar(self):
+        """
+        :return: Lista dos identificadores guardados
+        """
+        return list(self._chaves)
+
+    def obter_ativa(self):
+        """
+        :return: Identificador da chave ativa ou None
+        """
+        return self._ativa
+
+    def definir_ativa(self, key_id):
+        """
+        :param key_id: Identificador da nova chave ativa
+        """
+        self._ativa = key_id
+
+class ArmazemJSON(ArmazemMemoria):
+    """
+    Armazém de chaves em um arquivo JSON (chaves em hexadecimal).
+
+    O arquivo é lido na criação e regravado de forma atômica (arquivo
+    temporário seguido de rename) a cada alteração.
+    """
+
+    def __init__(self, caminho):
+        """
+        :param caminho: Caminho do arquivo JSON (str ou Path); criado na primeira alteração se não existir
+        """
+        super().__init__()
+        self.caminho = os.fspath(caminho)
+        try:
+            with open(caminho) as f:
+                dados = json.load(f)
+        except FileNotFoundError:
+            return
+        self._chaves = {key_id: bytes.fromhex(chave) for key_id, chave in dados.get('chaves', {}).items()}
+        self._ativa = dados.get('ativa')
+
+    def _salvar(self):
+        """
+        Regrava o arquivo de forma atômica, com permissão apenas para o dono.
+
+        O temporário de aes_stream.escrever_atomico é criado com tempfile.mkstemp (permissão 0600)
+        e sincronizado antes de substituir o arquivo.
+        """
+        dados = json.dumps({'ativa': self._ativa, 'chaves': {key_id: chave.hex() for key_id, chave in self._chaves.items()}},
+                           indent=1, sort_keys=True)
+        aes_stream.escrever_atomico(self.caminho, lambda f: f.write(dados.encode('utf-8')))
+
+    def guardar(self, key_id, chave):
+        super().guardar(key_id, chave)
+        self._salvar()
+
+    def remover(self, key_id):
+        super().remover(key_id)
+        self._salvar()
+
+    def definir_ativa(self, key_id):
+        super().definir_ativa(key_id)
+        self._salvar()
+
+class ArmazemSQLite:
+    """
+    Armazém de chaves em um banco SQLite, consultado a cada chave ainda não carregada.
+    """
+
+    def __init__(self, caminho):
+        """
+        :param caminho: Caminho do banco; criado se não existir
+        """
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        with self._trava, self._conexao:
+            self._conexao.execute("CREATE TABLE IF NOT EXISTS chaves (key_id TEXT PRIMARY KEY, chave BLOB NOT NULL)")
+            self._conexao.execute("CREATE TABLE IF NOT EXISTS meta (nome TEXT PRIMARY KEY, valor TEXT)")
+
+    def obter(self, key_id):
+        with self._trava:
+            linha = self._conexao.execute("SELECT chave FROM chaves WHERE key_id = ?", (key_id,)).fetchone()
+        return bytes(linha[0]) if linha else None
+
+    def guardar(self, key_id, chave):
+        with self._trava, self._conexao:
+            self._conexao.execute("INSERT OR REPLACE INTO chaves (key_id, chave) VALUES (?, ?)", (key_id, bytes(chave)))
+
+    def remover(self, key_id):
+        with self._trava, self._conexao:
+            self._conexao.execute("DELETE FROM chaves WHERE key_id = ?", (key_id,))
+            self._conexao.execute("DELETE FROM meta WHERE nome = 'ativa' AND valor = ?", (key_id,))
+
+    def listar(self):
+        with self._trava:
+            return [linha[0] for linha in self._conexao.execute("SELECT key_id FROM chaves ORDER BY key_id")]
+
+    def obter_ativa(self):
+        with self._trava:
+            linha = self._conexao.execute("SELECT valor FROM meta WHERE nome = 'ativa'").fetchone()
+        return linha[0] if linha else None
+
+    def definir_ativa(self, key_id):
+        with self._trava, self._conexao:
+            self._conexao.execute("INSERT OR REPLACE INTO meta (nome, valor) VALUES ('ativa', ?)", (key_id,))
+
+    def fechar(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        self._conexao.close()
+
+class Chaveiro:
+    """
+    Resolve identificadores de chave em AESKey já expandidas.
+
+    Cada chave é expandida uma única vez, na primeira consulta ou em
+    aquecer(), e depois é devolvida diretamente do dicionário interno. A
+    chave ativa é a usada para encriptar quando nenhum identificador é
+    informado; rotacionar() cria uma nova chave ativa e mantém as antigas
+    para decriptar os dados existentes.
+    """
+
+    def __init__(self, armazem=None):
+        """
+        :param armazem: Armazém das chaves; None usa um ArmazemMemoria
+        """
+        self._armazem = ArmazemMemoria() if armazem is None else armazem
+        self._expandidas = {}
+        self._trava = threading.Lock()
+
+    def adicionar(self, chave=None, key_id=None, ativar=False, tamanho=32):
+        """
+        Adiciona uma chave ao chaveiro.
+
+        :param chave: Chave (16, 24 ou 32 bytes); None gera uma aleatória
+        :param key_id: Identificador; None gera um aleatório de 8 caracteres hexadecimais
+        :param ativar: True para torná-la a chave ativa
+        :param tamanho: Tamanho da chave gerada quando chave é None
+        :return: Identificador da chave
+        :raises ValueError: Se o identificador já estiver em uso (substituir a chave tornaria os dados
+                            encriptados com ela ilegíveis; use remover() antes, se for essa a intenção)
+        """
+        chave = aes_kdf.gerar_chave(tamanho) if chave is None else bytes(chave)
+        expandida = aes_crypto.AESKey(chave)
+        with self._trava:
+            if key_id is None:
+                key_id = secrets.token_hex(4)
+                while key_id in self._expandidas or self._armazem.obter(key_id) is not None:
+                    key_id = secrets.token_hex(4)
+            key_id = _normalizar_id(key_id)
+            if key_id in self._expandidas or self._armazem.obter(key_id) is not None:
+                raise ValueError(f"Já existe uma chave com o identificador {key_id}")
+            self._armazem.guardar(key_id, chave)
+            self._expandidas[key_id] = expandida
+            if ativar:
+                self._armazem.definir_ativa(key_id)
+        return key_id
+
+    def obter(self, key_id):
+        """
+        Retorna a AESKey de um identificador.
+
+        :param key_id: Identificador da chave (str ou bytes)
+        :return: AESKey já expandida
+        :raises ValueError: Se o identificador não estiver no chaveiro
+        """
+        expandida = self._expandidas.get(key_id)
+        if expandida is not None:
+            return expandida
+        key_id = _normalizar_id(key_id)
+        with self._trava:
+            expandida = self._expandidas.get(key_id)
+            if expandida is None:
+                chave = self._armazem.obter(key_id)
+                if chave is None:
+                    raise ValueError(f"Chave desconhecida: {key_id}")
+                expandida = self._expandidas[key_id] = aes_crypto.AESKey(chave)
+        return expandida
+
+    def remover(self, key_id):
+        """
+        Remove uma chave do chaveiro e do armazém.
+
+        :param key_id: Identificador da chave
+        """
+        key_id = _normalizar_id(key_id)
+        with self._trava:
+            self._expandidas.pop(key_id, None)
+            self._armazem.remover(key_id)
+
+    def ids(self):
+        """
+        :return: Lista dos identificadores de chave do armazém
+        """
+        return self._armazem.listar()
+
+    @property
+    def ativa(self):
+        """
+        Identificador da chave ativa, ou None se nenhuma foi definida.
+        """
+        return self._armazem.obter_ativa()
+
+    def ativar(self, key_id):
+        """
+        Define a chave ativa.
+
+        :param key_id: Identificador de uma chave do chaveiro
+        """
+        key_id = _normalizar_id(key_id)
+        self.obter(key_id)
+        self._armazem.definir_ativa(key_id)
+
+    def chave_ativa(self):
+        """
+        Retorna o identificador e a AESKey da chave ativa.
+
+        :return: Tupla (identificador, AESKey)
+        :raises ValueError: Se nenhuma chave ativa foi definida
+        """
+        key_id = self.ativa
+        if key_id is None:
+            raise ValueError("Nenhuma chave ativa no chaveiro")
+        return key_id, self.obter(key_id)
+
+    def rotacionar(self, tamanho=32):
+        """
+        Gera uma nova chave e a torna ativa; as anteriores continuam disponíveis.
+
+        :param tamanho: Tamanho da nova chave em bytes
+        :return: Identificador da nova chave
+        """
+        return self.adicionar(tamanho=tamanho, ativar=True)
+
+    def aquecer(self):
+        """
+        Expande antecipadamente todas as chaves do armazém.
+        """
+        for key_id in self.ids():
+            self.obter(key_id)
+
+    def __contains__(self, key_id):
+        try:
+            self.obter(key_id)
+        except ValueError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.ids())
+
+def _resolver(chaveiro, key_id):
+    """
+    Retorna o identificador e a AESKey a usar na encriptação.
+
+    :param chaveiro: Chaveiro
+    :param key_id: Identificador informado; None usa a chave ativa
+    :return: Tupla (identificador, AESKey)
+    """
+    if key_id is None:
+        return chaveiro.chave_ativa()
+    key_id = _normalizar_id(key_id)
+    return key_id, chaveiro.obter(key_id)
+
+def _ler_cabecalho(mensagem):
+    """
+    Lê o cabeçalho de uma mensagem selada.
+
+    :param mensagem: Mensagem selada
+    :return: Tupla (identificador, tamanho do cabeçalho)
+    :raises ValueError: Se a mensagem não tiver um cabeçalho válido
+    """
+    tamanho_fixo = struct.calcsize(_FORMATO_CABECALHO)
+    if len(mensagem) < tamanho_fixo or bytes(mensagem[:4]) != MAGIC:
+        raise ValueError("A mensagem não foi selada com um chaveiro")
+    _, versao, tamanho_id = struct.unpack(_FORMATO_CABECALHO, mensagem[:tamanho_fixo])
+    if versao != VERSAO:
+        raise ValueError(f"Versão de mensagem não suportada: {versao}")
+    fim = tamanho_fixo + tamanho_id
+    if len(mensagem) < fim + 12 + aes_modos.TAMANHO_TAG:
+        raise ValueError("Mensagem truncada")
+    return bytes(mensagem[tamanho_fixo:fim]).decode('utf-8'), fim
+
+def ler_key_id(mensagem):
+    """
+    Lê o identificador da chave de uma mensagem selada, sem decriptá-la.
+
+    :param mensagem: Mensagem selada
+    :return: Identificador da chave
+    """
+    return _ler_cabecalho(mensagem)[0]
+
+def selar(data, chaveiro, key_id=None, engine=None):
+    """
+    Encripta uma mensagem com GCM, gravando o identificador da chave no cabeçalho.
+
+    :param data: Dados a encriptar
+    :param chaveiro: Chaveiro
+    :param key_id: Identificador da chave; None usa a chave ativa
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Mensagem selada (cabeçalho, iv, texto cifrado e tag)
+    """
+    key_id, key = _resolver(chaveiro, key_id)
+    identificador = key_id.encode('utf-8')
+    cabecalho = struct.pack(_FORMATO_CABECALHO, MAGIC, VERSAO, len(identificador)) + identificador
+    iv = os.urandom(12)
+    ciphertext, tag = aes_modos.encrypt_gcm(data, key, iv, cabecalho, engine)
+    return cabecalho + iv + ciphertext + tag
+
+def abrir(mensagem, chaveiro, engine=None):
+    """
+    Decripta uma mensagem selada com a chave indicada no cabeçalho.
+
+    :param mensagem: Mensagem selada
+    :param chaveiro: Chaveiro
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Dados decriptados
+    :raises ValueError: Se a chave não estiver no chaveiro ou a mensagem estiver corrompida
+    """
+    key_id, fim = _ler_cabecalho(mensagem)
+    key = chaveiro.obter(key_id)
+    mensagem = memoryview(mensagem)
+    iv = bytes(mensagem[fim:fim + 12])
+    return aes_modos.decrypt_gcm(bytes(mensagem[fim + 12:-aes_modos.TAMANHO_TAG]), bytes(mensagem[-aes_modos.TAMANHO_TAG:]),
+                                 key, iv, bytes(mensagem[:fim]), engine)
+
+def encrypt_file(origem, destino, chaveiro, key_id=None, chunk_size=aes_container.TAMANHO_CHUNK_PADRAO, engine=None):
+    """
+    Encripta um arquivo no formato de contêiner, com o identificador da chave no cabeçalho.
+
+    :param origem: Caminho do arquivo original
+    :param destino: Caminho do contêiner
+    :param chaveiro: Chaveiro
+    :param key_id: Identificador da chave; None usa a chave ativa
+    :param chunk_size: Tamanho do texto original de cada chunk
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Identificador da chave usada
+    """
+    key_id, key = _resolver(chaveiro, key_id)
+    aes_container.encrypt_container(origem, destino, key, key_id, chunk_size, engine)
+    return key_id
+
+def decrypt_file(origem, destino, chaveiro, engine=None):
+    """
+    Decripta um contêiner com a chave indicada no seu cabeçalho.
+
+    :param origem: Caminho do contêiner
+    :param destino: Caminho do arquivo decriptado
+    :param chaveiro: Chaveiro
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :raises ValueError: Se a chave não estiver no chaveiro ou o contêiner estiver corrompido
+    """
+    key = chaveiro.obter(aes_container.ler_cabecalho(origem).key_id)
+    aes_container.decrypt_container(origem, destino, key, engine)
+
+def reencriptar_arquivo(caminho, chave_antiga, chave_nova, key_id_novo, engine=None):
+    """
+    Reencripta um contêiner com outra chave (executado nos processos do pool).
+
+    Os chunks são decriptados e encriptados em sequência para um arquivo
+    temporário (aes_stream.escrever_atomico), que substitui o original com
+    rename; o texto original nunca é gravado em disco.
+
+    :param caminho: Caminho do contêiner
+    :param chave_antiga: Chave atual do contêiner (bytes)
+    :param chave_nova: Nova chave (bytes)
+    :param key_id_novo: Identificador da nova chave
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Tamanho do conteúdo original
+    """
+    def escrever(dst):
+        with aes_container.EscritorContainer(dst, chave_nova, key_id_novo, leitor.cabecalho.chunk_size,
+                                             engine) as escritor:
+            for chunk in leitor:
+                escritor.write(chunk)
+
+    with open(caminho, 'rb') as src:
+        leitor = aes_container.LeitorContainer(src, chave_antiga, engine)
+        aes_stream.escrever_atomico(caminho, escrever)
+    return leitor.tamanho
+
+def reencriptar_lote(caminhos, chaveiro, key_id_novo=None, workers=None, engine=None):
+    """
+    Reencripta vários contêineres com uma nova chave, em um pool de processos.
+
+    Contêineres que já usam a nova chave são pulados. Usado depois de
+    rotacionar(), para que as chaves antigas possam ser removidas.
+
+    :param caminhos: Caminhos dos contêineres
+    :param chaveiro: Chaveiro com as chaves antigas e a nova
+    :param key_id_novo: Identificador da nova chave; None usa a chave ativa
+    :param workers: Quantidade de processos; None usa a quantidade de núcleos
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Dicionário com as quantidades reencriptadas, puladas e com erro
+    """
+    key_id_novo, chave_nova = _resolver(chaveiro, key_id_novo)
+    resumo = {'reencriptados': 0, 'pulados': 0, 'erros': 0}
+    tarefas = []
+    for caminho in caminhos:
+        try:
+            key_id = _normalizar_id(aes_container.ler_cabecalho(caminho).key_id)
+            if key_id == key_id_novo:
+                resumo['pulados'] += 1
+                continue
+            tarefas.append((caminho, chaveiro.obter(key_id).key))
+        except (OSError, ValueError) as e:
+            resumo['erros'] += 1
+            resumo.setdefault('falhas', {})[caminho] = str(e)
+
+    def concluir(caminho, executar):
+        try:
+            executar()
+            resumo['reencriptados'] += 1
+        except (OSError, ValueError) as e:
+            resumo['erros'] += 1
+            resumo.setdefault('falhas', {})[caminho] = str(e)
+
+    if (workers or os.cpu_count() or 1) == 1 or len(tarefas) <= 1:
+        for caminho, chave_antiga in tarefas:
+            concluir(caminho, lambda: reencriptar_arquivo(caminho, chave_antiga, chave_nova.key, key_id_novo, engine))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = {pool.submit(reencriptar_arquivo, caminho, chave_antiga, chave_nova.key, key_id_novo, engine): caminho
+                       for caminho, chave_antiga in tarefas}
+            for futuro in as_completed(futuros):
+                concluir(futuros[futuro], futuro.result)
+    return resumo
@@ -0,0 +1,416 @@
+"""
+Módulo com um formato de contêiner encriptado, versionado, dividido em chunks e com índice.
+
+Diferente dos arquivos de aes_crypto.salvar_mensagem_encriptada (texto
+cifrado sem cabeçalho) e do formato nonce|tag|texto cifrado de aesComLib
+(um único tag para o arquivo inteiro), o contêiner autentica cada chunk de
+forma independente com GCM. Assim, para ler qualquer trecho basta decriptar
+os chunks que o contêm, e um chunk corrompido é detectado isoladamente.
+
+Estrutura do arquivo:
+-Cabeçalho: magic, versão, modo, tamanho do chunk, nonce base e identificador da chave.
+-Chunks: texto cifrado seguido do tag (16 bytes). O iv de cada chunk é o nonce base seguido do
+ número do chunk, e os dados adicionais autenticados são o cabeçalho, o número do chunk e a
+ indicação de último chunk, o que impede trocar, reordenar ou truncar chunks.
+-Índice: posição e tamanho original de cada chunk, autenticado por um tag próprio.
+-Rodapé: posição do índice, tamanho total, quantidade de chunks, tag do índice e magic final.
+ Os campos do rodapé não são autenticados; o leitor só os usa para localizar o índice (qualquer
+ alteração muda os bytes lidos e invalida o tag) e calcula o tamanho total a partir das
+ entradas autenticadas do índice.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-os é importada para gerar o nonce base.
+-struct é importada para empacotar cabeçalho, índice e rodapé.
+-aes_crypto e aes_modos fornecem a expansão da chave e o modo GCM.
+-aes_stream fornece a leitura em partes e a gravação atômica dos arquivos.
+
+Variáveis Globais:
+-MAGIC / MAGIC_FIM: Identificadores do início e do fim do contêiner.
+-VERSAO: Versão do formato gravada no cabeçalho.
+-MODO_GCM: Código do modo de operação dos chunks.
+-TAMANHO_CHUNK_PADRAO: Tamanho padrão do texto original de cada chunk.
+
+Classes:
+-Cabecalho: Campos do cabeçalho do contêiner.
+-EscritorContainer(dst, key, key_id, chunk_size, engine): Grava um contêiner a partir de dados recebidos em partes.
+-LeitorContainer(src, key, engine): Lê chunks e trechos arbitrários de um contêiner.
+
+Funções Principais:
+-ler_cabecalho(caminho): Lê o cabeçalho de um contêiner (sem precisar da chave).
+-encrypt_container(origem, destino, key, key_id, chunk_size, engine): Encripta um arquivo no formato de contêiner.
+-decrypt_container(origem, destino, key, engine): Decripta um contêiner inteiro para um arquivo.
+ As duas gravam em um temporário e só substituem o destino quando terminam sem erro.
+-read_range(caminho, offset, length, key, engine): Decripta apenas um trecho de um contêiner.
+
+"""
+
+import os
+import struct
+
+import aes_crypto
+import aes_modos
+import aes_stream
+
+# Identificadores do início e do fim do contêiner
+MAGIC = b'AESC'
+MAGIC_FIM = b'CSEA'
+
+# Versão do formato gravada no cabeçalho
+VERSAO = 1
+
+# Código do modo de operação dos chunks
+MODO_GCM = 1
+
+# Tamanho padrão do texto original de cada chunk (64 KiB)
+TAMANHO_CHUNK_PADRAO = 64 * 1024
+
+# magic, versão, modo, tamanho do chunk, nonce base, tamanho do identificador da chave
+_FORMATO_CABECALHO = '>4sBBI8sB'
+# posição e tamanho original de cada chunk
+_FORMATO_INDICE = '>QI'
+# posição do índice, tamanho total, quantidade de chunks, tag do índice, magic final
+_FORMATO_RODAPE = '>QQI16s4s'
+_TAMANHO_RODAPE = struct.calcsize(_FORMATO_RODAPE)
+# Número de chunk reservado para o iv do tag do índice
+_CHUNK_INDICE = 0xffffffff
+
+class Cabecalho:
+    """
+    Campos do cabeçalho de um contêiner.
+    """
+
+    __slots__ = ('versao', 'modo', 'chunk_size', 'nonce', 'key_id', 'dados')
+
+    def __init__(self, versao, modo, chunk_size, nonce, key_id, dados):
+        """
+        :param versao: Versão do formato
+        :param modo: Código do modo de operação
+        :param chunk_size: Tamanho do texto original de cada chunk
+        :param nonce: Nonce base (8 bytes)
+        :param key_id: Identificador da chave (bytes)
+        :param dados: Bytes do cabeçalho, autenticados em todos os chunks
+        """
+        self.versao = versao
+        self.modo = modo
+        self.chunk_size = chunk_size
+        self.nonce = nonce
+        self.key_id = key_id
+        self.dados = dados
+
+    @classmethod
+    def criar(cls, chunk_size, key_id=b''):
+        """
+        Cria o cabeçalho de um novo contêiner, com nonce base aleatório.
+
+        :param chunk_size: Tamanho do texto original de cada chunk
+        :param key_id: Identificador da chave (bytes ou str, até 255 bytes)
+        :return: Cabecalho
+        """
+        if isinstance(key_id, str):
+            key_id = key_id.encode('utf-8')
+        if len(key_id) > 255:
+            raise ValueError("O identificador da chave deve ter no máximo 255 bytes")
+        if not 0 < chunk_size < 1 << 32:
+            raise ValueError("Tamanho de chunk inválido")
+        nonce = os.urandom(8)
+        dados = struct.pack(_FORMATO_CABECALHO, MAGIC, VERSAO, MODO_GCM, chunk_size, nonce, len(key_id)) + key_id
+        return cls(VERSAO, MODO_GCM, chunk_size, nonce, key_id, dados)
+
+    @classmethod
+    def ler(cls, src):
+        """
+        Lê o cabeçalho do início de um objeto de arquivo.
+
+        :param src: Objeto com read() em modo binário, posicionado no início
+        :return: Cabecalho
+        :raises ValueError: Se o arquivo não for um contêiner de versão suportada
+        """
+        fixo = src.read(struct.calcsize(_FORMATO_CABECALHO))
+        if len(fixo) < struct.calcsize(_FORMATO_CABECALHO) or fixo[:4] != MAGIC:
+            raise ValueError("O arquivo não é um contêiner encriptado")
+        _, versao, modo, chunk_size, nonce, tamanho_key_id = struct.unpack(_FORMATO_CABECALHO, fixo)
+        if versao != VERSAO or modo != MODO_GCM:
+            raise ValueError(f"Versão ou modo de contêiner não suportado: {versao}/{modo}")
+        key_id = src.read(tamanho_key_id)
+        return cls(versao, modo, chunk_size, nonce, key_id, fixo + key_id)
+
+    def iv(self, indice):
+        """
+        Retorna o iv de um chunk.
+
+        :param indice: Número do chunk
+        :return: iv de 12 bytes
+        """
+        return self.nonce + struct.pack('>I', indice)
+
+    def aad(self, indice, ultimo):
+        """
+        Retorna os dados adicionais autenticados de um chunk.
+
+        :param indice: Número do chunk
+        :param ultimo: True se for o último chunk
+        :return: Dados adicionais autenticados
+        """
+        return self.dados + struct.pack('>I?', indice, ultimo)
+
+class EscritorContainer:
+    """
+    Grava um contêiner a partir de dados recebidos em partes.
+
+    O último chunk só é conhecido no fechamento, por isso um chunk completo
+    fica retido até que chegue mais algum dado ou close() seja chamado.
+    Usado com `with`, uma exceção dentro do bloco abandona a gravação sem
+    índice nem rodapé, e o contêiner incompleto nunca é aceito pelo leitor.
+    """
+
+    def __init__(self, dst, key, key_id=b'', chunk_size=TAMANHO_CHUNK_PADRAO, engine=None):
+        """
+        Escreve o cabeçalho e prepara a gravação dos chunks.
+
+        :param dst: Objeto com write() em modo binário
+        :param key: Chave de encriptação (bytes ou AESKey)
+        :param key_id: Identificador da chave gravado no cabeçalho
+        :param chunk_size: Tamanho do texto original de cada chunk
+        :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+        """
+        self._dst = dst
+        self._key = aes_crypto.expandir_chave(key)
+        self._engine = engine
+        self.cabecalho = Cabecalho.criar(chunk_size, key_id)
+        self._pendente = bytearray()
+        self._indice = []
+        self._posicao = len(self.cabecalho.dados)
+        self._tamanho_total = 0
+        self._fechado = False
+        dst.write(self.cabecalho.dados)
+
+    def _gravar_chunk(self, data, ultimo):
+        """
+        Encripta e grava um chunk, registrando-o no índice.
+
+        :param data: Texto original do chunk
+        :param ultimo: True se for o último chunk
+        """
+        indice = len(self._indice)
+        ciphertext, tag = aes_modos.encrypt_gcm(data, self._key, self.cabecalho.iv(indice),
+                                                self.cabecalho.aad(indice, ultimo), self._engine)
+        self._dst.write(ciphertext)
+        self._dst.write(tag)
+        self._indice.append((self._posicao, len(data)))
+        self._posicao += len(ciphertext) + len(tag)
+        self._tamanho_total += len(data)
+
+    def write(self, data):
+        """
+        Acrescenta dados ao contêiner.
+
+        :param data: Dados a encriptar
+        :return: Quantidade de bytes recebidos
+        """
+        if self._fechado:
+            raise ValueError("Contêiner já fechado")
+        self._pendente += data
+        chunk_size = self.cabecalho.chunk_size
+        while len(self._pendente) > chunk_size:
+            self._gravar_chunk(bytes(self._pendente[:chunk_size]), False)
+            del self._pendente[:chunk_size]
+        return len(data)
+
+    def close(self):
+        """
+        Grava o último chunk, o índice autenticado e o rodapé.
+        """
+        if self._fechado:
+            return
+        self._gravar_chunk(bytes(self._pendente), True)
+        self._pendente.clear()
+        indice = b''.join(struct.pack(_FORMATO_INDICE, posicao, tamanho) for posicao, tamanho in self._indice)
+        _, tag = aes_modos.encrypt_gcm(b'', self._key, self.cabecalho.iv(_CHUNK_INDICE), self.cabecalho.dados + indice)
+        self._dst.write(indice)
+        self._dst.write(struct.pack(_FORMATO_RODAPE, self._posicao, self._tamanho_total, len(self._indice), tag, MAGIC_FIM))
+        self._fechado = True
+
+    def __enter__(self):
+        return self
+
+    def abandonar(self):
+        """
+        Encerra a gravação sem o último chunk, o índice e o rodapé, deixando um contêiner inválido.
+        """
+        self._pendente.clear()
+        self._fechado = True
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.abandonar()
+
+class LeitorContainer:
+    """
+    Lê chunks e trechos arbitrários de um contêiner.
+
+    Na abertura são lidos apenas o cabeçalho, o rodapé e o índice; cada
+    leitura depois disso decripta somente os chunks necessários.
+    """
+
+    def __init__(self, src, key, engine=None):
+        """
+        Lê o cabeçalho, o rodapé e o índice e confere o tag do índice.
+
+        :param src: Objeto com read() e seek() em modo binário
+        :param key: Chave de decriptação (bytes ou AESKey)
+        :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+        :raises ValueError: Se o arquivo não for um contêiner válido, o índice estiver corrompido ou o rodapé
+                            não corresponder ao índice
+        """
+        self._src = src
+        self._key = aes_crypto.expandir_chave(key)
+        self._engine = engine
+        src.seek(0)
+        self.cabecalho = Cabecalho.ler(src)
+
+        src.seek(-_TAMANHO_RODAPE, os.SEEK_END)
+        rodape = src.read(_TAMANHO_RODAPE)
+        if len(rodape) != _TAMANHO_RODAPE or rodape[-4:] != MAGIC_FIM:
+            raise ValueError("Contêiner truncado ou sem rodapé")
+        posicao_indice, tamanho_rodape, n_chunks, tag, _ = struct.unpack(_FORMATO_RODAPE, rodape)
+
+        src.seek(posicao_indice)
+        indice = src.read(n_chunks * struct.calcsize(_FORMATO_INDICE))
+        try:
+            aes_modos.decrypt_gcm(b'', tag, self._key, self.cabecalho.iv(_CHUNK_INDICE), self.cabecalho.dados + indice)
+        except ValueError:
+            raise ValueError("Índice do contêiner corrompido ou chave incorreta") from None
+        self.indice = list(struct.iter_unpack(_FORMATO_INDICE, indice))
+
+        # O tamanho total do rodapé não é autenticado: vale a soma das entradas do índice, que são
+        # protegidas pelo tag (todo chunk, exceto o último, tem exatamente chunk_size bytes)
+        chunk_size = self.cabecalho.chunk_size
+        if not self.indice or any(tamanho != chunk_size for _, tamanho in self.indice[:-1]):
+            raise ValueError("Índice do contêiner inconsistente")
+        self.tamanho = sum(tamanho for _, tamanho in self.indice)
+        if tamanho_rodape != self.tamanho:
+            raise ValueError("Rodapé do contêiner não corresponde ao índice")
+
+    def ler_chunk(self, indice):
+        """
+        Lê, verifica e decripta um chunk.
+
+        :param indice: Número do chunk
+        :return: Texto original do chunk
+        :raises ValueError: Se o número do chunk não existir ou o chunk estiver corrompido
+        """
+        if not 0 <= indice < len(self.indice):
+            raise ValueError(f"Chunk inexistente: {indice} (o contêiner tem {len(self.indice)})")
+        posicao, tamanho = self.indice[indice]
+        self._src.seek(posicao)
+        dados = self._src.read(tamanho + aes_modos.TAMANHO_TAG)
+        ultimo = indice == len(self.indice) - 1
+        try:
+            return aes_modos.decrypt_gcm(dados[:tamanho], dados[tamanho:], self._key, self.cabecalho.iv(indice),
+                                         self.cabecalho.aad(indice, ultimo), self._engine)
+        except ValueError:
+            raise ValueError(f"Chunk {indice} do contêiner corrompido") from None
+
+    def read_range(self, offset, length):
+        """
+        Decripta um trecho do conteúdo original, lendo apenas os chunks que o contêm.
+
+        :param offset: Posição inicial no conteúdo original
+        :param length: Quantidade de bytes a ler
+        :return: Trecho do conteúdo original
+        :raises ValueError: Se o trecho sair do conteúdo ou algum dos chunks lidos estiver corrompido
+        """
+        if offset < 0 or length < 0:
+            raise ValueError("Posição e tamanho devem ser não negativos")
+        fim = offset + length
+        if fim > self.tamanho:
+            raise ValueError(f"Trecho {offset}..{fim} fora do conteúdo ({self.tamanho} bytes)")
+        if offset == fim:
+            return b''
+        chunk_size = self.cabecalho.chunk_size
+        primeiro, ultimo = offset // chunk_size, (fim - 1) // chunk_size
+        if ultimo >= len(self.indice):
+            raise ValueError(f"Trecho {offset}..{fim} fora dos {len(self.indice)} chunks do contêiner")
+        dados = b''.join(self.ler_chunk(i) for i in range(primeiro, ultimo + 1))
+        inicio = offset - primeiro * chunk_size
+        return dados[inicio:inicio + fim - offset]
+
+    def __iter__(self):
+        """
+        Percorre o conteúdo original chunk a chunk.
+
+        :return: Gerador dos chunks decriptados
+        """
+        for indice in range(len(self.indice)):
+            yield self.ler_chunk(indice)
+
+def ler_cabecalho(caminho):
+    """
+    Lê o cabeçalho de um contêiner, sem precisar da chave.
+
+    Útil para descobrir o identificador da chave antes de abrir o contêiner.
+
+    :param caminho: Caminho do contêiner
+    :return: Cabecalho
+    """
+    with open(caminho, 'rb') as src:
+        return Cabecalho.ler(src)
+
+def encrypt_container(origem, destino, key, key_id=b'', chunk_size=TAMANHO_CHUNK_PADRAO, engine=None):
+    """
+    Encripta um arquivo no formato de contêiner, lendo-o em partes.
+
+    :param origem: Caminho do arquivo original
+    :param destino: Caminho do contêiner
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param key_id: Identificador da chave gravado no cabeçalho
+    :param chunk_size: Tamanho do texto original de cada chunk
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    """
+    def escrever(dst):
+        with EscritorContainer(dst, key, key_id, chunk_size, engine) as escritor:
+            for data in aes_stream.ler_chunks(src, chunk_size):
+                escritor.write(data)
+
+    with open(origem, 'rb') as src:
+        aes_stream.escrever_atomico(destino, escrever)
+
+def decrypt_container(origem, destino, key, engine=None):
+    """
+    Decripta um contêiner inteiro para um arquivo.
+
+    :param origem: Caminho do contêiner
+    :param destino: Caminho do arquivo decriptado
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :raises ValueError: Se o contêiner ou algum chunk estiver corrompido
+    """
+    def escrever(dst):
+        for chunk in LeitorContainer(src, key, engine):
+            dst.write(chunk)
+
+    with open(origem, 'rb') as src:
+        aes_stream.escrever_atomico(destino, escrever)
+
+def read_range(caminho, offset, length, key, engine=None):
+    """
+    Decripta apenas um trecho do conteúdo original de um contêiner.
+
+    :param caminho: Caminho do contêiner
+    :param offset: Posição inicial no conteúdo original
+    :param length: Quantidade de bytes a ler
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Trecho do conteúdo original
+    :raises ValueError: Se o trecho sair do conteúdo ou se o contêiner ou algum dos chunks lidos estiver corrompido
+    """
+    with open(caminho, 'rb') as src:
+        return LeitorContainer(src, key, engine).read_range(offset, length)
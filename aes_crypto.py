@@ -14,34 +14,77 @@ Professor: Ronaldo Toshiaki Oikawa
 Descrição do Código:
 
 Bibliotecas Importadas
--random e string são importadas para geração de chaves aleatórias.
+-secrets (importada em gerar_chave, que é a única a usá-la) e string são usadas na geração de chaves aleatórias.
+-functools é importada para o cache LRU de chaves expandidas.
+-struct é importada para converter blocos em palavras de 32 bits no engine de tabelas T.
+-time e aes_metricas são importadas para a instrumentação opcional (tempos e contadores).
+-numpy (opcional) é importada sob demanda, no primeiro uso dos engines "numpy" e "bitslice", para não pesar na importação do módulo.
 
 Variáveis Globais:
 -Sbox: Substituição de bytes usada durante a encriptação.
+-InvSbox: Inversa da S-Box, usada durante a decriptação.
 -Rcon: Constantes usadas na expansão da chave.
+-Te0..Te3 / Td0..Td3: Tabelas T (palavras de 32 bits) que combinam S-Box, Shift Rows e Mix Columns, construídas no primeiro acesso.
+-ENGINES: Engines de cifra de bloco disponíveis ("reference", "ttable", "numpy" e "bitslice").
+-ENGINES_LOTE: Engines que processam vários blocos em uma única chamada.
+-ENGINE_PADRAO: Engine usado quando nenhum é especificado.
+-LIMIAR_LOTE_NUMPY: Quantidade mínima de blocos para usar o engine "numpy" automaticamente.
+-LOTE_BITSLICE / LOTE_BITSLICE_INT: Blocos por passada do engine "bitslice" (com e sem NumPy).
+-TAMANHO_CACHE_CHAVES: Quantidade máxima de chaves expandidas mantidas em cache.
+-TAMANHOS_CHAVE: Tamanhos de chave aceitos (16, 24 e 32 bytes).
+
+Classes:
+-AESKey(key): Chave com as rodadas de encriptação e decriptação já expandidas.
 
 Funções Principais:
 -gerar_chave(tamanho=16): Gera uma chave aleatória de tamanho especificado.
--sub_bytes(state): Substitui bytes na matriz de estado usando a S-Box.
--inv_sub_bytes(state): Substitui bytes na matriz de estado usando a inversa da S-Box.
+-sub_bytes(state): Substitui bytes no estado (bytearray de 16 bytes) usando a S-Box.
+-inv_sub_bytes(state): Substitui bytes no estado usando a inversa da S-Box.
 -shift_rows(state): Aplica a operação Shift Rows.
 -inv_shift_rows(state): Aplica a operação inversa de Shift Rows.
 -mix_columns(state): Aplica a operação Mix Columns.
 -inv_mix_columns(state): Aplica a operação inversa de Mix Columns.
--add_round_key(state, round_key): Adiciona a chave da rodada à matriz de estado.
--key_expansion(key): Expande a chave para as rodadas do algoritmo AES.
+-add_round_key(state, round_keys, round): Adiciona a chave de uma rodada ao estado.
+-key_expansion(key): Expande uma chave de 128, 192 ou 256 bits em um buffer contíguo de chaves de rodada.
 -xtime(a): Multiplica um valor no campo finito.
--encrypt_block(plain_block, key): Encripta um bloco de texto plano.
--decrypt_block(cipher_block, key): Decripta um bloco de texto cifrado.
--encrypt(message, key): Encripta uma mensagem.
--decrypt(ciphertext, key): Decripta uma mensagem cifrada.
+-expandir_chave(key): Retorna a AESKey correspondente à chave, usando o cache LRU.
+-carregar_numpy(): Importa o NumPy e monta as tabelas vetorizadas no primeiro uso.
+-encrypt_block_reference(plain_block, key): Encripta um bloco passo a passo, com as funções de rodada.
+-decrypt_block_reference(cipher_block, key): Decripta um bloco passo a passo, com as funções de rodada.
+-encrypt_blocks_reference(data, key): Encripta vários blocos com o engine de referência, reaproveitando o estado.
+-decrypt_blocks_reference(data, key): Decripta vários blocos com o engine de referência, reaproveitando o estado.
+-encrypt_block_ttable(plain_block, key): Encripta um bloco usando as tabelas T.
+-decrypt_block_ttable(cipher_block, key): Decripta um bloco usando as tabelas T.
+-encrypt_blocks_numpy(data, key): Encripta vários blocos de uma vez com NumPy.
+-decrypt_blocks_numpy(data, key): Decripta vários blocos de uma vez com NumPy.
+-encrypt_blocks_bitslice(data, key): Encripta vários blocos em tempo constante, com a S-Box como circuito booleano.
+-decrypt_blocks_bitslice(data, key): Decripta vários blocos em tempo constante, com a S-Box como circuito booleano.
+-encrypt_block(plain_block, key, engine): Encripta um bloco de texto plano.
+-decrypt_block(cipher_block, key, engine): Decripta um bloco de texto cifrado.
+-encrypt_blocks(data, key, engine): Encripta uma sequência de blocos (modo ECB).
+-decrypt_blocks(data, key, engine): Decripta uma sequência de blocos (modo ECB).
+-tamanho_cifrado(tamanho): Tamanho do texto cifrado (com preenchimento PKCS#7) de uma mensagem.
+-tamanho_preenchimento(ultimo_bloco): Valida e retorna o tamanho do preenchimento PKCS#7.
+-encrypt_into(out, data, key, engine): Encripta bytes escrevendo em um buffer fornecido.
+-decrypt_into(out, data, key, engine): Decripta bytes escrevendo em um buffer fornecido.
+-encrypt_bytes(data, key, engine): Encripta bytes (qualquer objeto com buffer protocol).
+-decrypt_bytes(data, key, engine): Decripta bytes (qualquer objeto com buffer protocol).
+-encrypt(message, key, engine): Encripta uma mensagem (str).
+-decrypt(ciphertext, key, engine): Decripta uma mensagem cifrada (str).
 -salvar_mensagem_encriptada(ciphertext, arquivo): Salva a mensagem encriptada em um arquivo.
 -ler_mensagem_encriptada(arquivo): Lê a mensagem encriptada de um arquivo.
 
 """
 
-import random
+import functools
 import string
+import struct
+import time
+
+import aes_metricas
+
+# NumPy (opcional) só é importado quando um engine vetorizado é usado pela primeira vez; ver carregar_numpy
+np = None
 
 # S-Box utilizado na substituição de bytes durante a encriptação
 Sbox = [
@@ -63,230 +106,1184 @@ Sbox = [
     0x8c, 0xa1, 0x89, 0x0d, 0xbf, 0xe6, 0x42, 0x68, 0x41, 0x99, 0x2d, 0x0f, 0xb0, 0x54, 0xbb, 0x16
 ]
 
+# Inversa da S-Box, utilizada na substituição de bytes durante a decriptação
+InvSbox = [0] * 256
+for _i in range(256):
+    InvSbox[Sbox[_i]] = _i
+del _i
+
 # Rcon usado na expansão de chave (constantes de rodada)
 Rcon = [
     0x8d, 0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80, 0x1b, 0x36
 ]
 
+# Quantidade máxima de chaves expandidas mantidas no cache LRU
+TAMANHO_CACHE_CHAVES = 4096
+
+# Tamanhos de chave aceitos (AES-128, AES-192 e AES-256), em bytes
+TAMANHOS_CHAVE = (16, 24, 32)
+
 def gerar_chave(tamanho=16):
     """
     Gera uma chave aleatória de tamanho especificado (em bytes).
 
+    Os caracteres são alfanuméricos, para que a chave possa ser exibida e
+    digitada de volta, e são sorteados com o gerador criptográfico do
+    sistema. Para chaves com bytes arbitrários ou derivadas de senhas, veja
+    aes_kdf.
+
     :param tamanho: Tamanho da chave em bytes (default é 16)
     :return: Chave gerada como bytes
     """
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=tamanho)).encode('utf-8')
+    import secrets  # Importada aqui: é a única função que usa o gerador do sistema
+    alfabeto = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alfabeto) for _ in range(tamanho)).encode('utf-8')
 
 def sub_bytes(state):
     """
-    Aplica a substituição de bytes na matriz de estado usando a S-Box.
+    Aplica a substituição de bytes no estado usando a S-Box.
+
+    O estado é um bytearray de 16 bytes guardado por colunas: state[r + 4c]
+    é o byte da linha r na coluna c, como em FIPS-197. Todas as funções de
+    rodada alteram o estado no próprio lugar.
 
-    :param state: Matriz de estado
+    :param state: Estado (bytearray de 16 bytes)
     """
-    for i in range(4):
-        for j in range(4):
-            state[i][j] = Sbox[state[i][j]]
+    for i in range(16):
+        state[i] = Sbox[state[i]]
 
 def inv_sub_bytes(state):
     """
-    Aplica a substituição inversa de bytes na matriz de estado usando a inversa da S-Box.
+    Aplica a substituição inversa de bytes no estado usando a inversa da S-Box.
 
-    :param state: Matriz de estado
+    :param state: Estado (bytearray de 16 bytes)
     """
-    inv_sbox = [0] * 256
-    for i in range(256):
-        inv_sbox[Sbox[i]] = i
-    for i in range(4):
-        for j in range(4):
-            state[i][j] = inv_sbox[state[i][j]]
+    for i in range(16):
+        state[i] = InvSbox[state[i]]
 
 def shift_rows(state):
     """
-    Aplica a operação Shift Rows na matriz de estado.
+    Aplica a operação Shift Rows no estado (a linha r ocupa as posições r, r + 4, r + 8 e r + 12).
 
-    :param state: Matriz de estado
+    :param state: Estado (bytearray de 16 bytes)
     """
-    state[1][0], state[1][1], state[1][2], state[1][3] = state[1][1], state[1][2], state[1][3], state[1][0]
-    state[2][0], state[2][1], state[2][2], state[2][3] = state[2][2], state[2][3], state[2][0], state[2][1]
-    state[3][0], state[3][1], state[3][2], state[3][3] = state[3][3], state[3][0], state[3][1], state[3][2]
+    state[1], state[5], state[9], state[13] = state[5], state[9], state[13], state[1]
+    state[2], state[6], state[10], state[14] = state[10], state[14], state[2], state[6]
+    state[3], state[7], state[11], state[15] = state[15], state[3], state[7], state[11]
 
 def inv_shift_rows(state):
     """
-    Aplica a operação inversa de Shift Rows na matriz de estado.
+    Aplica a operação inversa de Shift Rows no estado.
 
-    :param state: Matriz de estado
+    :param state: Estado (bytearray de 16 bytes)
     """
-    state[1][0], state[1][1], state[1][2], state[1][3] = state[1][3], state[1][0], state[1][1], state[1][2]
-    state[2][0], state[2][1], state[2][2], state[2][3] = state[2][2], state[2][3], state[2][0], state[2][1]
-    state[3][0], state[3][1], state[3][2], state[3][3] = state[3][1], state[3][2], state[3][3], state[3][0]
+    state[1], state[5], state[9], state[13] = state[13], state[1], state[5], state[9]
+    state[2], state[6], state[10], state[14] = state[10], state[14], state[2], state[6]
+    state[3], state[7], state[11], state[15] = state[7], state[11], state[15], state[3]
 
 def mix_columns(state):
     """
-    Aplica a operação Mix Columns na matriz de estado.
+    Aplica a operação Mix Columns no estado (a coluna c ocupa as posições 4c a 4c + 3).
 
-    :param state: Matriz de estado
+    :param state: Estado (bytearray de 16 bytes)
     """
-    for i in range(4):
-        t = state[i][0] ^ state[i][1] ^ state[i][2] ^ state[i][3]
-        u = state[i][0]
-        state[i][0] ^= t ^ xtime(state[i][0] ^ state[i][1])
-        state[i][1] ^= t ^ xtime(state[i][1] ^ state[i][2])
-        state[i][2] ^= t ^ xtime(state[i][2] ^ state[i][3])
-        state[i][3] ^= t ^ xtime(state[i][3] ^ u)
+    for c in range(0, 16, 4):
+        a0, a1, a2, a3 = state[c], state[c + 1], state[c + 2], state[c + 3]
+        t = a0 ^ a1 ^ a2 ^ a3
+        state[c] = a0 ^ t ^ xtime(a0 ^ a1)
+        state[c + 1] = a1 ^ t ^ xtime(a1 ^ a2)
+        state[c + 2] = a2 ^ t ^ xtime(a2 ^ a3)
+        state[c + 3] = a3 ^ t ^ xtime(a3 ^ a0)
 
 def inv_mix_columns(state):
     """
-    Aplica a operação inversa de Mix Columns na matriz de estado.
+    Aplica a operação inversa de Mix Columns no estado.
 
-    :param state: Matriz de estado
+    :param state: Estado (bytearray de 16 bytes)
     """
-    for i in range(4):
-        u = xtime(xtime(state[i][0] ^ state[i][2]))
-        v = xtime(xtime(state[i][1] ^ state[i][3]))
-        state[i][0] ^= u
-        state[i][1] ^= v
-        state[i][2] ^= u
-        state[i][3] ^= v
+    for c in range(0, 16, 4):
+        u = xtime(xtime(state[c] ^ state[c + 2]))
+        v = xtime(xtime(state[c + 1] ^ state[c + 3]))
+        state[c] ^= u
+        state[c + 1] ^= v
+        state[c + 2] ^= u
+        state[c + 3] ^= v
     mix_columns(state)
 
-def add_round_key(state, round_key):
+def add_round_key(state, round_keys, round):
     """
-    Adiciona a chave da rodada à matriz de estado.
+    Adiciona a chave de uma rodada ao estado.
 
-    :param state: Matriz de estado
-    :param round_key: Chave da rodada
+    :param state: Estado (bytearray de 16 bytes)
+    :param round_keys: Chaves de rodada contíguas (16 bytes por rodada)
+    :param round: Número da rodada
     """
-    for i in range(4):
-        for j in range(4):
-            state[i][j] ^= round_key[i][j]
+    offset = 16 * round
+    for i in range(16):
+        state[i] ^= round_keys[offset + i]
 
 def key_expansion(key):
     """
     Expande a chave para uso nas rodadas do algoritmo AES.
 
+    Aceita chaves de 16, 24 ou 32 bytes (Nk = 4, 6 ou 8 palavras), com
+    Nk + 6 rodadas. As palavras w[i] do escalonamento ficam contíguas em um
+    único buffer, nas posições 4i a 4i + 3, e são calculadas por aritmética
+    de índices. Com chaves de 256 bits, a palavra do meio de cada grupo de
+    Nk também passa por Sub Word.
+
+    Sub Word usa o mesmo circuito booleano da S-Box do engine "bitsliced"
+    (_sub_word_bitslice), e não a tabela Sbox: os bytes da chave nunca são
+    usados como índice, de modo que o escalonamento também é de tempo constante.
+
     :param key: Chave inicial
-    :return: Chaves expandidas para cada rodada
-    """
-    key_symbols = [b for b in key]
-    if len(key_symbols) < 4 * 4:
-        for i in range(4 * 4 - len(key_symbols)):
-            key_symbols.append(0x01)
-    key_schedule = [[0] * 4 for _ in range(44)]
-    for r in range(4):
-        for c in range(4):
-            key_schedule[r][c] = key_symbols[r + c * 4]
-    for row in range(4, 4 * 11):
-        temp = [key_schedule[row - 1][i] for i in range(4)]
-        if row % 4 == 0:
-            temp = [Sbox[temp[(i + 1) % 4]] for i in range(4)]
-            temp[0] ^= Rcon[row // 4]
-        for i in range(4):
-            key_schedule[row][i] = key_schedule[row - 4][i] ^ temp[i]
-    return key_schedule
+    :return: Chaves de rodada contíguas (bytearray de 16 * (Nk + 7) bytes)
+    :raises ValueError: Se a chave não tiver 16, 24 ou 32 bytes
+    """
+    if len(key) not in TAMANHOS_CHAVE:
+        raise ValueError(f"A chave deve ter 16, 24 ou 32 bytes (recebida com {len(key)})")
+    nk = len(key) // 4
+    passo = 4 * nk
+    w = bytearray(16 * (nk + 7))
+    w[:passo] = key
+    for i in range(passo, len(w), 4):
+        if i % passo == 0:
+            # Rot Word seguido de Sub Word; Rcon depende só do número da palavra
+            sub = _sub_word_bitslice(bytes((w[i - 3], w[i - 2], w[i - 1], w[i - 4])))
+            for j in range(4):
+                w[i + j] = w[i - passo + j] ^ sub[j]
+            w[i] ^= Rcon[i // passo]
+        elif nk > 6 and i % passo == 16:
+            sub = _sub_word_bitslice(w[i - 4:i])
+            for j in range(4):
+                w[i + j] = w[i - passo + j] ^ sub[j]
+        else:
+            for j in range(i, i + 4):
+                w[j] = w[j - passo] ^ w[j - 4]
+    return w
 
 def xtime(a):
     """
     Multiplica um valor no campo finito (usado no Mix Columns).
 
+    A redução por 0x1b é aplicada com uma máscara tirada do bit 7, sem
+    desvio dependente do valor (ele também é usado nas chaves de rodada de decriptação).
+
     :param a: Valor a ser multiplicado
     :return: Resultado da multiplicação
     """
-    return (((a << 1) ^ 0x1b) & 0xff) if (a & 0x80) else (a << 1)
+    return ((a << 1) ^ (0x1b & -(a >> 7))) & 0xff
 
-def encrypt_block(plain_block, key):
+def _gmul(a, b):
     """
-    Encripta um bloco de texto plano.
+    Multiplica dois valores no campo finito usando xtime.
 
-    :param plain_block: Bloco de texto plano
-    :param key: Chave de encriptação
-    :return: Bloco de texto cifrado
+    :param a: Primeiro fator
+    :param b: Segundo fator (constante pequena, como 2, 3, 9, 11, 13 ou 14)
+    :return: Resultado da multiplicação
     """
-    state = [[0] * 4 for _ in range(4)]
-    for r in range(4):
-        for c in range(4):
-            state[r][c] = plain_block[r + 4 * c]
-    
-    round_keys = key_expansion(key)
-    add_round_key(state, round_keys[:4])
+    result = 0
+    while b:
+        if b & 1:
+            result ^= a
+        a = xtime(a)
+        b >>= 1
+    return result
+
+@functools.lru_cache(maxsize=None)
+def _construir_tabelas_t():
+    """
+    Constrói as tabelas T de encriptação e decriptação a partir da S-Box.
+
+    As tabelas são construídas na primeira chamada (o primeiro uso do engine
+    de tabelas T) e reaproveitadas depois, em vez de custarem na importação.
+
+    Cada entrada de Te0 é a coluna (2s, s, s, 3s) de Mix Columns aplicada ao
+    byte s = Sbox[x], empacotada em uma palavra de 32 bits; Te1..Te3 são
+    rotações de Te0. Td0..Td3 fazem o mesmo com a inversa da S-Box e os
+    coeficientes (14, 9, 13, 11) de Inverse Mix Columns.
+
+    :return: Tupla ((Te0, Te1, Te2, Te3), (Td0, Td1, Td2, Td3))
+    """
+    te = [[0] * 256 for _ in range(4)]
+    td = [[0] * 256 for _ in range(4)]
+    for x in range(256):
+        s = Sbox[x]
+        word = (_gmul(s, 2) << 24) | (s << 16) | (s << 8) | _gmul(s, 3)
+        i = InvSbox[x]
+        inv_word = (_gmul(i, 14) << 24) | (_gmul(i, 9) << 16) | (_gmul(i, 13) << 8) | _gmul(i, 11)
+        for t in range(4):
+            te[t][x] = word
+            td[t][x] = inv_word
+            word = ((word >> 8) | (word << 24)) & 0xffffffff
+            inv_word = ((inv_word >> 8) | (inv_word << 24)) & 0xffffffff
+    return tuple(te), tuple(td)
+
+# Nomes das tabelas T exportadas pelo módulo, resolvidos por __getattr__ no primeiro acesso
+_NOMES_TABELAS_T = ('Te0', 'Te1', 'Te2', 'Te3', 'Td0', 'Td1', 'Td2', 'Td3')
+
+def __getattr__(nome):
+    """
+    Resolve sob demanda os atributos do módulo que não são criados na importação.
+
+    :param nome: Nome do atributo
+    :return: Tabela T correspondente
+    :raises AttributeError: Se o nome não for de uma tabela T
+    """
+    if nome in _NOMES_TABELAS_T:
+        te, td = _construir_tabelas_t()
+        return (te + td)[_NOMES_TABELAS_T.index(nome)]
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+class AESKey:
+    """
+    Chave AES com o escalonamento de chaves calculado uma única vez.
+
+    Guarda as chaves de rodada de encriptação e as de decriptação (com
+    Inverse Mix Columns já aplicado), cada uma em um buffer contíguo de 16
+    bytes por rodada, para que a mesma chave possa ser usada em muitos
+    blocos sem repetir a expansão. Tanto key_expansion quanto o Inverse Mix
+    Columns das chaves de decriptação evitam tabelas e desvios indexados pela chave.
+    """
+
+    __slots__ = ('key', 'rounds', 'round_keys', 'dec_round_keys', 'enc_words', 'dec_words')
+
+    def __init__(self, key):
+        """
+        Expande a chave e prepara as chaves de rodada.
+
+        :param key: Chave inicial (16, 24 ou 32 bytes)
+        :raises ValueError: Se a chave tiver outro tamanho
+        """
+        inicio = time.perf_counter() if aes_metricas.coletores else None
+        self.key = bytes(key)
+        self.round_keys = bytes(key_expansion(self.key))
+        self.rounds = len(self.round_keys) // 16 - 1
+        dec_round_keys = bytearray(self.round_keys)
+        with memoryview(dec_round_keys) as rodadas:
+            for round in range(1, self.rounds):
+                inv_mix_columns(rodadas[16 * round:16 * (round + 1)])
+        self.dec_round_keys = bytes(dec_round_keys)
+        # Palavras de 32 bits usadas pelo engine de tabelas T
+        self.enc_words = struct.unpack(f'>{len(self.round_keys) // 4}I', self.round_keys)
+        self.dec_words = struct.unpack(f'>{len(self.dec_round_keys) // 4}I', self.dec_round_keys)
+        if inicio is not None:
+            aes_metricas.registrar_tempo('key_expansion', time.perf_counter() - inicio)
+            aes_metricas.contar('expansoes_chave')
+
+    def __repr__(self):
+        return f"AESKey(<{len(self.key) * 8} bits, {self.rounds} rodadas>)"
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE_CHAVES)
+def _chave_em_cache(key):
+    """
+    Cria a AESKey de uma chave, memorizando o resultado no cache LRU.
+
+    :param key: Chave inicial (bytes)
+    :return: AESKey correspondente
+    """
+    return AESKey(key)
+
+def expandir_chave(key):
+    """
+    Retorna a AESKey correspondente à chave.
+
+    Chaves já expandidas são devolvidas como estão; as demais passam pelo
+    cache LRU, de modo que chaves usadas com frequência não são expandidas
+    novamente a cada mensagem.
+
+    :param key: Chave inicial (bytes) ou AESKey
+    :return: AESKey correspondente
+    """
+    if isinstance(key, AESKey):
+        return key
+    if aes_metricas.coletores:
+        falhas = _chave_em_cache.cache_info().misses
+        key = _chave_em_cache(bytes(key))
+        acerto = _chave_em_cache.cache_info().misses == falhas
+        aes_metricas.contar('cache_chaves_acertos' if acerto else 'cache_chaves_falhas')
+        return key
+    return _chave_em_cache(bytes(key))
+
+def _encrypt_state_reference(state, round_keys):
+    """
+    Encripta o estado no próprio lugar, aplicando as funções de rodada passo a passo.
+
+    :param state: Estado (bytearray de 16 bytes)
+    :param round_keys: Chaves de rodada contíguas da AESKey
+    """
+    rounds = len(round_keys) // 16 - 1
+    add_round_key(state, round_keys, 0)
     
-    for round in range(1, 10):
+    for round in range(1, rounds):
         sub_bytes(state)
         shift_rows(state)
         mix_columns(state)
-        add_round_key(state, round_keys[round * 4:(round + 1) * 4])
+        add_round_key(state, round_keys, round)
     
     sub_bytes(state)
     shift_rows(state)
-    add_round_key(state, round_keys[10 * 4:])
-    
-    cipher_block = [state[r][c] for c in range(4) for r in range(4)]
-    return bytes(cipher_block)
+    add_round_key(state, round_keys, rounds)
 
-def decrypt_block(cipher_block, key):
+def _decrypt_state_reference(state, dec_round_keys):
     """
-    Decripta um bloco de texto cifrado.
+    Decripta o estado no próprio lugar, aplicando as funções de rodada passo a passo.
 
-    :param cipher_block: Bloco de texto cifrado
-    :param key: Chave de decriptação
-    :return: Bloco de texto plano
+    Usa a cifra inversa equivalente, com as chaves de rodada já
+    inversamente misturadas pela AESKey.
+
+    :param state: Estado (bytearray de 16 bytes)
+    :param dec_round_keys: Chaves de rodada de decriptação contíguas da AESKey
     """
-    state = [[0] * 4 for _ in range(4)]
-    for r in range(4):
-        for c in range(4):
-            state[r][c] = cipher_block[r + 4 * c]
+    rounds = len(dec_round_keys) // 16 - 1
+    add_round_key(state, dec_round_keys, rounds)
     
-    round_keys = key_expansion(key)
-    add_round_key(state, round_keys[10 * 4:])
-    
-    for round in range(9, 0, -1):
-        inv_shift_rows(state)
+    for round in range(rounds - 1, 0, -1):
         inv_sub_bytes(state)
-        add_round_key(state, round_keys[round * 4:(round + 1) * 4])
+        inv_shift_rows(state)
         inv_mix_columns(state)
+        add_round_key(state, dec_round_keys, round)
     
-    inv_shift_rows(state)
     inv_sub_bytes(state)
-    add_round_key(state, round_keys[:4])
-    
-    plain_block = [state[r][c] for c in range(4) for r in range(4)]
-    return bytes(plain_block)
+    inv_shift_rows(state)
+    add_round_key(state, dec_round_keys, 0)
+
+def _processar_blocos_reference(data, round_keys, processar_estado):
+    """
+    Processa uma sequência de blocos reaproveitando um único estado.
+
+    Cada bloco é copiado para o mesmo bytearray de 16 bytes, processado no
+    próprio lugar e copiado para a saída, já alocada com o tamanho final.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param round_keys: Chaves de rodada contíguas
+    :param processar_estado: _encrypt_state_reference ou _decrypt_state_reference
+    :return: Blocos processados
+    """
+    data = memoryview(data).cast('B')
+    saida = bytearray(len(data))
+    state = bytearray(16)
+    for i in range(0, len(data), 16):
+        state[:] = data[i:i + 16]
+        processar_estado(state, round_keys)
+        saida[i:i + 16] = state
+    return bytes(saida)
+
+def encrypt_block_reference(plain_block, key):
+    """
+    Encripta um bloco de texto plano aplicando as funções de rodada passo a passo.
+
+    :param plain_block: Bloco de texto plano
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :return: Bloco de texto cifrado
+    """
+    state = bytearray(plain_block)
+    _encrypt_state_reference(state, expandir_chave(key).round_keys)
+    return bytes(state)
+
+def decrypt_block_reference(cipher_block, key):
+    """
+    Decripta um bloco de texto cifrado aplicando as funções de rodada passo a passo.
+
+    :param cipher_block: Bloco de texto cifrado
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :return: Bloco de texto plano
+    """
+    state = bytearray(cipher_block)
+    _decrypt_state_reference(state, expandir_chave(key).dec_round_keys)
+    return bytes(state)
+
+def encrypt_blocks_reference(data, key):
+    """
+    Encripta vários blocos com o engine de referência, reaproveitando um único estado.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :return: Blocos cifrados
+    """
+    return _processar_blocos_reference(data, expandir_chave(key).round_keys, _encrypt_state_reference)
+
+def decrypt_blocks_reference(data, key):
+    """
+    Decripta vários blocos com o engine de referência, reaproveitando um único estado.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :return: Blocos decriptados
+    """
+    return _processar_blocos_reference(data, expandir_chave(key).dec_round_keys, _decrypt_state_reference)
+
+def encrypt_block_ttable(plain_block, key):
+    """
+    Encripta um bloco de texto plano usando as tabelas T.
+
+    O estado é mantido como quatro palavras de 32 bits (uma por coluna) e
+    cada rodada combina Sub Bytes, Shift Rows e Mix Columns em consultas às
+    tabelas Te0..Te3.
+
+    :param plain_block: Bloco de texto plano
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :return: Bloco de texto cifrado
+    """
+    rk = expandir_chave(key).enc_words
+    Te0, Te1, Te2, Te3 = _construir_tabelas_t()[0]
+    n = len(rk) - 4
+    s0, s1, s2, s3 = struct.unpack('>4I', plain_block)
+    s0 ^= rk[0]
+    s1 ^= rk[1]
+    s2 ^= rk[2]
+    s3 ^= rk[3]
+
+    for i in range(4, n, 4):
+        t0 = Te0[s0 >> 24] ^ Te1[(s1 >> 16) & 0xff] ^ Te2[(s2 >> 8) & 0xff] ^ Te3[s3 & 0xff] ^ rk[i]
+        t1 = Te0[s1 >> 24] ^ Te1[(s2 >> 16) & 0xff] ^ Te2[(s3 >> 8) & 0xff] ^ Te3[s0 & 0xff] ^ rk[i + 1]
+        t2 = Te0[s2 >> 24] ^ Te1[(s3 >> 16) & 0xff] ^ Te2[(s0 >> 8) & 0xff] ^ Te3[s1 & 0xff] ^ rk[i + 2]
+        t3 = Te0[s3 >> 24] ^ Te1[(s0 >> 16) & 0xff] ^ Te2[(s1 >> 8) & 0xff] ^ Te3[s2 & 0xff] ^ rk[i + 3]
+        s0, s1, s2, s3 = t0, t1, t2, t3
+
+    return struct.pack(
+        '>4I',
+        ((Sbox[s0 >> 24] << 24) | (Sbox[(s1 >> 16) & 0xff] << 16) | (Sbox[(s2 >> 8) & 0xff] << 8) | Sbox[s3 & 0xff]) ^ rk[n],
+        ((Sbox[s1 >> 24] << 24) | (Sbox[(s2 >> 16) & 0xff] << 16) | (Sbox[(s3 >> 8) & 0xff] << 8) | Sbox[s0 & 0xff]) ^ rk[n + 1],
+        ((Sbox[s2 >> 24] << 24) | (Sbox[(s3 >> 16) & 0xff] << 16) | (Sbox[(s0 >> 8) & 0xff] << 8) | Sbox[s1 & 0xff]) ^ rk[n + 2],
+        ((Sbox[s3 >> 24] << 24) | (Sbox[(s0 >> 16) & 0xff] << 16) | (Sbox[(s1 >> 8) & 0xff] << 8) | Sbox[s2 & 0xff]) ^ rk[n + 3],
+    )
+
+def decrypt_block_ttable(cipher_block, key):
+    """
+    Decripta um bloco de texto cifrado usando as tabelas T.
+
+    Usa a cifra inversa equivalente com as tabelas Td0..Td3 e as chaves de
+    rodada inversamente misturadas da AESKey.
+
+    :param cipher_block: Bloco de texto cifrado
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :return: Bloco de texto plano
+    """
+    dk = expandir_chave(key).dec_words
+    Td0, Td1, Td2, Td3 = _construir_tabelas_t()[1]
+    n = len(dk) - 4
+    s0, s1, s2, s3 = struct.unpack('>4I', cipher_block)
+    s0 ^= dk[n]
+    s1 ^= dk[n + 1]
+    s2 ^= dk[n + 2]
+    s3 ^= dk[n + 3]
+
+    for i in range(n - 4, 0, -4):
+        t0 = Td0[s0 >> 24] ^ Td1[(s3 >> 16) & 0xff] ^ Td2[(s2 >> 8) & 0xff] ^ Td3[s1 & 0xff] ^ dk[i]
+        t1 = Td0[s1 >> 24] ^ Td1[(s0 >> 16) & 0xff] ^ Td2[(s3 >> 8) & 0xff] ^ Td3[s2 & 0xff] ^ dk[i + 1]
+        t2 = Td0[s2 >> 24] ^ Td1[(s1 >> 16) & 0xff] ^ Td2[(s0 >> 8) & 0xff] ^ Td3[s3 & 0xff] ^ dk[i + 2]
+        t3 = Td0[s3 >> 24] ^ Td1[(s2 >> 16) & 0xff] ^ Td2[(s1 >> 8) & 0xff] ^ Td3[s0 & 0xff] ^ dk[i + 3]
+        s0, s1, s2, s3 = t0, t1, t2, t3
+
+    return struct.pack(
+        '>4I',
+        ((InvSbox[s0 >> 24] << 24) | (InvSbox[(s3 >> 16) & 0xff] << 16) | (InvSbox[(s2 >> 8) & 0xff] << 8) | InvSbox[s1 & 0xff]) ^ dk[0],
+        ((InvSbox[s1 >> 24] << 24) | (InvSbox[(s0 >> 16) & 0xff] << 16) | (InvSbox[(s3 >> 8) & 0xff] << 8) | InvSbox[s2 & 0xff]) ^ dk[1],
+        ((InvSbox[s2 >> 24] << 24) | (InvSbox[(s1 >> 16) & 0xff] << 16) | (InvSbox[(s0 >> 8) & 0xff] << 8) | InvSbox[s3 & 0xff]) ^ dk[2],
+        ((InvSbox[s3 >> 24] << 24) | (InvSbox[(s2 >> 16) & 0xff] << 16) | (InvSbox[(s1 >> 8) & 0xff] << 8) | InvSbox[s0 & 0xff]) ^ dk[3],
+    )
+
+@functools.lru_cache(maxsize=None)
+def carregar_numpy():
+    """
+    Importa o NumPy e monta as cópias vetorizadas das tabelas, uma única vez.
+
+    A importação do NumPy custa dezenas de milissegundos, então só é feita
+    quando um engine vetorizado é usado pela primeira vez (ou quando a
+    escolha automática de engine encontra um lote grande). Depois da
+    primeira chamada, np e as tabelas _*_NP ficam disponíveis no módulo.
+
+    :return: Módulo numpy, ou None se ele não estiver instalado
+    """
+    global np, _SBOX_NP, _INV_SBOX_NP, _XTIME_NP, _XTIME2_NP, _SHIFT_ROWS_NP, _INV_SHIFT_ROWS_NP
+    try:
+        import numpy
+    except ImportError:  # NumPy é opcional; sem ele os engines vetorizados usam o código escalar
+        return None
+    # Cópias das tabelas em NumPy, indexadas diretamente com a matriz de blocos
+    _SBOX_NP = numpy.array(Sbox, dtype=numpy.uint8)
+    _INV_SBOX_NP = numpy.array(InvSbox, dtype=numpy.uint8)
+    _XTIME_NP = numpy.array([xtime(a) for a in range(256)], dtype=numpy.uint8)
+    _XTIME2_NP = _XTIME_NP[_XTIME_NP]
+    # Shift Rows como permutação fixa das 16 posições do bloco (byte r + 4c)
+    _SHIFT_ROWS_NP = numpy.array([r + 4 * ((c + r) % 4) for c in range(4) for r in range(4)])
+    _INV_SHIFT_ROWS_NP = numpy.array([r + 4 * ((c - r) % 4) for c in range(4) for r in range(4)])
+    np = numpy
+    return np
+
+def _mix_columns_numpy(state):
+    """
+    Aplica Mix Columns a todos os blocos de uma matriz (N, 16).
+
+    :param state: Matriz de blocos (N, 16) de uint8
+    :return: Nova matriz (N, 16) com as colunas misturadas
+    """
+    a = state.reshape(-1, 4, 4)
+    t = a[:, :, 0] ^ a[:, :, 1] ^ a[:, :, 2] ^ a[:, :, 3]
+    return (a ^ t[:, :, None] ^ _XTIME_NP[a ^ np.roll(a, -1, axis=2)]).reshape(-1, 16)
+
+def _inv_mix_columns_numpy(state):
+    """
+    Aplica Inverse Mix Columns a todos os blocos de uma matriz (N, 16).
+
+    :param state: Matriz de blocos (N, 16) de uint8
+    :return: Nova matriz (N, 16) com a mistura desfeita
+    """
+    a = state.reshape(-1, 4, 4)
+    a = a ^ _XTIME2_NP[a ^ np.roll(a, -2, axis=2)]
+    return _mix_columns_numpy(a.reshape(-1, 16))
+
+def _round_keys_numpy(round_keys):
+    """
+    Vê as chaves de rodada contíguas como uma matriz (rodadas, 16), sem cópia.
+
+    :param round_keys: Chaves de rodada (AESKey.round_keys ou dec_round_keys)
+    :return: Matriz de uint8 com uma chave de rodada por linha
+    """
+    return np.frombuffer(round_keys, dtype=np.uint8).reshape(-1, 16)
+
+def _encrypt_blocks_escalar(data, key, encrypt_block):
+    """
+    Encripta uma sequência de blocos chamando uma função de bloco para cada um.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: AESKey
+    :param encrypt_block: Função de bloco de um engine escalar
+    :return: Blocos cifrados
+    """
+    data = memoryview(data)
+    return b''.join([encrypt_block(data[i:i + 16], key) for i in range(0, len(data), 16)])
+
+def encrypt_blocks_numpy(data, key):
+    """
+    Encripta vários blocos de uma vez, mantendo-os em uma matriz (N, 16).
+
+    Cada etapa da rodada é aplicada a todos os blocos ao mesmo tempo: Sub
+    Bytes por indexação na S-Box, Shift Rows como permutação de colunas, Mix
+    Columns com xtime vetorizado e Add Round Key por broadcasting. Sem NumPy
+    instalado, recorre ao engine de tabelas T.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :return: Blocos cifrados
+    """
+    key = expandir_chave(key)
+    if carregar_numpy() is None:
+        return _encrypt_blocks_escalar(data, key, encrypt_block_ttable)
+    rk = _round_keys_numpy(key.round_keys)
+    state = np.frombuffer(data, dtype=np.uint8).reshape(-1, 16) ^ rk[0]
+    for round in range(1, key.rounds):
+        state = _mix_columns_numpy(_SBOX_NP[state][:, _SHIFT_ROWS_NP]) ^ rk[round]
+    state = _SBOX_NP[state][:, _SHIFT_ROWS_NP] ^ rk[key.rounds]
+    return state.tobytes()
+
+def decrypt_blocks_numpy(data, key):
+    """
+    Decripta vários blocos de uma vez, mantendo-os em uma matriz (N, 16).
+
+    Usa a cifra inversa equivalente com as chaves de rodada inversamente
+    misturadas da AESKey. Sem NumPy instalado, recorre ao engine de tabelas T.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :return: Blocos decriptados
+    """
+    key = expandir_chave(key)
+    if carregar_numpy() is None:
+        return _encrypt_blocks_escalar(data, key, decrypt_block_ttable)
+    dk = _round_keys_numpy(key.dec_round_keys)
+    state = np.frombuffer(data, dtype=np.uint8).reshape(-1, 16) ^ dk[key.rounds]
+    for round in range(key.rounds - 1, 0, -1):
+        state = _inv_mix_columns_numpy(_INV_SBOX_NP[state][:, _INV_SHIFT_ROWS_NP]) ^ dk[round]
+    state = _INV_SBOX_NP[state][:, _INV_SHIFT_ROWS_NP] ^ dk[0]
+    return state.tobytes()
+
+# Permutações de bytes usadas pelo engine bitsliced (posição de destino -> posição de origem, byte r + 4c)
+_SHIFT_ROWS_BS = [r + 4 * ((c + r) % 4) for c in range(4) for r in range(4)]
+_INV_SHIFT_ROWS_BS = [r + 4 * ((c - r) % 4) for c in range(4) for r in range(4)]
+_ROT1_BS = [(r + 1) % 4 + 4 * c for c in range(4) for r in range(4)]
+_ROT2_BS = [(r + 2) % 4 + 4 * c for c in range(4) for r in range(4)]
+
+# Quantidade máxima de blocos processados em uma passada do engine bitsliced (com NumPy e sem NumPy)
+LOTE_BITSLICE = 1 << 14
+LOTE_BITSLICE_INT = 1 << 10
+
+def _sbox_bitslice(u, um):
+    """
+    Avalia a S-Box como circuito booleano (Boyar-Peralta: 32 AND e 83 XOR/XNOR) sobre planos de bits.
+
+    Cada valor de u é um plano: o mesmo bit de muitos bytes ao mesmo tempo.
+    Só são usados XOR e AND, sem consultas a tabelas indexadas pelos dados.
+
+    :param u: Os oito planos do byte de entrada, do bit mais significativo (U0) ao menos significativo (U7)
+    :param um: Plano com todos os bits válidos em 1 (usado nos XNOR)
+    :return: Os oito planos do byte substituído, do mais ao menos significativo
+    """
+    U0, U1, U2, U3, U4, U5, U6, U7 = u
+    T1 = U0 ^ U3; T2 = U0 ^ U5; T3 = U0 ^ U6; T4 = U3 ^ U5; T5 = U4 ^ U6; T6 = T1 ^ T5; T7 = U1 ^ U2
+    T8 = U7 ^ T6; T9 = U7 ^ T7; T10 = T6 ^ T7; T11 = U1 ^ U5; T12 = U2 ^ U5; T13 = T3 ^ T4; T14 = T6 ^ T11
+    T15 = T5 ^ T11; T16 = T5 ^ T12; T17 = T9 ^ T16; T18 = U3 ^ U7; T19 = T7 ^ T18; T20 = T1 ^ T19
+    T21 = U6 ^ U7; T22 = T7 ^ T21; T23 = T2 ^ T22; T24 = T2 ^ T10; T25 = T20 ^ T17; T26 = T3 ^ T16; T27 = T1 ^ T12
+    M1 = T13 & T6; M2 = T23 & T8; M3 = T14 ^ M1; M4 = T19 & U7; M5 = M4 ^ M1; M6 = T3 & T16; M7 = T22 & T9
+    M8 = T26 ^ M6; M9 = T20 & T17; M10 = M9 ^ M6; M11 = T1 & T15; M12 = T4 & T27; M13 = M12 ^ M11; M14 = T2 & T10
+    M15 = M14 ^ M11; M16 = M3 ^ M2; M17 = M5 ^ T24; M18 = M8 ^ M7; M19 = M10 ^ M15; M20 = M16 ^ M13; M21 = M17 ^ M15
+    M22 = M18 ^ M13; M23 = M19 ^ T25; M24 = M22 ^ M23; M25 = M22 & M20; M26 = M21 ^ M25; M27 = M20 ^ M21
+    M28 = M23 ^ M25; M29 = M28 & M27; M30 = M26 & M24; M31 = M20 & M23; M32 = M27 & M31; M33 = M27 ^ M25
+    M34 = M21 & M22; M35 = M24 & M34; M36 = M24 ^ M25; M37 = M21 ^ M29; M38 = M32 ^ M33; M39 = M23 ^ M30
+    M40 = M35 ^ M36; M41 = M38 ^ M40; M42 = M37 ^ M39; M43 = M37 ^ M38; M44 = M39 ^ M40; M45 = M42 ^ M41
+    M46 = M44 & T6; M47 = M40 & T8; M48 = M39 & U7; M49 = M43 & T16; M50 = M38 & T9; M51 = M37 & T17
+    M52 = M42 & T15; M53 = M45 & T27; M54 = M41 & T10; M55 = M44 & T13; M56 = M40 & T23; M57 = M39 & T19
+    M58 = M43 & T3; M59 = M38 & T22; M60 = M37 & T20; M61 = M42 & T1; M62 = M45 & T4; M63 = M41 & T2
+    L0 = M61 ^ M62; L1 = M50 ^ M56; L2 = M46 ^ M48; L3 = M47 ^ M55; L4 = M54 ^ M58; L5 = M49 ^ M61
+    L6 = M62 ^ L5; L7 = M46 ^ L3; L8 = M51 ^ M59; L9 = M52 ^ M53; L10 = M53 ^ L4; L11 = M60 ^ L2
+    L12 = M48 ^ M51; L13 = M50 ^ L0; L14 = M52 ^ M61; L15 = M55 ^ L1; L16 = M56 ^ L0; L17 = M57 ^ L1
+    L18 = M58 ^ L8; L19 = M63 ^ L4; L20 = L0 ^ L1; L21 = L1 ^ L7; L22 = L3 ^ L12; L23 = L18 ^ L2
+    L24 = L15 ^ L9; L25 = L6 ^ L10; L26 = L7 ^ L9; L27 = L8 ^ L10; L28 = L11 ^ L14; L29 = L11 ^ L17
+    return (L6 ^ L24, L16 ^ L26 ^ um, L19 ^ L28 ^ um, L6 ^ L21, L20 ^ L22, L25 ^ L29, L13 ^ L27 ^ um, L6 ^ L23 ^ um)
+
+def _sub_word_bitslice(palavra):
+    """
+    Aplica Sub Word (S-Box em cada um de 4 bytes) com o circuito booleano, usado na expansão da chave.
+
+    Os 4 bytes são lidos como um inteiro e cada plano guarda o mesmo bit dos
+    quatro bytes, espaçados de 8 em 8 bits, como em _planos_int.
+
+    :param palavra: 4 bytes
+    :return: 4 bytes substituídos
+    """
+    um = 0x01010101
+    x = int.from_bytes(palavra, 'little')
+    s = _sub_bytes_bitslice([(x >> k) & um for k in range(8)], um)
+    y = 0
+    for k in range(8):
+        y |= s[k] << k
+    return y.to_bytes(4, 'little')
+
+def _sub_bytes_bitslice(p, um):
+    """
+    Aplica Sub Bytes aos planos do estado bitsliced.
+
+    :param p: Planos do estado (p[k] é o bit k de todos os bytes)
+    :param um: Plano com todos os bits válidos em 1
+    :return: Novos planos
+    """
+    s = _sbox_bitslice(p[::-1], um)
+    return list(s[::-1])
+
+def _afim_inverso_bitslice(p, um):
+    """
+    Aplica a inversa da transformação afim da S-Box: w[i] = v[i+2] ^ v[i+5] ^ v[i+7] ^ 0x05.
+
+    :param p: Planos do estado
+    :param um: Plano com todos os bits válidos em 1
+    :return: Novos planos
+    """
+    w = [p[(i + 2) % 8] ^ p[(i + 5) % 8] ^ p[(i + 7) % 8] for i in range(8)]
+    w[0] ^= um
+    w[2] ^= um
+    return w
+
+def _inv_sub_bytes_bitslice(p, um):
+    """
+    Aplica Inverse Sub Bytes: InvSbox(x) = A⁻¹(Sbox(A⁻¹(x))), sendo A⁻¹ a inversa da transformação afim.
+
+    :param p: Planos do estado
+    :param um: Plano com todos os bits válidos em 1
+    :return: Novos planos
+    """
+    return _afim_inverso_bitslice(_sub_bytes_bitslice(_afim_inverso_bitslice(p, um), um), um)
+
+def _xtime_bitslice(p):
+    """
+    Multiplica por x no campo finito, sobre planos (só religa planos e faz XOR com o bit 7).
+
+    :param p: Planos dos bytes
+    :return: Novos planos
+    """
+    return [p[7], p[0] ^ p[7], p[1], p[2] ^ p[7], p[3] ^ p[7], p[4], p[5], p[6]]
+
+def _mix_columns_bitslice(p, permutar):
+    """
+    Aplica Mix Columns aos planos: a ^ t ^ xtime(a ^ a'), com a' o próximo byte da coluna.
+
+    :param p: Planos do estado
+    :param permutar: Função (plano, permutação de bytes) -> plano permutado
+    :return: Novos planos
+    """
+    s = [x ^ permutar(x, _ROT1_BS) for x in p]
+    x = _xtime_bitslice(s)
+    return [p[k] ^ s[k] ^ permutar(s[k], _ROT2_BS) ^ x[k] for k in range(8)]
+
+def _inv_mix_columns_bitslice(p, permutar):
+    """
+    Aplica Inverse Mix Columns aos planos.
+
+    :param p: Planos do estado
+    :param permutar: Função (plano, permutação de bytes) -> plano permutado
+    :return: Novos planos
+    """
+    u = _xtime_bitslice(_xtime_bitslice([x ^ permutar(x, _ROT2_BS) for x in p]))
+    return _mix_columns_bitslice([p[k] ^ u[k] for k in range(8)], permutar)
+
+def _encrypt_bitslice(p, chaves, um, permutar):
+    """
+    Encripta os planos de estado com as funções de rodada bitsliced.
+
+    :param p: Planos do estado
+    :param chaves: Planos de cada chave de rodada
+    :param um: Plano com todos os bits válidos em 1
+    :param permutar: Função (plano, permutação de bytes) -> plano permutado
+    :return: Planos cifrados
+    """
+    rounds = len(chaves) - 1
+    p = [p[k] ^ chaves[0][k] for k in range(8)]
+    for round in range(1, rounds):
+        p = [permutar(x, _SHIFT_ROWS_BS) for x in _sub_bytes_bitslice(p, um)]
+        p = _mix_columns_bitslice(p, permutar)
+        p = [p[k] ^ chaves[round][k] for k in range(8)]
+    p = [permutar(x, _SHIFT_ROWS_BS) for x in _sub_bytes_bitslice(p, um)]
+    return [p[k] ^ chaves[rounds][k] for k in range(8)]
+
+def _decrypt_bitslice(p, chaves, um, permutar):
+    """
+    Decripta os planos de estado com a cifra inversa equivalente (chaves de decriptação da AESKey).
+
+    :param p: Planos do estado
+    :param chaves: Planos de cada chave de rodada de decriptação
+    :param um: Plano com todos os bits válidos em 1
+    :param permutar: Função (plano, permutação de bytes) -> plano permutado
+    :return: Planos decriptados
+    """
+    rounds = len(chaves) - 1
+    p = [p[k] ^ chaves[rounds][k] for k in range(8)]
+    for round in range(rounds - 1, 0, -1):
+        p = [permutar(x, _INV_SHIFT_ROWS_BS) for x in _inv_sub_bytes_bitslice(p, um)]
+        p = _inv_mix_columns_bitslice(p, permutar)
+        p = [p[k] ^ chaves[round][k] for k in range(8)]
+    p = [permutar(x, _INV_SHIFT_ROWS_BS) for x in _inv_sub_bytes_bitslice(p, um)]
+    return [p[k] ^ chaves[0][k] for k in range(8)]
+
+def _planos_numpy(data):
+    """
+    Transpõe N blocos em oito planos NumPy (16, L) de uint64: o bit k do byte j de 64 blocos por palavra.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :return: Tupla (planos, quantidade de blocos)
+    """
+    blocos = np.frombuffer(data, dtype=np.uint8).reshape(-1, 16)
+    n = len(blocos)
+    if n % 64:
+        blocos = np.concatenate([blocos, np.zeros((64 - n % 64, 16), dtype=np.uint8)])
+    bits = np.unpackbits(blocos, axis=1, bitorder='little').reshape(-1, 64, 16, 8)
+    palavras = np.packbits(bits.transpose(3, 2, 0, 1), axis=-1, bitorder='little')
+    return list(np.ascontiguousarray(palavras).view('<u8')[..., 0]), n
 
-def encrypt(message, key):
+def _blocos_numpy(p, n):
+    """
+    Desfaz a transposição de _planos_numpy.
+
+    :param p: Oito planos (16, L) de uint64
+    :param n: Quantidade de blocos
+    :return: Blocos como bytes
+    """
+    palavras = np.stack(p).astype('<u8', copy=False)[..., None].view(np.uint8)
+    bits = np.unpackbits(palavras, axis=-1, bitorder='little').transpose(2, 3, 1, 0).reshape(-1, 128)
+    return np.packbits(bits, axis=1, bitorder='little')[:n].tobytes()
+
+def _chaves_numpy(round_keys):
+    """
+    Converte as chaves de rodada em planos (16, 1), com todos os bits em 1 ou em 0, para broadcasting.
+
+    :param round_keys: Chaves de rodada contíguas
+    :return: Lista com os oito planos de cada rodada
+    """
+    bits = np.unpackbits(np.frombuffer(round_keys, dtype=np.uint8).reshape(-1, 16), axis=1, bitorder='little')
+    planos = bits.reshape(-1, 16, 8).transpose(0, 2, 1)[..., None].astype(np.uint64) * np.uint64(0xffffffffffffffff)
+    return [list(rodada) for rodada in planos]
+
+def _permutar_numpy(x, permutacao):
+    """
+    Reordena os bytes de um plano NumPy (índices fixos, independentes dos dados).
+
+    :param x: Plano (16, L)
+    :param permutacao: Origem de cada posição de destino
+    :return: Plano permutado
+    """
+    return x[permutacao]
+
+def _planos_int(data):
+    """
+    Transpõe N blocos em oito planos inteiros.
+
+    Os bytes de mesma posição de todos os blocos são concatenados e lidos
+    como um único inteiro; o bit k de cada byte vira um plano com os bits
+    espaçados de 8 em 8 (o byte j do bloco b ocupa o bit 8(jN + b)).
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :return: Tupla (planos, máscara dos bits válidos, quantidade de blocos)
+    """
+    data = bytes(data)
+    n = len(data) // 16
+    x = int.from_bytes(b''.join(data[j::16] for j in range(16)), 'little')
+    um = int.from_bytes(b'\x01' * (16 * n), 'little')
+    return [(x >> k) & um for k in range(8)], um, n
+
+def _blocos_int(p, n):
+    """
+    Desfaz a transposição de _planos_int.
+
+    :param p: Oito planos inteiros
+    :param n: Quantidade de blocos
+    :return: Blocos como bytes
+    """
+    x = 0
+    for k in range(8):
+        x |= p[k] << k
+    colunas = x.to_bytes(16 * n, 'little')
+    saida = bytearray(16 * n)
+    for j in range(16):
+        saida[j::16] = colunas[j * n:(j + 1) * n]
+    return bytes(saida)
+
+def _permutador_int(n):
+    """
+    Cria a função que reordena os bytes de um plano inteiro (segmentos de 8N bits).
+
+    :param n: Quantidade de blocos
+    :return: Função (plano, permutação) -> plano permutado
+    """
+    largura = 8 * n
+    segmento = (1 << largura) - 1
+
+    def permutar(x, permutacao):
+        y = 0
+        for destino, origem in enumerate(permutacao):
+            y |= ((x >> (largura * origem)) & segmento) << (largura * destino)
+        return y
+    return permutar
+
+def _processar_bitslice(data, round_keys, cifrar):
+    """
+    Processa blocos com o engine bitsliced, em lotes de até LOTE_BITSLICE blocos.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param round_keys: Chaves de rodada contíguas (de encriptação ou de decriptação)
+    :param cifrar: _encrypt_bitslice ou _decrypt_bitslice
+    :return: Blocos processados
+    """
+    data = memoryview(data).cast('B')
+    partes = []
+    if carregar_numpy() is not None:
+        chaves = _chaves_numpy(round_keys)
+        um = np.uint64(0xffffffffffffffff)
+        for inicio in range(0, len(data), 16 * LOTE_BITSLICE):
+            p, n = _planos_numpy(data[inicio:inicio + 16 * LOTE_BITSLICE])
+            partes.append(_blocos_numpy(cifrar(p, chaves, um, _permutar_numpy), n))
+        return b''.join(partes)
+    # Sem NumPy os planos das chaves dependem da quantidade de blocos do lote
+    chaves_por_tamanho = {}
+    for inicio in range(0, len(data), 16 * LOTE_BITSLICE_INT):
+        p, um, n = _planos_int(data[inicio:inicio + 16 * LOTE_BITSLICE_INT])
+        if n not in chaves_por_tamanho:
+            chaves_por_tamanho[n] = [_planos_int(bytes(round_keys[r:r + 16]) * n)[0] for r in range(0, len(round_keys), 16)]
+        partes.append(_blocos_int(cifrar(p, chaves_por_tamanho[n], um, _permutador_int(n)), n))
+    return b''.join(partes)
+
+def encrypt_blocks_bitslice(data, key):
+    """
+    Encripta vários blocos com o engine bitsliced, de tempo constante.
+
+    Os blocos são transpostos em planos de bits (uint64 do NumPy, 64 blocos
+    por palavra, ou inteiros do Python sem NumPy) e cada rodada é calculada
+    só com XOR, AND e permutações fixas: a S-Box é um circuito booleano, sem
+    consultas a tabelas indexadas pelos dados ou pela chave. O custo de cada
+    operação é dividido entre todos os blocos do lote, então a vazão cresce
+    com a quantidade de blocos.
+
+    Com NumPy todas as operações são sobre palavras de largura fixa. Sem
+    NumPy não há desvios nem acessos à memória dependentes de segredos, mas
+    o CPython descarta dígitos zero no topo dos inteiros, o que pode variar
+    levemente o tempo; para hosts compartilhados, prefira ter NumPy instalado.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :return: Blocos cifrados
+    """
+    return _processar_bitslice(data, expandir_chave(key).round_keys, _encrypt_bitslice)
+
+def decrypt_blocks_bitslice(data, key):
+    """
+    Decripta vários blocos com o engine bitsliced, de tempo constante.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :return: Blocos decriptados
+    """
+    return _processar_bitslice(data, expandir_chave(key).dec_round_keys, _decrypt_bitslice)
+
+# Engines de cifra de bloco disponíveis: nome -> (encriptação, decriptação)
+ENGINES = {
+    'reference': (encrypt_blocks_reference, decrypt_blocks_reference),
+    'ttable': (encrypt_block_ttable, decrypt_block_ttable),
+    'numpy': (encrypt_blocks_numpy, decrypt_blocks_numpy),
+    'bitslice': (encrypt_blocks_bitslice, decrypt_blocks_bitslice),
+}
+
+# Engines cujas funções aceitam vários blocos em uma única chamada
+ENGINES_LOTE = {'reference', 'numpy', 'bitslice'}
+
+# Engine usado quando nenhum é especificado
+ENGINE_PADRAO = 'ttable'
+
+# Quantidade mínima de blocos para que o engine "numpy" seja escolhido automaticamente
+LIMIAR_LOTE_NUMPY = 64
+
+def _obter_engine(engine):
+    """
+    Retorna as funções de bloco do engine solicitado.
+
+    :param engine: Nome do engine ou None para o engine padrão
+    :return: Tupla (encriptação de bloco, decriptação de bloco)
+    """
+    try:
+        return ENGINES[engine or ENGINE_PADRAO]
+    except KeyError:
+        raise ValueError(f"Engine desconhecido: {engine}") from None
+
+def _escolher_engine_lote(engine, n_blocos):
+    """
+    Escolhe o engine para processar uma sequência de blocos.
+
+    Sem engine explícito, usa o engine "numpy" quando ele está disponível e
+    a quantidade de blocos compensa o custo fixo de montar as matrizes.
+
+    :param engine: Nome do engine ou None
+    :param n_blocos: Quantidade de blocos a processar
+    :return: Nome do engine escolhido
+    """
+    if engine is None:
+        if n_blocos >= LIMIAR_LOTE_NUMPY and carregar_numpy() is not None:
+            return 'numpy'
+        return ENGINE_PADRAO
+    if engine not in ENGINES:
+        raise ValueError(f"Engine desconhecido: {engine}")
+    return engine
+
+def _medir_blocos(operacao, data, key, engine):
+    """
+    Processa uma sequência de blocos registrando tempo, bytes e blocos (instrumentação ligada).
+
+    :param operacao: "encrypt" ou "decrypt"
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: AESKey
+    :param engine: Nome do engine já escolhido
+    :return: Blocos processados
+    """
+    funcao = ENGINES[engine][0 if operacao == 'encrypt' else 1]
+    inicio = time.perf_counter()
+    if engine in ENGINES_LOTE:
+        resultado = funcao(data, key)
+    else:
+        resultado = _encrypt_blocks_escalar(data, key, funcao)
+    aes_metricas.registrar_tempo(f'{operacao}_blocks', time.perf_counter() - inicio, engine=engine)
+    aes_metricas.contar('bytes', len(data), operacao=operacao, engine=engine)
+    aes_metricas.contar('blocos', len(data) // 16, operacao=operacao, engine=engine)
+    return resultado
+
+def encrypt_blocks(data, key, engine=None):
+    """
+    Encripta uma sequência de blocos independentes (modo ECB).
+
+    Base para o ECB e para modos paralelizáveis: engines de lote recebem
+    todos os blocos de uma vez; os demais são chamados bloco a bloco.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme a quantidade de blocos
+    :return: Blocos cifrados
+    """
+    if len(data) % 16:
+        raise ValueError("O tamanho dos dados deve ser múltiplo de 16 bytes")
+    key = expandir_chave(key)
+    engine = _escolher_engine_lote(engine, len(data) // 16)
+    if aes_metricas.coletores:
+        return _medir_blocos('encrypt', data, key, engine)
+    if engine in ENGINES_LOTE:
+        return ENGINES[engine][0](data, key)
+    return _encrypt_blocks_escalar(data, key, ENGINES[engine][0])
+
+def decrypt_blocks(data, key, engine=None):
+    """
+    Decripta uma sequência de blocos independentes (modo ECB).
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme a quantidade de blocos
+    :return: Blocos decriptados
+    """
+    if len(data) % 16:
+        raise ValueError("O tamanho dos dados deve ser múltiplo de 16 bytes")
+    key = expandir_chave(key)
+    engine = _escolher_engine_lote(engine, len(data) // 16)
+    if aes_metricas.coletores:
+        return _medir_blocos('decrypt', data, key, engine)
+    if engine in ENGINES_LOTE:
+        return ENGINES[engine][1](data, key)
+    return _encrypt_blocks_escalar(data, key, ENGINES[engine][1])
+
+def encrypt_block(plain_block, key, engine=None):
+    """
+    Encripta um bloco de texto plano.
+
+    :param plain_block: Bloco de texto plano
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param engine: Nome do engine ("reference", "ttable", "numpy" ou "bitslice"); None usa o padrão
+    :return: Bloco de texto cifrado
+    """
+    return _obter_engine(engine)[0](plain_block, key)
+
+def decrypt_block(cipher_block, key, engine=None):
+    """
+    Decripta um bloco de texto cifrado.
+
+    :param cipher_block: Bloco de texto cifrado
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param engine: Nome do engine ("reference", "ttable", "numpy" ou "bitslice"); None usa o padrão
+    :return: Bloco de texto plano
+    """
+    return _obter_engine(engine)[1](cipher_block, key)
+
+def tamanho_cifrado(tamanho):
+    """
+    Calcula o tamanho do texto cifrado de uma mensagem, incluindo o preenchimento PKCS#7.
+
+    :param tamanho: Tamanho da mensagem em bytes
+    :return: Tamanho do texto cifrado
+    """
+    return tamanho - tamanho % 16 + 16
+
+def tamanho_preenchimento(ultimo_bloco):
+    """
+    Valida o preenchimento PKCS#7 do último bloco decriptado.
+
+    :param ultimo_bloco: Último bloco do texto decriptado
+    :return: Quantidade de bytes de preenchimento
+    :raises ValueError: Se o preenchimento for inválido (chave incorreta ou dados corrompidos)
+    """
+    pad_len = ultimo_bloco[-1]
+    if not 1 <= pad_len <= 16 or bytes(ultimo_bloco[-pad_len:]) != bytes([pad_len]) * pad_len:
+        raise ValueError("Preenchimento inválido")
+    return pad_len
+
+def encrypt_into(out, data, key, engine=None):
+    """
+    Encripta bytes com preenchimento PKCS#7, escrevendo o resultado em um buffer fornecido.
+
+    Os blocos completos são lidos diretamente de data, sem cópia, e o
+    buffer de saída pode ser reaproveitado entre chamadas.
+
+    :param out: Buffer gravável (bytearray, memoryview, array...) com pelo menos tamanho_cifrado(len(data)) bytes
+    :param data: Dados a encriptar (qualquer objeto com buffer protocol)
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme o tamanho dos dados
+    :return: Quantidade de bytes escritos em out
+    """
+    dados = memoryview(data).cast('B')
+    saida = memoryview(out).cast('B')
+    n = len(dados)
+    completo = n - n % 16
+    total = tamanho_cifrado(n)
+    if len(saida) < total:
+        raise ValueError(f"Buffer de saída pequeno demais: são necessários {total} bytes")
+    key = expandir_chave(key)
+    if completo:
+        saida[:completo] = encrypt_blocks(dados[:completo], key, engine)
+    pad_len = total - n
+    saida[completo:total] = encrypt_blocks(bytes(dados[completo:]) + bytes([pad_len]) * pad_len, key, engine)
+    return total
+
+def decrypt_into(out, data, key, engine=None):
+    """
+    Decripta bytes e remove o preenchimento PKCS#7, escrevendo o resultado em um buffer fornecido.
+
+    :param out: Buffer gravável com pelo menos len(data) - 1 bytes
+    :param data: Dados encriptados (qualquer objeto com buffer protocol)
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme o tamanho dos dados
+    :return: Quantidade de bytes escritos em out
+    :raises ValueError: Se o tamanho ou o preenchimento forem inválidos
+    """
+    dados = memoryview(data).cast('B')
+    saida = memoryview(out).cast('B')
+    n = len(dados)
+    if n == 0 or n % 16:
+        raise ValueError("O tamanho do texto cifrado deve ser um múltiplo positivo de 16 bytes")
+    key = expandir_chave(key)
+    ultimo = decrypt_blocks(dados[n - 16:], key, engine)
+    total = n - tamanho_preenchimento(ultimo)
+    if len(saida) < total:
+        raise ValueError(f"Buffer de saída pequeno demais: são necessários {total} bytes")
+    if n > 16:
+        saida[:n - 16] = decrypt_blocks(dados[:n - 16], key, engine)
+    saida[n - 16:total] = ultimo[:total - (n - 16)]
+    return total
+
+def encrypt_bytes(data, key, engine=None):
+    """
+    Encripta bytes com preenchimento PKCS#7 (modo ECB).
+
+    :param data: Dados a encriptar (bytes, bytearray, memoryview, array...)
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme o tamanho dos dados
+    :return: Dados cifrados
+    """
+    out = bytearray(tamanho_cifrado(memoryview(data).nbytes))
+    encrypt_into(out, data, key, engine)
+    return bytes(out)
+
+def decrypt_bytes(data, key, engine=None):
+    """
+    Decripta bytes e remove o preenchimento PKCS#7 (modo ECB).
+
+    :param data: Dados encriptados (bytes, bytearray, memoryview, array...)
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme o tamanho dos dados
+    :return: Dados decriptados
+    :raises ValueError: Se o tamanho ou o preenchimento forem inválidos (chave incorreta ou dados corrompidos)
+    """
+    dados = memoryview(data).cast('B')
+    if len(dados) == 0 or len(dados) % 16:
+        raise ValueError("O tamanho do texto cifrado deve ser um múltiplo positivo de 16 bytes")
+    plaintext = decrypt_blocks(dados, key, engine)
+    return plaintext[:len(plaintext) - tamanho_preenchimento(plaintext[-16:])]
+
+def encrypt(message, key, engine=None):
     """
     Encripta uma mensagem.
 
     :param message: Mensagem a ser encriptada
-    :param key: Chave de encriptação
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme o tamanho da mensagem
     :return: Mensagem cifrada
     """
-    message = message + (16 - len(message) % 16) * chr(16 - len(message) % 16)
-    cipher_blocks = []
-    
-    for i in range(0, len(message), 16):
-        block = message[i:i + 16].encode('utf-8')
-        cipher_block = encrypt_block(block, key)
-        cipher_blocks.append(cipher_block)
-    
-    return b''.join(cipher_blocks)
+    with aes_metricas.etapa('utf8_encode'):
+        data = message.encode('utf-8')
+    return encrypt_bytes(data, key, engine)
 
-def decrypt(ciphertext, key):
+def decrypt(ciphertext, key, engine=None):
     """
     Decripta uma mensagem cifrada.
 
     :param ciphertext: Mensagem cifrada
-    :param key: Chave de decriptação
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param engine: Nome do engine; None escolhe conforme o tamanho da mensagem
     :return: Mensagem decriptada
+    :raises ValueError: Se a chave estiver incorreta ou a mensagem corrompida
     """
-    plain_blocks = []
-    
-    for i in range(0, len(ciphertext), 16):
-        block = ciphertext[i:i + 16]
-        plain_block = decrypt_block(block, key)
-        plain_blocks.append(plain_block)
-    
-    plaintext = b''.join(plain_blocks)
-    pad_len = plaintext[-1]
-    return plaintext[:-pad_len].decode('utf-8', errors='ignore')
+    plaintext = decrypt_bytes(ciphertext, key, engine)
+    with aes_metricas.etapa('utf8_decode'):
+        return plaintext.decode('utf-8')
 
 def salvar_mensagem_encriptada(ciphertext, arquivo):
     """
@@ -296,8 +1293,9 @@ def salvar_mensagem_encriptada(ciphertext, arquivo):
     :param arquivo: Nome do arquivo
     """
     try:
-        with open(arquivo, 'wb') as file:
+        with aes_metricas.etapa('io_escrita'), open(arquivo, 'wb') as file:
             file.write(ciphertext)
+        aes_metricas.contar('bytes_io', len(ciphertext), operacao='escrita')
     except IOError as e:
         print(f"Erro ao salvar a mensagem encriptada: {e}")
 
@@ -309,8 +1307,9 @@ def ler_mensagem_encriptada(arquivo):
     :return: Mensagem cifrada ou None em caso de erro
     """
     try:
-        with open(arquivo, 'rb') as file:
+        with aes_metricas.etapa('io_leitura'), open(arquivo, 'rb') as file:
             ciphertext = file.read()
+        aes_metricas.contar('bytes_io', len(ciphertext), operacao='leitura')
         return ciphertext
     except IOError as e:
         print(f"Erro ao ler a mensagem encriptada: {e}")
@@ -0,0 +1,472 @@
+"""
+Módulo de derivação de chaves a partir de senhas (PBKDF2 e scrypt), com cache e calibração do custo.
+
+Em vez de digitar de volta a chave gerada, o usuário informa uma senha e a
+chave AES é derivada dela com um KDF lento de propósito. Os parâmetros da
+derivação (algoritmo, custo, tamanho da chave e salt aleatório) ficam no
+cabeçalho do arquivo, de modo que a decriptação precisa apenas da senha.
+O custo pode ser ajustado e calibrar() mede a máquina para escolher o maior
+custo que ainda respeita um tempo alvo.
+
+Como derivar a chave é caro, as chaves derivadas ficam em um cache em
+memória limitado em quantidade e em tempo de vida; ao sair do cache a
+cópia guardada é sobrescrita com zeros. Uma chave só entra no cache depois
+de autenticada (tag do arquivo conferido), o índice do cache é um HMAC
+com um segredo aleatório do processo e as chaves derivadas são expandidas
+fora do cache LRU de aes_crypto, para não ficarem retidas nele.
+
+Estrutura do arquivo encriptado com senha:
+-Cabeçalho: magic, versão, algoritmo, tamanho da chave, custo e salt.
+-Conteúdo: fluxo GCM de aes_stream (iv, texto cifrado e tag). Alterar o cabeçalho muda a chave
+ derivada, e o tag deixa de conferir.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-argparse, getpass, os e sys são importadas para a linha de comando.
+-collections, hashlib, hmac, secrets, struct, threading e time são importadas para os KDFs, o cache e o cabeçalho.
+-aes_crypto, aes_metricas e aes_stream fornecem os tamanhos de chave, a instrumentação e a encriptação em fluxo.
+
+Variáveis Globais:
+-MAGIC / VERSAO: Identificador e versão do cabeçalho dos arquivos encriptados com senha.
+-KDFS: Algoritmos de derivação disponíveis e seus códigos no cabeçalho.
+-KDF_PADRAO: Algoritmo usado quando nenhum é especificado.
+-CUSTO_PADRAO: Custo padrão de cada algoritmo (iterações do PBKDF2, log2 de N do scrypt).
+-CUSTO_MAXIMO: Maior custo aceito ao ler um cabeçalho.
+-TAMANHO_SALT: Tamanho do salt aleatório.
+-TEMPO_ALVO_PADRAO: Tempo alvo de uma derivação usado na calibração.
+-cache_chaves: Cache padrão das chaves derivadas.
+
+Classes:
+-ParametrosKDF(kdf, custo, salt, tamanho_chave): Parâmetros de uma derivação, gravados no cabeçalho.
+-CacheChaves(maximo, ttl): Cache limitado de chaves derivadas, com expiração e zeragem na remoção.
+
+Funções Principais:
+-gerar_chave(tamanho): Gera uma chave aleatória com o gerador criptográfico do sistema.
+-derivar_chave(senha, parametros, cache): Deriva a chave de uma senha, consultando o cache.
+-calibrar(kdf, alvo): Escolhe o custo cuja derivação leva aproximadamente o tempo alvo.
+-encrypt_file_senha(origem, destino, senha, kdf, custo, tamanho_chave, chunk_size, engine): Encripta um arquivo com uma senha.
+-decrypt_file_senha(origem, destino, senha, chunk_size, engine, cache): Decripta um arquivo encriptado com senha.
+-main(argv): Interface de linha de comando (calibrar, encrypt e decrypt).
+
+"""
+
+import argparse
+import collections
+import getpass
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import sys
+import threading
+import time
+
+import aes_crypto
+import aes_metricas
+import aes_stream
+
+# Identificador e versão do cabeçalho dos arquivos encriptados com senha
+MAGIC = b'AESP'
+VERSAO = 1
+
+# Algoritmos de derivação disponíveis: nome -> código no cabeçalho
+KDFS = {'pbkdf2': 1, 'scrypt': 2}
+
+# Algoritmo usado quando nenhum é especificado
+KDF_PADRAO = 'scrypt'
+
+# Custo padrão: iterações do PBKDF2-HMAC-SHA256 e log2 de N do scrypt (r=8, p=1)
+CUSTO_PADRAO = {'pbkdf2': 600000, 'scrypt': 15}
+
+# Maior custo aceito ao ler um cabeçalho, para que um arquivo adulterado não trave a derivação
+# (no scrypt, 2^20 usa 1 GiB de memória por derivação)
+CUSTO_MAXIMO = {'pbkdf2': 100000000, 'scrypt': 20}
+
+# Tamanho do salt aleatório, em bytes
+TAMANHO_SALT = 16
+
+# Tempo alvo de uma derivação usado na calibração, em segundos
+TEMPO_ALVO_PADRAO = 0.25
+
+# magic, versão, código do algoritmo, tamanho da chave, custo, tamanho do salt
+_FORMATO_CABECALHO = '>4sBBBIB'
+
+# Parâmetros fixos do scrypt
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+def gerar_chave(tamanho=32):
+    """
+    Gera uma chave aleatória com o gerador criptográfico do sistema.
+
+    :param tamanho: Tamanho da chave em bytes (16, 24 ou 32; default é 32)
+    :return: Chave gerada como bytes
+    """
+    if tamanho not in aes_crypto.TAMANHOS_CHAVE:
+        raise ValueError(f"A chave deve ter 16, 24 ou 32 bytes (pedida com {tamanho})")
+    return secrets.token_bytes(tamanho)
+
+class ParametrosKDF:
+    """
+    Parâmetros de uma derivação de chave, gravados no cabeçalho do arquivo.
+    """
+
+    __slots__ = ('kdf', 'custo', 'salt', 'tamanho_chave')
+
+    def __init__(self, kdf=KDF_PADRAO, custo=None, salt=None, tamanho_chave=32):
+        """
+        :param kdf: Nome do algoritmo ("pbkdf2" ou "scrypt")
+        :param custo: Iterações do PBKDF2 ou log2 de N do scrypt; None usa o custo padrão
+        :param salt: Salt (bytes); None gera um aleatório
+        :param tamanho_chave: Tamanho da chave derivada (16, 24 ou 32 bytes)
+        """
+        if kdf not in KDFS:
+            raise ValueError(f"KDF desconhecido: {kdf}")
+        if tamanho_chave not in aes_crypto.TAMANHOS_CHAVE:
+            raise ValueError(f"A chave deve ter 16, 24 ou 32 bytes (pedida com {tamanho_chave})")
+        custo = CUSTO_PADRAO[kdf] if custo is None else custo
+        if not 1 <= custo <= CUSTO_MAXIMO[kdf]:
+            raise ValueError(f"Custo fora do intervalo aceito para {kdf}: {custo}")
+        self.kdf = kdf
+        self.custo = custo
+        self.salt = secrets.token_bytes(TAMANHO_SALT) if salt is None else bytes(salt)
+        self.tamanho_chave = tamanho_chave
+
+    def para_bytes(self):
+        """
+        Empacota os parâmetros no formato do cabeçalho.
+
+        :return: Bytes do cabeçalho
+        """
+        return struct.pack(_FORMATO_CABECALHO, MAGIC, VERSAO, KDFS[self.kdf], self.tamanho_chave, self.custo,
+                           len(self.salt)) + self.salt
+
+    @classmethod
+    def ler(cls, src):
+        """
+        Lê os parâmetros do início de um objeto de arquivo.
+
+        :param src: Objeto com read() em modo binário, posicionado no início
+        :return: ParametrosKDF
+        :raises ValueError: Se o arquivo não tiver um cabeçalho de senha válido
+        """
+        fixo = src.read(struct.calcsize(_FORMATO_CABECALHO))
+        if len(fixo) < struct.calcsize(_FORMATO_CABECALHO) or fixo[:4] != MAGIC:
+            raise ValueError("O arquivo não foi encriptado com senha")
+        _, versao, codigo, tamanho_chave, custo, tamanho_salt = struct.unpack(_FORMATO_CABECALHO, fixo)
+        nomes = {codigo: nome for nome, codigo in KDFS.items()}
+        if versao != VERSAO or codigo not in nomes:
+            raise ValueError(f"Versão ou KDF não suportado: {versao}/{codigo}")
+        salt = src.read(tamanho_salt)
+        if len(salt) < tamanho_salt:
+            raise ValueError("Cabeçalho truncado")
+        return cls(nomes[codigo], custo, salt, tamanho_chave)
+
+    def __repr__(self):
+        return f"ParametrosKDF({self.kdf}, custo={self.custo}, {self.tamanho_chave * 8} bits)"
+
+def _derivar(senha, parametros):
+    """
+    Executa o KDF, sem consultar o cache.
+
+    :param senha: Senha (bytes)
+    :param parametros: ParametrosKDF
+    :return: Chave derivada (bytes)
+    """
+    with aes_metricas.etapa('kdf', kdf=parametros.kdf):
+        if parametros.kdf == 'pbkdf2':
+            return hashlib.pbkdf2_hmac('sha256', senha, parametros.salt, parametros.custo, parametros.tamanho_chave)
+        n = 1 << parametros.custo
+        return hashlib.scrypt(senha, salt=parametros.salt, n=n, r=_SCRYPT_R, p=_SCRYPT_P,
+                              maxmem=256 * _SCRYPT_R * n + (1 << 20), dklen=parametros.tamanho_chave)
+
+class CacheChaves:
+    """
+    Cache limitado de chaves derivadas, com expiração por tempo de vida.
+
+    As entradas são indexadas por um HMAC da senha com os parâmetros, sob
+    um segredo aleatório criado com o cache: a senha não fica guardada e o
+    índice não serve para testar senhas fora do processo. Cada chave é
+    mantida em um bytearray que é sobrescrito com zeros quando a entrada
+    expira, é descartada por falta de espaço ou o cache é limpo. As cópias
+    já entregues aos chamadores não são alcançadas pela zeragem.
+    """
+
+    def __init__(self, maximo=32, ttl=300.0):
+        """
+        :param maximo: Quantidade máxima de chaves guardadas
+        :param ttl: Tempo de vida de cada chave, em segundos
+        """
+        self._trava = threading.Lock()
+        self._entradas = collections.OrderedDict()
+        self._segredo = secrets.token_bytes(32)
+        self.maximo = maximo
+        self.ttl = ttl
+
+    def _indice(self, senha, parametros):
+        """
+        Calcula o índice de uma entrada a partir da senha e dos parâmetros.
+
+        :param senha: Senha (bytes)
+        :param parametros: ParametrosKDF
+        :return: Índice da entrada (bytes)
+        """
+        return hmac.digest(self._segredo, parametros.para_bytes() + senha, 'sha256')
+
+    @staticmethod
+    def _zerar(chave):
+        """
+        Sobrescreve uma chave guardada com zeros.
+
+        :param chave: bytearray da chave
+        """
+        chave[:] = bytes(len(chave))
+
+    def _expirar(self, agora):
+        """
+        Remove e zera as entradas vencidas (a trava já deve estar adquirida).
+
+        :param agora: Instante atual (time.monotonic)
+        """
+        while self._entradas:
+            indice, (validade, chave) = next(iter(self._entradas.items()))
+            if validade > agora:
+                break
+            del self._entradas[indice]
+            self._zerar(chave)
+
+    def obter(self, senha, parametros):
+        """
+        Retorna a chave guardada para a senha e os parâmetros, se ainda for válida.
+
+        :param senha: Senha (bytes)
+        :param parametros: ParametrosKDF
+        :return: Chave (bytes) ou None
+        """
+        indice = self._indice(senha, parametros)
+        with self._trava:
+            self._expirar(time.monotonic())
+            entrada = self._entradas.get(indice)
+            if entrada is None:
+                return None
+            return bytes(entrada[1])
+
+    def guardar(self, senha, parametros, chave):
+        """
+        Guarda uma chave derivada, descartando a mais antiga se o cache estiver cheio.
+
+        Deve ser chamado só depois que a chave foi autenticada, para que
+        chaves de senhas erradas não ocupem o cache.
+
+        :param senha: Senha (str ou bytes)
+        :param parametros: ParametrosKDF
+        :param chave: Chave derivada (bytes)
+        """
+        if self.maximo <= 0:
+            return
+        if isinstance(senha, str):
+            senha = senha.encode('utf-8')
+        indice = self._indice(senha, parametros)
+        with self._trava:
+            agora = time.monotonic()
+            self._expirar(agora)
+            anterior = self._entradas.pop(indice, None)
+            if anterior is not None:
+                self._zerar(anterior[1])
+            while len(self._entradas) >= self.maximo:
+                self._zerar(self._entradas.popitem(last=False)[1][1])
+            self._entradas[indice] = (agora + self.ttl, bytearray(chave))
+
+    def limpar(self):
+        """
+        Remove e zera todas as chaves guardadas.
+        """
+        with self._trava:
+            for _, chave in self._entradas.values():
+                self._zerar(chave)
+            self._entradas.clear()
+
+    def __len__(self):
+        with self._trava:
+            self._expirar(time.monotonic())
+            return len(self._entradas)
+
+# Cache padrão das chaves derivadas (até 32 chaves por até 5 minutos)
+cache_chaves = CacheChaves()
+
+def derivar_chave(senha, parametros, cache=cache_chaves):
+    """
+    Deriva a chave AES de uma senha, consultando antes o cache.
+
+    A chave derivada não é guardada aqui: quem a usar chama cache.guardar()
+    depois de autenticá-la (como decrypt_file_senha faz após conferir o tag).
+
+    :param senha: Senha (str ou bytes)
+    :param parametros: ParametrosKDF com algoritmo, custo, salt e tamanho da chave
+    :param cache: CacheChaves a consultar; None sempre executa o KDF
+    :return: Chave derivada (bytes)
+    """
+    if isinstance(senha, str):
+        senha = senha.encode('utf-8')
+    if cache is not None:
+        chave = cache.obter(senha, parametros)
+        if chave is not None:
+            if aes_metricas.coletores:
+                aes_metricas.contar('cache_kdf_acertos')
+            return chave
+        if aes_metricas.coletores:
+            aes_metricas.contar('cache_kdf_falhas')
+    return _derivar(senha, parametros)
+
+def calibrar(kdf=KDF_PADRAO, alvo=TEMPO_ALVO_PADRAO):
+    """
+    Mede a máquina e escolhe o custo cuja derivação leva aproximadamente o tempo alvo.
+
+    No PBKDF2 o tempo cresce linearmente com as iterações, então uma medição
+    curta é extrapolada. No scrypt N dobra a cada passo até que o tempo
+    alcance o alvo, sem passar de CUSTO_MAXIMO.
+
+    :param kdf: Nome do algoritmo ("pbkdf2" ou "scrypt")
+    :param alvo: Tempo desejado para uma derivação, em segundos
+    :return: Custo escolhido
+    """
+    if kdf not in KDFS:
+        raise ValueError(f"KDF desconhecido: {kdf}")
+    senha = b'calibracao'
+    if kdf == 'pbkdf2':
+        iteracoes = 10000
+        while True:
+            inicio = time.perf_counter()
+            _derivar(senha, ParametrosKDF(kdf, iteracoes))
+            decorrido = time.perf_counter() - inicio
+            if decorrido >= 0.05 or iteracoes * 2 > CUSTO_MAXIMO[kdf]:
+                break
+            iteracoes *= 2
+        return max(1, min(CUSTO_MAXIMO[kdf], int(iteracoes * alvo / decorrido)))
+    custo = 10
+    while custo < CUSTO_MAXIMO[kdf]:
+        inicio = time.perf_counter()
+        _derivar(senha, ParametrosKDF(kdf, custo))
+        # O próximo custo dobra o tempo; só avança se ele continuar abaixo do alvo
+        if (time.perf_counter() - inicio) * 2 > alvo:
+            break
+        custo += 1
+    return custo
+
+def encrypt_file_senha(origem, destino, senha, kdf=KDF_PADRAO, custo=None, tamanho_chave=32,
+                       chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO, engine=None):
+    """
+    Encripta um arquivo com uma chave derivada da senha, gravando os parâmetros no cabeçalho.
+
+    :param origem: Caminho do arquivo original
+    :param destino: Caminho do arquivo encriptado
+    :param senha: Senha (str ou bytes)
+    :param kdf: Nome do algoritmo ("pbkdf2" ou "scrypt")
+    :param custo: Custo do KDF; None usa o custo padrão
+    :param tamanho_chave: Tamanho da chave AES derivada (16, 24 ou 32 bytes)
+    :param chunk_size: Tamanho das partes lidas de cada vez
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Quantidade de bytes escritos
+    """
+    parametros = ParametrosKDF(kdf, custo, tamanho_chave=tamanho_chave)
+    # Expandida aqui, e não por aes_crypto.expandir_chave, para não ficar no cache LRU
+    key = aes_crypto.AESKey(derivar_chave(senha, parametros, None))
+    cabecalho = parametros.para_bytes()
+
+    def escrever(dst):
+        dst.write(cabecalho)
+        return len(cabecalho) + aes_stream.encrypt_stream(src, dst, key, chunk_size, 'gcm', engine=engine)
+
+    with open(origem, 'rb') as src:
+        return aes_stream.escrever_atomico(destino, escrever)
+
+def decrypt_file_senha(origem, destino, senha, chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO, engine=None,
+                       cache=cache_chaves):
+    """
+    Decripta um arquivo encriptado com senha, derivando a chave com os parâmetros do cabeçalho.
+
+    O destino só é substituído depois que o tag confere (ver aes_stream.escrever_atomico),
+    e só então a chave derivada é guardada no cache.
+
+    :param origem: Caminho do arquivo encriptado
+    :param destino: Caminho do arquivo decriptado
+    :param senha: Senha (str ou bytes)
+    :param chunk_size: Tamanho das partes lidas de cada vez
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param cache: CacheChaves a consultar; None sempre executa o KDF
+    :return: Quantidade de bytes escritos
+    :raises ValueError: Se o cabeçalho for inválido, a senha estiver incorreta ou o arquivo corrompido
+    """
+    with open(origem, 'rb') as src:
+        parametros = ParametrosKDF.ler(src)
+        chave = derivar_chave(senha, parametros, cache)
+        key = aes_crypto.AESKey(chave)
+        escritos = aes_stream.escrever_atomico(
+            destino, lambda dst: aes_stream.decrypt_stream(src, dst, key, chunk_size, 'gcm', engine))
+    if cache is not None:
+        cache.guardar(senha, parametros, chave)
+    return escritos
+
+def _ler_senha(variavel, confirmar):
+    """
+    Lê a senha de uma variável de ambiente ou do terminal.
+
+    :param variavel: Nome da variável de ambiente; None pergunta no terminal
+    :param confirmar: True para pedir a senha duas vezes
+    :return: Senha (str)
+    """
+    if variavel:
+        senha = os.environ.get(variavel)
+        if not senha:
+            raise ValueError(f"A variável {variavel} não contém uma senha")
+        return senha
+    senha = getpass.getpass("Senha: ")
+    if confirmar and getpass.getpass("Confirme a senha: ") != senha:
+        raise ValueError("As senhas não conferem")
+    return senha
+
+def main(argv=None):
+    """
+    Interface de linha de comando: calibração do custo e encriptação de arquivos com senha.
+
+    :param argv: Argumentos (None usa sys.argv)
+    :return: Código de saída
+    """
+    parser = argparse.ArgumentParser(description="Derivação de chaves a partir de senhas")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    p_calibrar = subparsers.add_parser('calibrar', help="escolhe o custo para um tempo alvo nesta máquina")
+    p_calibrar.add_argument('--kdf', choices=list(KDFS), default=KDF_PADRAO)
+    p_calibrar.add_argument('--alvo', type=float, default=TEMPO_ALVO_PADRAO, help="segundos por derivação")
+    for comando in ('encrypt', 'decrypt'):
+        p = subparsers.add_parser(comando)
+        p.add_argument('origem')
+        p.add_argument('destino')
+        p.add_argument('--senha-env', help="variável de ambiente com a senha (padrão: perguntar no terminal)")
+        if comando == 'encrypt':
+            p.add_argument('--kdf', choices=list(KDFS), default=KDF_PADRAO)
+            p.add_argument('--custo', type=int, help="iterações do PBKDF2 ou log2 de N do scrypt")
+            p.add_argument('--bits', type=int, choices=(128, 192, 256), default=256, help="tamanho da chave AES")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'calibrar':
+        print(calibrar(args.kdf, args.alvo))
+        return 0
+    try:
+        senha = _ler_senha(args.senha_env, args.comando == 'encrypt')
+        if args.comando == 'encrypt':
+            encrypt_file_senha(args.origem, args.destino, senha, args.kdf, args.custo, args.bits // 8)
+        else:
+            decrypt_file_senha(args.origem, args.destino, senha)
+    except (OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+Ferramenta de linha de comando para encriptar e decriptar muitos arquivos de uma vez.
+
+Diferente das interfaces interativas de AesSemLib e aesComLib, que tratam uma
+mensagem digitada por vez, esta ferramenta não faz perguntas: recebe
+arquivos e diretórios (percorridos recursivamente), lê a chave de um arquivo
+ou de uma variável de ambiente e distribui os arquivos entre vários
+processos em uma única execução, sem pagar a inicialização do Python a cada
+arquivo. Um manifesto com data de modificação e tamanho de cada arquivo
+permite pular, na execução seguinte, os arquivos que não mudaram.
+Cada saída é gravada em um temporário e só substitui o destino quando o
+arquivo termina sem erro, e um erro em um arquivo (de qualquer tipo) é
+registrado sem interromper os demais.
+
+Uso:
+    python aes_lote.py encrypt dados/ --destino cifrados/ --chave-arquivo chave.hex --manifesto manifesto.json
+    AES_CHAVE=00112233... python aes_lote.py decrypt cifrados/ --destino dados/ --progresso
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-argparse, json, os, sys e time são importadas para a linha de comando, o manifesto e os relatórios.
+-concurrent.futures é importada para o pool de processos.
+-aes_stream e aes_container fornecem a encriptação dos arquivos em fluxo; aes_crypto, os tamanhos de chave aceitos.
+
+Variáveis Globais:
+-MODOS_LOTE: Formatos de arquivo disponíveis.
+-VARIAVEL_CHAVE_PADRAO: Variável de ambiente consultada quando nenhuma chave é informada.
+-SUFIXO_PADRAO: Sufixo acrescentado aos arquivos encriptados.
+
+Funções Principais:
+-carregar_chave(arquivo, variavel): Lê a chave de um arquivo ou de uma variável de ambiente.
+-listar_arquivos(origens): Lista os arquivos das origens, percorrendo diretórios.
+-planejar(operacao, origens, destino, sufixo): Associa cada arquivo ao caminho de saída.
+-processar_arquivo(operacao, origem, destino, key, mode): Encripta ou decripta um arquivo.
+-executar_lote(operacao, tarefas, key, mode, workers, manifesto, progresso): Processa a lista de arquivos.
+-main(argv): Interface de linha de comando.
+
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import aes_container
+import aes_crypto
+import aes_stream
+
+# Formatos de arquivo disponíveis: os modos de aes_stream e o contêiner de aes_container
+MODOS_LOTE = aes_stream.MODOS + ('container',)
+
+# Variável de ambiente consultada quando nenhuma chave é informada
+VARIAVEL_CHAVE_PADRAO = 'AES_CHAVE'
+
+# Sufixo acrescentado aos arquivos encriptados
+SUFIXO_PADRAO = '.aes'
+
+def carregar_chave(arquivo=None, variavel=VARIAVEL_CHAVE_PADRAO):
+    """
+    Lê a chave de um arquivo ou de uma variável de ambiente.
+
+    O arquivo pode conter a chave em hexadecimal ou os próprios bytes da
+    chave (16, 24 ou 32 bytes); a variável de ambiente deve conter a chave em hexadecimal.
+
+    :param arquivo: Caminho do arquivo da chave; None usa a variável de ambiente
+    :param variavel: Nome da variável de ambiente
+    :return: Chave (bytes)
+    :raises ValueError: Se a chave não for encontrada ou estiver em formato inválido
+    """
+    if arquivo:
+        with open(arquivo, 'rb') as f:
+            conteudo = f.read()
+        try:
+            chave = bytes.fromhex(conteudo.decode('ascii').strip())
+        except (UnicodeDecodeError, ValueError):
+            if len(conteudo) not in aes_crypto.TAMANHOS_CHAVE:
+                raise ValueError(f"Formato de chave inválido em {arquivo}") from None
+            chave = conteudo
+    else:
+        valor = os.environ.get(variavel)
+        if not valor:
+            raise ValueError(f"Nenhuma chave informada (use --chave-arquivo ou a variável {variavel})")
+        try:
+            chave = bytes.fromhex(valor.strip())
+        except ValueError:
+            raise ValueError(f"A variável {variavel} deve conter a chave em hexadecimal") from None
+    if len(chave) not in aes_crypto.TAMANHOS_CHAVE:
+        raise ValueError(f"A chave deve ter 16, 24 ou 32 bytes (recebida com {len(chave)})")
+    return chave
+
+def listar_arquivos(origens):
+    """
+    Lista os arquivos das origens, percorrendo diretórios recursivamente.
+
+    :param origens: Caminhos de arquivos e diretórios
+    :return: Lista de tuplas (caminho do arquivo, caminho relativo à origem)
+    """
+    arquivos = []
+    for origem in origens:
+        if os.path.isdir(origem):
+            for raiz, diretorios, nomes in os.walk(origem):
+                diretorios.sort()
+                for nome in sorted(nomes):
+                    caminho = os.path.join(raiz, nome)
+                    arquivos.append((caminho, os.path.relpath(caminho, origem)))
+        else:
+            arquivos.append((origem, os.path.basename(origem)))
+    return arquivos
+
+def planejar(operacao, origens, destino, sufixo=SUFIXO_PADRAO):
+    """
+    Associa cada arquivo das origens ao caminho de saída, mantendo a estrutura de diretórios.
+
+    :param operacao: "encrypt" ou "decrypt"
+    :param origens: Caminhos de arquivos e diretórios
+    :param destino: Diretório de saída
+    :param sufixo: Sufixo acrescentado na encriptação e removido na decriptação
+    :return: Lista de tuplas (origem, destino)
+    """
+    tarefas = []
+    for caminho, relativo in listar_arquivos(origens):
+        if operacao == 'encrypt':
+            relativo += sufixo
+        elif sufixo and relativo.endswith(sufixo):
+            relativo = relativo[:-len(sufixo)]
+        tarefas.append((caminho, os.path.join(destino, relativo)))
+    return tarefas
+
+def processar_arquivo(operacao, origem, destino, key, mode):
+    """
+    Encripta ou decripta um arquivo (executado nos processos do pool).
+
+    :param operacao: "encrypt" ou "decrypt"
+    :param origem: Caminho do arquivo de entrada
+    :param destino: Caminho do arquivo de saída
+    :param key: Chave (bytes)
+    :param mode: Formato do arquivo (um dos MODOS_LOTE)
+    :return: Quantidade de bytes lidos da origem
+    :raises ValueError: Se o destino for o próprio arquivo de origem ou a entrada for inválida
+    """
+    if os.path.exists(destino) and os.path.samefile(origem, destino):
+        raise ValueError("O destino é o próprio arquivo de origem")
+    os.makedirs(os.path.dirname(destino) or '.', exist_ok=True)
+    # Todas as funções abaixo gravam por aes_stream.escrever_atomico: uma falha não deixa saída parcial
+    if mode == 'container':
+        if operacao == 'encrypt':
+            aes_container.encrypt_container(origem, destino, key)
+        else:
+            aes_container.decrypt_container(origem, destino, key)
+    elif operacao == 'encrypt':
+        aes_stream.encrypt_file(origem, destino, key, mode=mode)
+    else:
+        aes_stream.decrypt_file(origem, destino, key, mode=mode)
+    return os.path.getsize(origem)
+
+def _assinatura(caminho):
+    """
+    Retorna a data de modificação e o tamanho de um arquivo.
+
+    :param caminho: Caminho do arquivo
+    :return: Lista [mtime_ns, tamanho]
+    """
+    info = os.stat(caminho)
+    return [info.st_mtime_ns, info.st_size]
+
+def carregar_manifesto(arquivo):
+    """
+    Carrega o manifesto de arquivos já processados.
+
+    :param arquivo: Caminho do manifesto
+    :return: Dicionário origem -> registro; vazio se o arquivo não existir
+    """
+    try:
+        with open(arquivo) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def salvar_manifesto(manifesto, arquivo):
+    """
+    Salva o manifesto de forma atômica (arquivo temporário seguido de rename).
+
+    :param manifesto: Dicionário origem -> registro
+    :param arquivo: Caminho do manifesto
+    """
+    dados = json.dumps(manifesto, indent=1, sort_keys=True).encode('utf-8')
+    aes_stream.escrever_atomico(arquivo, lambda f: f.write(dados))
+
+def _ja_processado(manifesto, operacao, origem, destino, mode):
+    """
+    Verifica no manifesto se o arquivo já foi processado e não mudou desde então.
+
+    :return: True se o arquivo pode ser pulado
+    """
+    registro = manifesto.get(os.path.abspath(origem))
+    return (registro is not None and registro['operacao'] == operacao and registro['modo'] == mode
+            and registro['destino'] == os.path.abspath(destino) and os.path.exists(destino)
+            and registro['assinatura'] == _assinatura(origem))
+
+def executar_lote(operacao, tarefas, key, mode=aes_stream.MODO_PADRAO, workers=None, manifesto=None, progresso=False):
+    """
+    Processa a lista de arquivos em um pool de processos.
+
+    Qualquer exceção ao processar um arquivo (inclusive a queda de um
+    processo do pool) conta como erro daquele arquivo; só uma interrupção
+    (KeyboardInterrupt) encerra o lote, e o manifesto é salvo mesmo assim.
+
+    :param operacao: "encrypt" ou "decrypt"
+    :param tarefas: Lista de tuplas (origem, destino)
+    :param key: Chave (bytes)
+    :param mode: Formato dos arquivos (um dos MODOS_LOTE)
+    :param workers: Quantidade de processos; None usa a quantidade de núcleos
+    :param manifesto: Caminho do manifesto; None processa todos os arquivos
+    :param progresso: Mostra o andamento e a vazão na saída de erro
+    :return: Dicionário com as quantidades processadas, puladas e com erro e os bytes processados
+    """
+    registros = carregar_manifesto(manifesto) if manifesto else {}
+    pendentes = [(o, d) for o, d in tarefas if not (manifesto and _ja_processado(registros, operacao, o, d, mode))]
+    resumo = {'processados': 0, 'pulados': len(tarefas) - len(pendentes), 'erros': 0, 'bytes': 0}
+    inicio = time.perf_counter()
+
+    def concluir(origem, destino, tamanho=None, erro=None):
+        if erro is None:
+            resumo['processados'] += 1
+            resumo['bytes'] += tamanho
+            registros[os.path.abspath(origem)] = {'operacao': operacao, 'modo': mode, 'destino': os.path.abspath(destino),
+                                                  'assinatura': _assinatura(origem)}
+        else:
+            resumo['erros'] += 1
+            print(f"Erro em {origem}: {erro}", file=sys.stderr)
+        if progresso:
+            feitos = resumo['processados'] + resumo['erros']
+            decorrido = time.perf_counter() - inicio
+            print(f"[{feitos}/{len(pendentes)}] {origem} "
+                  f"({resumo['bytes'] / max(decorrido, 1e-9) / 1e6:.2f} MB/s)", file=sys.stderr)
+
+    try:
+        if (workers or os.cpu_count() or 1) == 1 or len(pendentes) <= 1:
+            for origem, destino in pendentes:
+                try:
+                    concluir(origem, destino, processar_arquivo(operacao, origem, destino, key, mode))
+                except Exception as e:
+                    concluir(origem, destino, erro=e)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futuros = {pool.submit(processar_arquivo, operacao, origem, destino, key, mode): (origem, destino)
+                           for origem, destino in pendentes}
+                for futuro in as_completed(futuros):
+                    origem, destino = futuros[futuro]
+                    try:
+                        concluir(origem, destino, futuro.result())
+                    except Exception as e:
+                        concluir(origem, destino, erro=e)
+    finally:
+        if manifesto:
+            salvar_manifesto(registros, manifesto)
+
+    resumo['segundos'] = time.perf_counter() - inicio
+    return resumo
+
+def main(argv=None):
+    """
+    Interface de linha de comando.
+
+    :param argv: Argumentos (None usa sys.argv)
+    :return: Código de saída (1 se algum arquivo falhar)
+    """
+    parser = argparse.ArgumentParser(description="Encripta ou decripta muitos arquivos e diretórios de uma vez")
+    parser.add_argument('operacao', choices=('encrypt', 'decrypt'))
+    parser.add_argument('origens', nargs='+', help="arquivos e diretórios de entrada")
+    parser.add_argument('--destino', required=True, help="diretório de saída")
+    parser.add_argument('--chave-arquivo', help="arquivo com a chave (hexadecimal ou 16, 24 ou 32 bytes)")
+    parser.add_argument('--chave-env', default=VARIAVEL_CHAVE_PADRAO, help="variável de ambiente com a chave em hexadecimal")
+    parser.add_argument('--modo', choices=MODOS_LOTE, default=aes_stream.MODO_PADRAO, help="formato dos arquivos")
+    parser.add_argument('--sufixo', default=SUFIXO_PADRAO, help="sufixo dos arquivos encriptados")
+    parser.add_argument('--workers', type=int, help="quantidade de processos (padrão: núcleos disponíveis)")
+    parser.add_argument('--manifesto', help="manifesto para pular arquivos já processados e não modificados")
+    parser.add_argument('--progresso', action='store_true', help="mostra o andamento e a vazão")
+    args = parser.parse_args(argv)
+
+    try:
+        key = carregar_chave(args.chave_arquivo, args.chave_env)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    tarefas = planejar(args.operacao, args.origens, args.destino, args.sufixo)
+    resumo = executar_lote(args.operacao, tarefas, key, args.modo, args.workers, args.manifesto, args.progresso)
+    if args.progresso:
+        print(f"{resumo['processados']} processados, {resumo['pulados']} pulados, {resumo['erros']} com erro; "
+              f"{resumo['bytes'] / 1e6:.2f} MB em {resumo['segundos']:.2f} s", file=sys.stderr)
+    return 1 if resumo['erros'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
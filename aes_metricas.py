@@ -0,0 +1,261 @@
+"""
+Módulo de instrumentação opcional do pipeline de cifra: tempos por etapa e contadores.
+
+Enquanto nenhum coletor estiver registrado, os pontos instrumentados em
+aes_crypto e aesComLib fazem apenas a verificação `if aes_metricas.coletores`
+e seguem adiante, de modo que o custo com a instrumentação desligada é
+praticamente nulo. Com um coletor registrado são medidos o tempo de cada
+etapa (expansão de chave, cifra dos blocos, codificação UTF-8, leitura e
+escrita de arquivos, chamadas à PyCryptodome) e contados bytes, blocos,
+expansões de chave e acertos/falhas do cache de chaves.
+
+Uso:
+    with aes_metricas.coletar() as coletor:
+        aes_crypto.encrypt(mensagem, chave)
+    print(coletor.exportar_prometheus())
+
+Qualquer objeto com os métodos contar(nome, valor, rotulos) e
+registrar_tempo(nome, segundos, rotulos) pode ser registrado como coletor,
+o que permite encaminhar as medições para outros sistemas.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-contextlib, threading e time são importadas para o gerenciador de contexto e a medição.
+-json é importada em Coletor.exportar_json, apenas quando a exportação é usada.
+
+Variáveis Globais:
+-coletores: Coletores registrados; vazia quando a instrumentação está desligada.
+
+Classes:
+-Coletor(): Acumula contadores e tempos e os exporta em JSON ou no formato texto do Prometheus.
+
+Funções Principais:
+-registrar(coletor): Registra um coletor.
+-remover(coletor): Remove um coletor registrado.
+-coletar(coletor): Gerenciador de contexto que registra um coletor durante o bloco.
+-contar(nome, valor, **rotulos): Repassa um contador a todos os coletores.
+-registrar_tempo(nome, segundos, **rotulos): Repassa o tempo de uma etapa a todos os coletores.
+-etapa(nome, **rotulos): Gerenciador de contexto que mede o tempo de uma etapa.
+
+"""
+
+import contextlib
+import threading
+import time
+
+# Coletores registrados; os pontos instrumentados só medem algo quando ela não está vazia
+coletores = []
+
+def _rotulos(rotulos):
+    """
+    Normaliza os rótulos em uma tupla ordenada, usada como parte da chave.
+
+    :param rotulos: Dicionário de rótulos
+    :return: Tupla de pares (nome, valor)
+    """
+    return tuple(sorted((nome, str(valor)) for nome, valor in rotulos.items()))
+
+def _formatar_rotulos(rotulos):
+    """
+    Formata os rótulos no padrão do Prometheus.
+
+    :param rotulos: Tupla de pares (nome, valor)
+    :return: Texto como {engine="numpy"} ou vazio
+    """
+    if not rotulos:
+        return ''
+    partes = []
+    for nome, valor in rotulos:
+        valor = valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{nome}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+class Coletor:
+    """
+    Acumula contadores e tempos por etapa.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.contadores = {}
+        self.tempos = {}
+
+    def contar(self, nome, valor=1, rotulos=()):
+        """
+        Soma um valor a um contador.
+
+        :param nome: Nome do contador
+        :param valor: Valor a somar
+        :param rotulos: Tupla de pares (nome, valor)
+        """
+        chave = (nome, rotulos)
+        with self._trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def registrar_tempo(self, nome, segundos, rotulos=()):
+        """
+        Acumula o tempo de uma execução de uma etapa.
+
+        :param nome: Nome da etapa
+        :param segundos: Duração da execução
+        :param rotulos: Tupla de pares (nome, valor)
+        """
+        chave = (nome, rotulos)
+        with self._trava:
+            total, chamadas = self.tempos.get(chave, (0.0, 0))
+            self.tempos[chave] = (total + segundos, chamadas + 1)
+
+    def limpar(self):
+        """
+        Zera todos os contadores e tempos.
+        """
+        with self._trava:
+            self.contadores.clear()
+            self.tempos.clear()
+
+    def para_dict(self):
+        """
+        Retorna um retrato dos contadores e tempos.
+
+        :return: Dicionário com as listas "contadores" e "etapas"
+        """
+        with self._trava:
+            return {
+                'contadores': [{'nome': nome, 'rotulos': dict(rotulos), 'valor': valor}
+                               for (nome, rotulos), valor in sorted(self.contadores.items())],
+                'etapas': [{'nome': nome, 'rotulos': dict(rotulos), 'segundos': total, 'chamadas': chamadas}
+                           for (nome, rotulos), (total, chamadas) in sorted(self.tempos.items())],
+            }
+
+    def exportar_json(self):
+        """
+        Exporta um retrato dos contadores e tempos em JSON.
+
+        :return: Texto JSON
+        """
+        import json  # Importada aqui para não pesar na importação dos módulos de cifra
+        return json.dumps(self.para_dict(), indent=2)
+
+    def exportar_prometheus(self, prefixo='aes_'):
+        """
+        Exporta um retrato no formato texto de exposição do Prometheus.
+
+        Cada contador vira a métrica <prefixo><nome>_total; os tempos viram
+        <prefixo>etapa_segundos_total e <prefixo>etapa_chamadas_total, com a
+        etapa no rótulo "etapa".
+
+        :param prefixo: Prefixo dos nomes das métricas
+        :return: Texto no formato do Prometheus
+        """
+        with self._trava:
+            contadores = sorted(self.contadores.items())
+            tempos = sorted(self.tempos.items())
+        linhas = []
+        declarados = set()
+        for (nome, rotulos), valor in contadores:
+            metrica = f'{prefixo}{nome}_total'
+            if metrica not in declarados:
+                linhas.append(f'# TYPE {metrica} counter')
+                declarados.add(metrica)
+            linhas.append(f'{metrica}{_formatar_rotulos(rotulos)} {valor}')
+        if tempos:
+            linhas.append(f'# TYPE {prefixo}etapa_segundos_total counter')
+            for (nome, rotulos), (total, _) in tempos:
+                linhas.append(f'{prefixo}etapa_segundos_total{_formatar_rotulos((("etapa", nome),) + rotulos)} {total:.9f}')
+            linhas.append(f'# TYPE {prefixo}etapa_chamadas_total counter')
+            for (nome, rotulos), (_, chamadas) in tempos:
+                linhas.append(f'{prefixo}etapa_chamadas_total{_formatar_rotulos((("etapa", nome),) + rotulos)} {chamadas}')
+        return '\n'.join(linhas) + '\n'
+
+def registrar(coletor):
+    """
+    Registra um coletor, ligando a instrumentação.
+
+    :param coletor: Coletor (ou objeto com contar e registrar_tempo)
+    :return: O próprio coletor
+    """
+    coletores.append(coletor)
+    return coletor
+
+def remover(coletor):
+    """
+    Remove um coletor registrado; sem coletores a instrumentação volta a ficar desligada.
+
+    :param coletor: Coletor registrado
+    """
+    coletores.remove(coletor)
+
+@contextlib.contextmanager
+def coletar(coletor=None):
+    """
+    Registra um coletor durante a execução do bloco.
+
+    :param coletor: Coletor a registrar; None cria um novo
+    :return: Gerenciador de contexto que fornece o coletor
+    """
+    coletor = registrar(coletor or Coletor())
+    try:
+        yield coletor
+    finally:
+        remover(coletor)
+
+def contar(nome, valor=1, **rotulos):
+    """
+    Repassa um contador a todos os coletores registrados.
+
+    :param nome: Nome do contador
+    :param valor: Valor a somar
+    :param rotulos: Rótulos da medição (por exemplo engine="numpy")
+    """
+    rotulos = _rotulos(rotulos)
+    for coletor in coletores:
+        coletor.contar(nome, valor, rotulos)
+
+def registrar_tempo(nome, segundos, **rotulos):
+    """
+    Repassa o tempo de uma etapa a todos os coletores registrados.
+
+    :param nome: Nome da etapa
+    :param segundos: Duração da execução
+    :param rotulos: Rótulos da medição
+    """
+    rotulos = _rotulos(rotulos)
+    for coletor in coletores:
+        coletor.registrar_tempo(nome, segundos, rotulos)
+
+@contextlib.contextmanager
+def _medir_etapa(nome, rotulos):
+    """
+    Mede o tempo do bloco e o repassa aos coletores.
+
+    :param nome: Nome da etapa
+    :param rotulos: Rótulos da medição
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_tempo(nome, time.perf_counter() - inicio, **rotulos)
+
+# Gerenciador de contexto vazio, reutilizado quando não há coletores
+_NULO = contextlib.nullcontext()
+
+def etapa(nome, **rotulos):
+    """
+    Gerenciador de contexto que mede o tempo do bloco como uma execução da etapa.
+
+    Sem coletores registrados devolve um contexto vazio já criado, sem medir
+    nada. Nos laços mais internos ainda é melhor verificar `coletores` antes.
+
+    :param nome: Nome da etapa
+    :param rotulos: Rótulos da medição
+    :return: Gerenciador de contexto
+    """
+    if not coletores:
+        return _NULO
+    return _medir_etapa(nome, rotulos)
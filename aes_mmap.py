@@ -0,0 +1,271 @@
+"""
+Módulo para encriptação e decriptação de arquivos em disco via mmap.
+
+A entrada e a saída são mapeadas em memória e percorridas com fatias de
+memoryview: cada parte cifrada é escrita diretamente na posição final de uma
+saída com o tamanho já definido, sem ler o arquivo inteiro para um bytes,
+sem criar um objeto por bloco e sem lista intermediária. A saída é um
+arquivo temporário ao lado do destino (aes_stream.escrever_atomico), que só
+o substitui no final; assim uma reencriptação interrompida ou com a chave
+errada nunca estraga o arquivo original.
+
+Os arquivos seguem os formatos "ecb" e "ctr" de aes_stream, de modo que um
+arquivo gerado por um módulo pode ser lido pelo outro.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-mmap e os são importadas para mapear os arquivos em memória.
+-aes_crypto, aes_modos e aes_stream fornecem a cifra, o modo CTR e os formatos de arquivo.
+
+Variáveis Globais:
+-MODOS_MMAP: Modos suportados pelo acesso via mmap.
+-MODOS_REENCRIPTACAO: Modos aceitos por reencrypt_file_mmap.
+
+Funções Principais:
+-encrypt_file_mmap(origem, destino, key, mode, iv, chunk_size, engine): Encripta um arquivo mapeado em memória.
+-decrypt_file_mmap(origem, destino, key, mode, chunk_size, engine): Decripta um arquivo mapeado em memória.
+-reencrypt_file_mmap(arquivo, key_antiga, key_nova, mode, iv, chunk_size, engine, sem_verificacao): Reencripta um arquivo
+ com outra chave, conferindo antes a chave antiga.
+
+"""
+
+import mmap
+import os
+
+import aes_crypto
+import aes_modos
+import aes_stream
+
+# Modos suportados pelo acesso via mmap (os dois preservam o alinhamento dos blocos)
+MODOS_MMAP = ('ecb', 'ctr')
+
+# Modos aceitos na reencriptação (o GCM é lido do mapeamento e gravado em fluxo)
+MODOS_REENCRIPTACAO = MODOS_MMAP + ('gcm',)
+
+def _validar(mode, chunk_size, modos=MODOS_MMAP):
+    """
+    Confere o modo e arredonda o tamanho das partes para múltiplo de 16.
+
+    :param mode: Nome do modo
+    :param chunk_size: Tamanho desejado das partes
+    :param modos: Modos aceitos
+    :return: Tamanho das partes, múltiplo de 16
+    """
+    if mode not in modos:
+        raise ValueError(f"Modo não suportado via mmap: {mode}")
+    return max(16, chunk_size - chunk_size % 16)
+
+def _aplicar(entrada, saida, inicio_entrada, inicio_saida, tamanho, chunk_size, transformar):
+    """
+    Percorre a entrada em partes, escrevendo cada resultado na saída.
+
+    :param entrada: memoryview da entrada
+    :param saida: memoryview da saída (pode ser a mesma da entrada)
+    :param inicio_entrada: Posição inicial na entrada
+    :param inicio_saida: Posição inicial na saída
+    :param tamanho: Quantidade de bytes a processar
+    :param chunk_size: Tamanho de cada parte
+    :param transformar: Função (parte, posição relativa) -> parte transformada
+    """
+    for pos in range(0, tamanho, chunk_size):
+        fim = min(pos + chunk_size, tamanho)
+        # A fatia é liberada mesmo se transformar falhar, para que o mapeamento possa ser fechado
+        with entrada[inicio_entrada + pos:inicio_entrada + fim] as parte:
+            saida[inicio_saida + pos:inicio_saida + fim] = transformar(parte, pos)
+
+def _escrever_mapeado(destino, tamanho, escrever):
+    """
+    Cria a saída com o tamanho final em um temporário mapeado em memória, trocado pelo destino no sucesso.
+
+    :param destino: Caminho do arquivo de saída
+    :param tamanho: Tamanho final do arquivo
+    :param escrever: Função que recebe o memoryview da saída
+    """
+    def mapear(arquivo):
+        arquivo.truncate(tamanho)
+        if tamanho == 0:
+            return
+        with mmap.mmap(arquivo.fileno(), tamanho) as m_saida:
+            with memoryview(m_saida) as saida:
+                escrever(saida)
+            m_saida.flush()
+
+    aes_stream.escrever_atomico(destino, mapear)
+
+def _validar_iv(mode, iv):
+    """
+    Confere o iv do CTR, gerando um aleatório se não for informado.
+
+    :param mode: Nome do modo
+    :param iv: Bloco de contador inicial ou None
+    :return: iv a usar (None no ECB)
+    :raises ValueError: Se o iv não tiver 16 bytes no CTR ou for informado no ECB
+    """
+    if mode == 'ecb':
+        if iv is not None:
+            raise ValueError("O modo ecb não usa iv")
+        return None
+    if iv is None:
+        return os.urandom(16)
+    if len(iv) != 16:
+        raise ValueError(f"O iv do modo ctr deve ter 16 bytes, e não {len(iv)}")
+    return bytes(iv)
+
+def encrypt_file_mmap(origem, destino, key, mode='ctr', iv=None, chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO, engine=None):
+    """
+    Encripta um arquivo mapeando entrada e saída em memória.
+
+    :param origem: Caminho do arquivo original
+    :param destino: Caminho do arquivo encriptado
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param mode: "ctr" (iv no início, sem preenchimento) ou "ecb" (com preenchimento)
+    :param iv: Bloco de contador inicial do CTR (16 bytes); None gera um aleatório
+    :param chunk_size: Tamanho das partes processadas de cada vez
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Tamanho do arquivo encriptado
+    :raises ValueError: Se o modo for desconhecido ou o iv não tiver 16 bytes (ou for dado no ECB)
+    """
+    chunk_size = _validar(mode, chunk_size)
+    iv = _validar_iv(mode, iv)
+    key = aes_crypto.expandir_chave(key)
+    n = os.path.getsize(origem)
+    if n == 0:
+        return aes_stream.encrypt_file(origem, destino, key, chunk_size, mode, engine)
+
+    if mode == 'ctr':
+        tamanho_saida = 16 + n
+    else:
+        tamanho_saida = aes_crypto.tamanho_cifrado(n)
+
+    def escrever(saida):
+        if mode == 'ctr':
+            saida[:16] = iv
+            _aplicar(entrada, saida, 0, 16, n, chunk_size,
+                     lambda parte, pos: aes_modos.encrypt_ctr(parte, key, iv, pos, engine))
+        else:
+            completo = n - n % 16
+            _aplicar(entrada, saida, 0, 0, completo, chunk_size,
+                     lambda parte, pos: aes_crypto.encrypt_blocks(parte, key, engine))
+            aes_crypto.encrypt_into(saida[completo:], entrada[completo:], key, engine)
+
+    with open(origem, 'rb') as f_entrada, mmap.mmap(f_entrada.fileno(), 0, access=mmap.ACCESS_READ) as m_entrada:
+        with memoryview(m_entrada) as entrada:
+            _escrever_mapeado(destino, tamanho_saida, escrever)
+    return tamanho_saida
+
+def decrypt_file_mmap(origem, destino, key, mode='ctr', chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO, engine=None):
+    """
+    Decripta um arquivo mapeando entrada e saída em memória.
+
+    No ECB o último bloco é decriptado primeiro, para que o tamanho final
+    (sem o preenchimento) seja conhecido antes de criar a saída.
+
+    :param origem: Caminho do arquivo encriptado
+    :param destino: Caminho do arquivo decriptado
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param mode: "ctr" ou "ecb", o mesmo usado na encriptação
+    :param chunk_size: Tamanho das partes processadas de cada vez
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Tamanho do arquivo decriptado
+    :raises ValueError: Se o arquivo estiver truncado ou o preenchimento for inválido
+    """
+    chunk_size = _validar(mode, chunk_size)
+    key = aes_crypto.expandir_chave(key)
+    n = os.path.getsize(origem)
+    if n < 16 or (mode == 'ecb' and n % 16):
+        raise ValueError("Arquivo encriptado truncado")
+
+    with open(origem, 'rb') as f_entrada, mmap.mmap(f_entrada.fileno(), 0, access=mmap.ACCESS_READ) as m_entrada:
+        with memoryview(m_entrada) as entrada:
+            if mode == 'ctr':
+                iv = bytes(entrada[:16])
+                tamanho_saida = n - 16
+            else:
+                ultimo = aes_crypto.decrypt_blocks(entrada[n - 16:], key, engine)
+                pad_len = aes_crypto.tamanho_preenchimento(ultimo)
+                tamanho_saida = n - pad_len
+
+            def escrever(saida):
+                if mode == 'ctr':
+                    _aplicar(entrada, saida, 16, 0, tamanho_saida, chunk_size,
+                             lambda parte, pos: aes_modos.decrypt_ctr(parte, key, iv, pos, engine))
+                else:
+                    _aplicar(entrada, saida, 0, 0, n - 16, chunk_size,
+                             lambda parte, pos: aes_crypto.decrypt_blocks(parte, key, engine))
+                    saida[n - 16:] = ultimo[:16 - pad_len]
+
+            _escrever_mapeado(destino, tamanho_saida, escrever)
+    return tamanho_saida
+
+def reencrypt_file_mmap(arquivo, key_antiga, key_nova, mode='ctr', iv=None, chunk_size=aes_stream.TAMANHO_CHUNK_PADRAO,
+                        engine=None, sem_verificacao=False):
+    """
+    Reencripta um arquivo com uma nova chave.
+
+    O arquivo original é mapeado só para leitura e o resultado é gravado em
+    um temporário que o substitui no final, de modo que uma interrupção não
+    perde o arquivo. A chave antiga é conferida antes que o original seja trocado:
+    -"gcm": o tag é verificado com a chave antiga; se não conferir, nada é alterado.
+    -"ecb": o preenchimento do último bloco é conferido antes de começar. Uma chave errada ainda
+     passa com probabilidade de cerca de 1/256, por isso prefira o GCM.
+    -"ctr": o formato não tem como conferir a chave, então o modo é recusado a menos que
+     sem_verificacao seja True.
+
+    :param arquivo: Caminho do arquivo encriptado
+    :param key_antiga: Chave atual do arquivo (bytes ou AESKey)
+    :param key_nova: Nova chave (bytes ou AESKey)
+    :param mode: "gcm", "ctr" ou "ecb", o mesmo usado na encriptação
+    :param iv: Novo iv (16 bytes no CTR, 12 no GCM); None gera um aleatório
+    :param chunk_size: Tamanho das partes processadas de cada vez
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param sem_verificacao: True para aceitar o CTR, cuja chave antiga não pode ser conferida
+    :raises ValueError: Se o arquivo estiver truncado, a chave antiga não conferir ou o CTR for pedido sem sem_verificacao
+    """
+    chunk_size = _validar(mode, chunk_size, MODOS_REENCRIPTACAO)
+    if mode == 'ctr' and not sem_verificacao:
+        raise ValueError("O modo ctr não permite conferir a chave antiga; use sem_verificacao=True para reencriptar assim mesmo")
+    if mode != 'gcm':
+        iv = _validar_iv(mode, iv)
+    key_antiga = aes_crypto.expandir_chave(key_antiga)
+    key_nova = aes_crypto.expandir_chave(key_nova)
+    n = os.path.getsize(arquivo)
+    if n < 16 or (mode == 'ecb' and n % 16) or (mode == 'gcm' and n < 12 + aes_modos.TAMANHO_TAG):
+        raise ValueError("Arquivo encriptado truncado")
+
+    with open(arquivo, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m, memoryview(m) as dados:
+        if mode == 'gcm':
+            # O tag antigo só é conferido no fim; até lá a saída fica no temporário
+            def escrever(dst):
+                decriptador = aes_stream.DecriptadorFluxo(key_antiga, 'gcm', engine)
+                encriptador = aes_stream.EncriptadorFluxo(key_nova, 'gcm', iv, engine)
+                for pos in range(0, n, chunk_size):
+                    with dados[pos:pos + chunk_size] as parte:
+                        dst.write(encriptador.atualizar(decriptador.atualizar(parte)))
+                dst.write(encriptador.atualizar(decriptador.finalizar()))
+                dst.write(encriptador.finalizar())
+
+            aes_stream.escrever_atomico(arquivo, escrever)
+            return
+
+        if mode == 'ctr':
+            iv_antigo = bytes(dados[:16])
+
+            def escrever(saida):
+                saida[:16] = iv
+                _aplicar(dados, saida, 16, 16, n - 16, chunk_size,
+                         lambda parte, pos: aes_modos.encrypt_ctr(aes_modos.decrypt_ctr(parte, key_antiga, iv_antigo, pos,
+                                                                                        engine), key_nova, iv, pos, engine))
+        else:
+            aes_crypto.tamanho_preenchimento(aes_crypto.decrypt_blocks(dados[n - 16:], key_antiga, engine))
+
+            def escrever(saida):
+                _aplicar(dados, saida, 0, 0, n, chunk_size,
+                         lambda parte, pos: aes_crypto.encrypt_blocks(aes_crypto.decrypt_blocks(parte, key_antiga, engine),
+                                                                      key_nova, engine))
+
+        _escrever_mapeado(arquivo, n, escrever)
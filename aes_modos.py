@@ -0,0 +1,367 @@
+"""
+Módulo com os modos de operação CTR e GCM construídos sobre a cifra de bloco de aes_crypto.
+
+No modo CTR cada bloco do fluxo de chave depende apenas do seu contador, de
+modo que os blocos podem ser gerados em lote (usando os engines de lote de
+aes_crypto), calculados antes dos dados ou divididos entre vários
+processos, e qualquer posição do texto cifrado pode ser lida diretamente. O
+GCM acrescenta autenticação com GHASH baseado em tabelas de multiplicação de
+8 bits pré-calculadas para cada chave.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-functools é importada para o cache das tabelas do GHASH.
+-hmac é importada para a comparação em tempo constante do tag.
+-aes_crypto fornece a cifra de bloco e os engines de lote.
+
+Variáveis Globais:
+-TAMANHO_TAG: Tamanho do tag de autenticação do GCM, em bytes.
+
+Classes:
+-CifradorGCM(key, iv, aad, engine, decriptar): GCM incremental, para dados recebidos em partes.
+
+Etapas:
+-As classes incrementais (CifradorGCM e os fluxos de aes_stream) oferecem
+ atualizar_em_etapas(data): um gerador que produz o trabalho pesado e sem
+ estado (cifra de blocos, fluxo de chave) como tuplas (função, argumentos)
+ e recebe o resultado de cada uma. O estado (contador, GHASH, iv, buffer)
+ só é alterado pelo gerador, no thread de quem o conduz; assim o trabalho
+ pode ser levado a outro thread ou processo (aes_async) sem perder estado.
+
+Funções Principais:
+-ctr_keystream(key, iv, bloco_inicial, n_blocos, engine, largura_contador): Gera blocos do fluxo de chave do CTR.
+-encrypt_ctr(data, key, iv, offset, engine): Encripta dados no modo CTR a partir de uma posição do fluxo.
+-decrypt_ctr(data, key, iv, offset, engine): Decripta dados no modo CTR a partir de uma posição do fluxo.
+-ghash(h, aad, ciphertext): Calcula o GHASH dos dados adicionais e do texto cifrado.
+-encrypt_gcm(data, key, iv, aad, engine): Encripta e autentica dados no modo GCM.
+-decrypt_gcm(ciphertext, tag, key, iv, aad, engine): Verifica e decripta dados no modo GCM.
+-conduzir(etapas): Executa diretamente um gerador de etapas e retorna o seu resultado.
+
+"""
+
+import functools
+import hmac
+
+import aes_crypto
+
+# Tamanho do tag de autenticação do GCM, em bytes
+TAMANHO_TAG = 16
+
+# Polinômio de redução do GCM (x^128 + x^7 + x^2 + x + 1) na ordem de bits do GHASH
+_R_GCM = 0xe1 << 120
+
+def _xor_bytes(data, keystream):
+    """
+    Aplica XOR entre os dados e o início do fluxo de chave.
+
+    :param data: Dados de entrada
+    :param keystream: Fluxo de chave com pelo menos len(data) bytes
+    :return: Resultado do XOR, com o tamanho de data
+    """
+    n = len(data)
+    if n == 0:
+        return b''
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(keystream[:n], 'big')).to_bytes(n, 'big')
+
+def ctr_keystream(key, iv, bloco_inicial, n_blocos, engine=None, largura_contador=128):
+    """
+    Gera blocos do fluxo de chave do modo CTR.
+
+    O bloco de contador de índice i é o iv somado a i, com o incremento
+    restrito aos largura_contador bits menos significativos. Como cada bloco
+    é independente, qualquer trecho do fluxo pode ser gerado isoladamente.
+
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param iv: Bloco de contador inicial (16 bytes)
+    :param bloco_inicial: Índice do primeiro bloco a gerar
+    :param n_blocos: Quantidade de blocos a gerar
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param largura_contador: Quantidade de bits incrementados (128 no CTR, 32 no GCM)
+    :return: Fluxo de chave com 16 * n_blocos bytes
+    """
+    if len(iv) != 16:
+        raise ValueError("O bloco de contador inicial deve ter 16 bytes")
+    mascara = (1 << largura_contador) - 1
+    base = int.from_bytes(iv, 'big')
+    fixo = base & ~mascara
+    contador = (base + bloco_inicial) & mascara
+    contadores = b''.join([(fixo | ((contador + i) & mascara)).to_bytes(16, 'big') for i in range(n_blocos)])
+    return aes_crypto.encrypt_blocks(contadores, key, engine)
+
+def encrypt_ctr(data, key, iv, offset=0, engine=None):
+    """
+    Encripta dados no modo CTR.
+
+    Dispensa preenchimento: o texto cifrado tem o mesmo tamanho dos dados.
+    Com offset diferente de zero, os dados são tratados como o trecho do
+    fluxo que começa nesse byte, o que permite acesso aleatório.
+
+    :param data: Dados a encriptar
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param iv: Bloco de contador inicial (16 bytes)
+    :param offset: Posição, em bytes, do início dos dados no fluxo
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Dados encriptados
+    """
+    inicio, deslocamento = divmod(offset, 16)
+    n_blocos = (deslocamento + len(data) + 15) // 16
+    keystream = ctr_keystream(key, iv, inicio, n_blocos, engine)
+    return _xor_bytes(data, keystream[deslocamento:])
+
+def decrypt_ctr(data, key, iv, offset=0, engine=None):
+    """
+    Decripta dados no modo CTR (a mesma operação da encriptação).
+
+    :param data: Dados encriptados
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param iv: Bloco de contador inicial (16 bytes)
+    :param offset: Posição, em bytes, do início dos dados no fluxo
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Dados decriptados
+    """
+    return encrypt_ctr(data, key, iv, offset, engine)
+
+@functools.lru_cache(maxsize=256)
+def _tabelas_ghash(h):
+    """
+    Pré-calcula as tabelas de multiplicação por H usadas no GHASH.
+
+    tabelas[j][b] é o produto por H do bloco que tem o byte b na posição j
+    e zeros nas demais. Como a multiplicação é linear, X * H é o XOR das 16
+    entradas correspondentes aos bytes de X.
+
+    :param h: Subchave H do GHASH, como inteiro de 128 bits
+    :return: Lista de 16 tabelas com 256 entradas cada
+    """
+    # potencias[k] = H * x^k, onde x^k é o bloco com apenas o k-ésimo bit (a partir do mais significativo)
+    potencias = [h]
+    for _ in range(127):
+        v = potencias[-1]
+        potencias.append((v >> 1) ^ _R_GCM if v & 1 else v >> 1)
+
+    tabelas = []
+    for j in range(16):
+        tabela = [0] * 256
+        for t in range(8):
+            bit = 0x80 >> t
+            tabela[bit] = potencias[8 * j + t]
+        for b in range(1, 256):
+            menor_bit = b & -b
+            if b != menor_bit:
+                tabela[b] = tabela[b ^ menor_bit] ^ tabela[menor_bit]
+        tabelas.append(tabela)
+    return tabelas
+
+def _ghash_blocos(tabelas, y, data):
+    """
+    Acumula blocos no GHASH a partir de um valor intermediário.
+
+    :param tabelas: Tabelas de multiplicação por H
+    :param y: Valor acumulado até aqui, como inteiro de 128 bits
+    :param data: Dados a acumular (completados com zeros até múltiplo de 16)
+    :return: Novo valor acumulado
+    """
+    if len(data) % 16:
+        data = bytes(data) + bytes(16 - len(data) % 16)
+    t0, t1, t2, t3, t4, t5, t6, t7, t8, t9, t10, t11, t12, t13, t14, t15 = tabelas
+    for i in range(0, len(data), 16):
+        b = (y ^ int.from_bytes(data[i:i + 16], 'big')).to_bytes(16, 'big')
+        y = (t0[b[0]] ^ t1[b[1]] ^ t2[b[2]] ^ t3[b[3]] ^ t4[b[4]] ^ t5[b[5]] ^ t6[b[6]] ^ t7[b[7]] ^
+             t8[b[8]] ^ t9[b[9]] ^ t10[b[10]] ^ t11[b[11]] ^ t12[b[12]] ^ t13[b[13]] ^ t14[b[14]] ^ t15[b[15]])
+    return y
+
+def ghash(h, aad, ciphertext):
+    """
+    Calcula o GHASH dos dados adicionais e do texto cifrado.
+
+    :param h: Subchave H (16 bytes)
+    :param aad: Dados adicionais autenticados
+    :param ciphertext: Texto cifrado
+    :return: Resultado do GHASH (16 bytes)
+    """
+    tabelas = _tabelas_ghash(int.from_bytes(h, 'big'))
+    y = _ghash_blocos(tabelas, 0, aad)
+    y = _ghash_blocos(tabelas, y, ciphertext)
+    comprimentos = (len(aad) * 8).to_bytes(8, 'big') + (len(ciphertext) * 8).to_bytes(8, 'big')
+    return _ghash_blocos(tabelas, y, comprimentos).to_bytes(16, 'big')
+
+def _preparar_gcm(key, iv):
+    """
+    Calcula a subchave H e o bloco de contador J0 do GCM.
+
+    :param key: AESKey
+    :param iv: Vetor de inicialização (12 bytes recomendados)
+    :return: Tupla (H, J0)
+    """
+    h = aes_crypto.encrypt_block(bytes(16), key)
+    if len(iv) == 12:
+        j0 = bytes(iv) + b'\x00\x00\x00\x01'
+    else:
+        j0 = ghash(h, b'', iv)
+    return h, j0
+
+def _gctr(data, key, j0, engine):
+    """
+    Aplica o CTR do GCM (incremento de 32 bits) a partir do bloco seguinte a J0.
+
+    :param data: Dados de entrada
+    :param key: AESKey
+    :param j0: Bloco de contador J0
+    :param engine: Nome do engine de aes_crypto
+    :return: Dados transformados
+    """
+    keystream = ctr_keystream(key, j0, 1, (len(data) + 15) // 16, engine, largura_contador=32)
+    return _xor_bytes(data, keystream)
+
+def encrypt_gcm(data, key, iv, aad=b'', engine=None):
+    """
+    Encripta e autentica dados no modo GCM.
+
+    :param data: Dados a encriptar
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param iv: Vetor de inicialização (12 bytes recomendados; nunca reutilizar com a mesma chave)
+    :param aad: Dados adicionais autenticados, mas não encriptados
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Texto cifrado e tag de autenticação
+    """
+    key = aes_crypto.expandir_chave(key)
+    h, j0 = _preparar_gcm(key, iv)
+    ciphertext = _gctr(data, key, j0, engine)
+    tag = _xor_bytes(ghash(h, aad, ciphertext), aes_crypto.encrypt_block(j0, key))
+    return ciphertext, tag
+
+def decrypt_gcm(ciphertext, tag, key, iv, aad=b'', engine=None):
+    """
+    Verifica o tag e decripta dados no modo GCM.
+
+    :param ciphertext: Texto cifrado
+    :param tag: Tag de autenticação
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param iv: Vetor de inicialização usado na encriptação
+    :param aad: Dados adicionais autenticados
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Dados decriptados
+    :raises ValueError: Se o tag não confere (chave incorreta ou dados corrompidos)
+    """
+    key = aes_crypto.expandir_chave(key)
+    h, j0 = _preparar_gcm(key, iv)
+    esperado = _xor_bytes(ghash(h, aad, ciphertext), aes_crypto.encrypt_block(j0, key))
+    if len(tag) < 12 or not hmac.compare_digest(esperado[:len(tag)], tag):
+        raise ValueError("Tag de autenticação inválido")
+    return _gctr(ciphertext, key, j0, engine)
+
+def conduzir(etapas):
+    """
+    Executa no próprio thread um gerador de etapas (ver atualizar_em_etapas).
+
+    :param etapas: Gerador que produz tuplas (função, argumentos) e recebe o resultado de cada uma
+    :return: Valor retornado pelo gerador
+    """
+    try:
+        funcao, args = next(etapas)
+        while True:
+            funcao, args = etapas.send(funcao(*args))
+    except StopIteration as fim:
+        return fim.value
+
+class CifradorGCM:
+    """
+    Encriptação ou decriptação GCM incremental.
+
+    Recebe os dados em partes de qualquer tamanho, guarda o bloco parcial
+    entre uma chamada e outra e calcula o tag somente em finalizar(), de
+    modo que fluxos grandes podem ser processados com memória constante.
+    """
+
+    def __init__(self, key, iv, aad=b'', engine=None, decriptar=False):
+        """
+        Prepara a subchave H, o contador J0 e o GHASH dos dados adicionais.
+
+        :param key: Chave (bytes ou AESKey)
+        :param iv: Vetor de inicialização (12 bytes recomendados)
+        :param aad: Dados adicionais autenticados
+        :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+        :param decriptar: True para decriptar (o GHASH é feito sobre a entrada)
+        """
+        self._key = aes_crypto.expandir_chave(key)
+        self._engine = engine
+        self._decriptar = decriptar
+        h, self._j0 = _preparar_gcm(self._key, iv)
+        self._tabelas = _tabelas_ghash(int.from_bytes(h, 'big'))
+        self._y = _ghash_blocos(self._tabelas, 0, aad)
+        self._len_aad = len(aad)
+        self._len_dados = 0
+        self._bloco = 1
+        self._pendente = bytearray()
+        self.tag = None
+
+    def _processar_em_etapas(self, data):
+        """
+        Aplica o CTR e acumula o GHASH de uma parte alinhada (ou da parte final).
+
+        Só a geração do fluxo de chave é produzida como etapa; o contador e o
+        GHASH são atualizados aqui.
+
+        :param data: Dados de entrada
+        :return: Gerador de etapas cujo resultado são os dados transformados
+        """
+        n_blocos = (len(data) + 15) // 16
+        bloco = self._bloco
+        self._bloco += n_blocos
+        self._len_dados += len(data)
+        keystream = yield ctr_keystream, (self._key, self._j0, bloco, n_blocos, self._engine, 32)
+        saida = _xor_bytes(data, keystream)
+        self._y = _ghash_blocos(self._tabelas, self._y, data if self._decriptar else saida)
+        return saida
+
+    def atualizar_em_etapas(self, data):
+        """
+        Processa mais uma parte dos dados, produzindo o fluxo de chave como etapa.
+
+        :param data: Parte dos dados de entrada
+        :return: Gerador de etapas cujo resultado é a saída dos blocos completos disponíveis até aqui
+        """
+        self._pendente += data
+        n = len(self._pendente) - len(self._pendente) % 16
+        if not n:
+            return b''
+        parte = bytes(self._pendente[:n])
+        del self._pendente[:n]
+        return (yield from self._processar_em_etapas(parte))
+
+    def atualizar(self, data):
+        """
+        Processa mais uma parte dos dados.
+
+        :param data: Parte dos dados de entrada
+        :return: Saída correspondente aos blocos completos disponíveis até aqui
+        """
+        return conduzir(self.atualizar_em_etapas(data))
+
+    def finalizar(self):
+        """
+        Processa o bloco parcial restante e calcula o tag.
+
+        :return: Saída correspondente ao restante dos dados
+        """
+        saida = conduzir(self._processar_em_etapas(bytes(self._pendente))) if self._pendente else b''
+        self._pendente.clear()
+        comprimentos = (self._len_aad * 8).to_bytes(8, 'big') + (self._len_dados * 8).to_bytes(8, 'big')
+        y = _ghash_blocos(self._tabelas, self._y, comprimentos)
+        self.tag = _xor_bytes(y.to_bytes(16, 'big'), aes_crypto.encrypt_block(self._j0, self._key))
+        return saida
+
+    def verificar(self, tag):
+        """
+        Confere o tag recebido com o calculado em finalizar().
+
+        :param tag: Tag de autenticação recebido
+        :raises ValueError: Se o tag não confere (chave incorreta ou dados corrompidos)
+        """
+        if len(tag) < 12 or not hmac.compare_digest(self.tag[:len(tag)], tag):
+            raise ValueError("Tag de autenticação inválido")
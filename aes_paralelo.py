@@ -0,0 +1,182 @@
+"""
+Módulo para encriptação paralela de entradas grandes em vários processos.
+
+A entrada é copiada uma única vez para um bloco de memória compartilhada
+(multiprocessing.shared_memory) e dividida em segmentos alinhados a 16
+bytes. Cada processo do ProcessPoolExecutor recebe apenas o nome da memória
+compartilhada e os limites do seu segmento, cifra o segmento e escreve o
+resultado na mesma posição de uma segunda memória compartilhada, de modo que
+a saída já fica na ordem correta sem serializar os dados entre processos.
+Abaixo de um limiar de tamanho a operação é feita no próprio processo, para
+não pagar o custo de iniciar o pool.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-os é importada para descobrir a quantidade de núcleos.
+-concurrent.futures e multiprocessing.shared_memory são importadas para o pool de processos e a memória compartilhada.
+-aes_crypto e aes_modos fornecem a cifra de bloco e o modo CTR.
+
+Variáveis Globais:
+-OPERACOES: Operações que podem ser executadas em paralelo.
+-TAMANHO_SEGMENTO_PADRAO: Tamanho padrão de cada segmento enviado aos processos.
+-LIMIAR_PARALELO: Tamanho mínimo da entrada para usar vários processos.
+
+Funções Principais:
+-processar_paralelo(data, key, operacao, iv, workers, chunk_size, limiar, engine, executor): Executa uma operação dividindo a entrada entre processos.
+-encrypt_blocks_paralelo(data, key, ...): Encripta blocos independentes (ECB) em paralelo.
+-decrypt_blocks_paralelo(data, key, ...): Decripta blocos independentes (ECB) em paralelo.
+-encrypt_ctr_paralelo(data, key, iv, ...): Encripta ou decripta no modo CTR em paralelo.
+
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import aes_crypto
+import aes_modos
+
+# Operações que podem ser executadas em paralelo (todas têm blocos independentes)
+OPERACOES = ('encrypt_ecb', 'decrypt_ecb', 'ctr')
+
+# Tamanho padrão de cada segmento enviado aos processos (1 MiB)
+TAMANHO_SEGMENTO_PADRAO = 1 << 20
+
+# Abaixo deste tamanho a operação é feita no próprio processo (4 MiB)
+LIMIAR_PARALELO = 4 << 20
+
+def _executar(data, key, operacao, iv, offset, engine):
+    """
+    Executa a operação sobre um trecho dos dados no processo atual.
+
+    :param data: Trecho dos dados (qualquer objeto com buffer protocol)
+    :param key: Chave (bytes ou AESKey)
+    :param operacao: Nome da operação
+    :param iv: Bloco de contador inicial (apenas no CTR)
+    :param offset: Posição do trecho no fluxo (apenas no CTR)
+    :param engine: Nome do engine de aes_crypto
+    :return: Trecho processado
+    """
+    if operacao == 'encrypt_ecb':
+        return aes_crypto.encrypt_blocks(data, key, engine)
+    if operacao == 'decrypt_ecb':
+        return aes_crypto.decrypt_blocks(data, key, engine)
+    return aes_modos.encrypt_ctr(data, key, iv, offset, engine)
+
+def _processar_segmento(nome_entrada, nome_saida, inicio, fim, key, operacao, iv, engine):
+    """
+    Processa um segmento das memórias compartilhadas (executado nos processos do pool).
+
+    :param nome_entrada: Nome da memória compartilhada com a entrada
+    :param nome_saida: Nome da memória compartilhada que recebe a saída
+    :param inicio: Posição inicial do segmento
+    :param fim: Posição final do segmento
+    :param key: Chave (bytes); a expansão fica no cache LRU do processo
+    :param operacao: Nome da operação
+    :param iv: Bloco de contador inicial (apenas no CTR)
+    :param engine: Nome do engine de aes_crypto
+    """
+    entrada = shared_memory.SharedMemory(name=nome_entrada)
+    saida = shared_memory.SharedMemory(name=nome_saida)
+    try:
+        segmento = entrada.buf[inicio:fim]
+        try:
+            saida.buf[inicio:fim] = _executar(segmento, key, operacao, iv, inicio, engine)
+        finally:
+            segmento.release()
+    finally:
+        entrada.close()
+        saida.close()
+
+def processar_paralelo(data, key, operacao, iv=None, workers=None, chunk_size=TAMANHO_SEGMENTO_PADRAO,
+                       limiar=LIMIAR_PARALELO, engine=None, executor=None):
+    """
+    Executa uma operação de cifra dividindo a entrada entre vários processos.
+
+    :param data: Dados de entrada (múltiplo de 16 bytes no ECB)
+    :param key: Chave (bytes ou AESKey)
+    :param operacao: "encrypt_ecb", "decrypt_ecb" ou "ctr"
+    :param iv: Bloco de contador inicial (obrigatório no CTR)
+    :param workers: Quantidade de processos; None usa a quantidade de núcleos
+    :param chunk_size: Tamanho de cada segmento (arredondado para múltiplo de 16)
+    :param limiar: Tamanho mínimo da entrada para usar vários processos
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :param executor: ProcessPoolExecutor já criado, para reaproveitar entre chamadas
+    :return: Dados processados
+    """
+    if operacao not in OPERACOES:
+        raise ValueError(f"Operação desconhecida: {operacao}")
+    if operacao == 'ctr' and iv is None:
+        raise ValueError("O modo CTR exige o bloco de contador inicial")
+    if operacao != 'ctr' and len(data) % 16:
+        raise ValueError("O tamanho dos dados deve ser múltiplo de 16 bytes")
+
+    workers = workers or os.cpu_count() or 1
+    n = len(data)
+    if n < limiar or (workers == 1 and executor is None):
+        return _executar(data, key, operacao, iv, 0, engine)
+
+    chunk_size = max(16, chunk_size - chunk_size % 16)
+    key = aes_crypto.expandir_chave(key).key
+    entrada = shared_memory.SharedMemory(create=True, size=n)
+    saida = shared_memory.SharedMemory(create=True, size=n)
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    try:
+        entrada.buf[:n] = data
+        futuros = [
+            pool.submit(_processar_segmento, entrada.name, saida.name, inicio, min(inicio + chunk_size, n),
+                        key, operacao, iv, engine)
+            for inicio in range(0, n, chunk_size)
+        ]
+        for futuro in futuros:
+            futuro.result()
+        return bytes(saida.buf[:n])
+    finally:
+        if executor is None:
+            pool.shutdown()
+        entrada.close()
+        entrada.unlink()
+        saida.close()
+        saida.unlink()
+
+def encrypt_blocks_paralelo(data, key, workers=None, chunk_size=TAMANHO_SEGMENTO_PADRAO,
+                            limiar=LIMIAR_PARALELO, engine=None, executor=None):
+    """
+    Encripta blocos independentes (modo ECB) em vários processos.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :return: Blocos cifrados
+    """
+    return processar_paralelo(data, key, 'encrypt_ecb', None, workers, chunk_size, limiar, engine, executor)
+
+def decrypt_blocks_paralelo(data, key, workers=None, chunk_size=TAMANHO_SEGMENTO_PADRAO,
+                            limiar=LIMIAR_PARALELO, engine=None, executor=None):
+    """
+    Decripta blocos independentes (modo ECB) em vários processos.
+
+    :param data: Dados com tamanho múltiplo de 16 bytes
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :return: Blocos decriptados
+    """
+    return processar_paralelo(data, key, 'decrypt_ecb', None, workers, chunk_size, limiar, engine, executor)
+
+def encrypt_ctr_paralelo(data, key, iv, workers=None, chunk_size=TAMANHO_SEGMENTO_PADRAO,
+                         limiar=LIMIAR_PARALELO, engine=None, executor=None):
+    """
+    Encripta ou decripta dados no modo CTR em vários processos.
+
+    Cada segmento gera apenas o trecho do fluxo de chave correspondente à
+    sua posição, então o resultado é idêntico ao de aes_modos.encrypt_ctr.
+
+    :param data: Dados de entrada
+    :param key: Chave (bytes ou AESKey)
+    :param iv: Bloco de contador inicial (16 bytes)
+    :return: Dados processados
+    """
+    return processar_paralelo(data, key, 'ctr', iv, workers, chunk_size, limiar, engine, executor)
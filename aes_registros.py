@@ -0,0 +1,516 @@
+"""
+Módulo com um armazenamento de registros encriptados, só de acréscimo, com busca direta por identificador.
+
+Guardar cada mensagem pequena em um arquivo próprio (como em
+aes_crypto.salvar_mensagem_encriptada) não escala para milhões de
+registros. Aqui os registros são encriptados individualmente com GCM
+(nonce aleatório e tag próprios, como em aesComLib.encriptar_mensagem) e
+acrescentados a arquivos de segmento. Um índice em disco, com uma entrada
+de tamanho fixo por registro, localiza qualquer registro com uma única
+leitura, e o identificador do registro é autenticado junto com ele.
+
+As entradas do índice só são gravadas depois que os segmentos foram
+sincronizados com fsync, feito em lotes de registros; na abertura os
+registros do último segmento gravados depois da última entrada do índice
+são conferidos (tag GCM) e recuperados, e o que vier depois do primeiro
+registro inválido é descartado. Os dados já indexados nunca são
+truncados: se o segmento for menor do que o índice indica, a abertura falha.
+Registros removidos ficam marcados no índice e o espaço é liberado por
+compactar(), que registra o início da compactação em um arquivo de
+marcação para que uma interrupção seja concluída ou desfeita na abertura.
+
+Estrutura do diretório:
+-segmento-NNNNNN.log: magic e versão, seguidos dos registros (identificador, tamanho,
+ nonce, texto cifrado e tag).
+-indice.idx: magic e versão, seguidos de uma entrada (segmento, posição, tamanho) por identificador.
+ O segmento 0 indica um registro removido.
+-compactacao: existe só durante compactar(); guarda o número do primeiro segmento novo.
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-os, re, struct e threading são importadas para os arquivos, o índice e a trava.
+-aes_crypto e aes_modos fornecem a expansão da chave e o modo GCM.
+-aes_stream fornece a gravação atômica do índice compactado e da marcação de compactação.
+
+Variáveis Globais:
+-MAGIC_SEGMENTO / MAGIC_INDICE / VERSAO: Identificadores e versão dos arquivos.
+-TAMANHO_SEGMENTO_PADRAO: Tamanho a partir do qual um novo segmento é iniciado.
+-FSYNC_LOTE_PADRAO: Quantidade de registros acrescentados entre duas sincronizações.
+-LEITURA_ANTECIPADA_PADRAO: Quantidade de bytes lidos de uma vez na leitura sequencial.
+
+Classes:
+-LogRegistros(diretorio, key, tamanho_segmento, fsync_lote, engine): Armazenamento de registros encriptados.
+
+"""
+
+import os
+import re
+import struct
+import threading
+
+import aes_crypto
+import aes_modos
+import aes_stream
+
+# Identificadores e versão dos arquivos de segmento e de índice
+MAGIC_SEGMENTO = b'AESR'
+MAGIC_INDICE = b'AESI'
+VERSAO = 1
+
+# Tamanho a partir do qual um novo segmento é iniciado (64 MiB)
+TAMANHO_SEGMENTO_PADRAO = 64 * 1024 * 1024
+
+# Quantidade de registros acrescentados entre duas sincronizações com o disco
+FSYNC_LOTE_PADRAO = 256
+
+# Quantidade de bytes lidos de uma vez na leitura sequencial (1 MiB)
+LEITURA_ANTECIPADA_PADRAO = 1024 * 1024
+
+# Cabeçalho dos arquivos: magic e versão, completados até 16 bytes
+_FORMATO_ARQUIVO = '>4sB11x'
+_TAMANHO_ARQUIVO = struct.calcsize(_FORMATO_ARQUIVO)
+# Cabeçalho de um registro: identificador e tamanho do texto cifrado
+_FORMATO_REGISTRO = '>QI'
+_TAMANHO_REGISTRO = struct.calcsize(_FORMATO_REGISTRO)
+# Entrada do índice: segmento, posição e tamanho total do registro
+_FORMATO_ENTRADA = '>IQI'
+_TAMANHO_ENTRADA = struct.calcsize(_FORMATO_ENTRADA)
+_ENTRADA_REMOVIDA = bytes(_TAMANHO_ENTRADA)
+# Entradas do índice lidas de uma vez na leitura sequencial
+_ENTRADAS_POR_LEITURA = 4096
+
+_NOME_SEGMENTO = re.compile(r'segmento-(\d{6})\.log$')
+# Temporários de aes_stream.escrever_atomico deixados por uma interrupção
+_NOME_TEMPORARIO = re.compile(r'\.(indice\.idx|compactacao)\..*\.tmp$')
+# Arquivo de marcação de uma compactação em andamento
+_NOME_COMPACTACAO = 'compactacao'
+
+class LogRegistros:
+    """
+    Armazenamento de registros encriptados, só de acréscimo, com índice em disco.
+
+    Os identificadores são números sequenciais atribuídos por append(). As
+    operações são protegidas por uma trava, de modo que uma instância pode
+    ser compartilhada entre threads; o diretório deve ser aberto por uma
+    única instância de cada vez.
+    """
+
+    def __init__(self, diretorio, key, tamanho_segmento=TAMANHO_SEGMENTO_PADRAO, fsync_lote=FSYNC_LOTE_PADRAO,
+                 engine=None):
+        """
+        Abre (ou cria) o armazenamento e recupera registros que não chegaram ao índice.
+
+        :param diretorio: Diretório dos segmentos e do índice
+        :param key: Chave de encriptação (bytes ou AESKey)
+        :param tamanho_segmento: Tamanho a partir do qual um novo segmento é iniciado
+        :param fsync_lote: Quantidade de registros acrescentados entre duas sincronizações
+        :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+        :raises ValueError: Se os arquivos forem inválidos ou o índice apontar para dados que não existem mais
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.tamanho_segmento = tamanho_segmento
+        self.fsync_lote = max(1, fsync_lote)
+        self._key = aes_crypto.expandir_chave(key)
+        self._engine = engine
+        self._trava = threading.RLock()
+        self._leitores = {}
+        self._pendentes = bytearray()
+        self._indice_alterado = False
+        self._indice = self._abrir_arquivo(os.path.join(diretorio, 'indice.idx'), MAGIC_INDICE)
+        tamanho_indice = self._indice.seek(0, os.SEEK_END) - _TAMANHO_ARQUIVO
+        self._gravados = tamanho_indice // _TAMANHO_ENTRADA
+        if tamanho_indice % _TAMANHO_ENTRADA:
+            self._indice.truncate(_TAMANHO_ARQUIVO + self._gravados * _TAMANHO_ENTRADA)
+        self._concluir_compactacao()
+        self._segmento = max(self._segmentos(), default=1)
+        self._escrita = self._abrir_arquivo(self._caminho_segmento(self._segmento), MAGIC_SEGMENTO)
+        try:
+            self._recuperar()
+        except ValueError:
+            self._escrita.close()
+            self._indice.close()
+            raise
+
+    def _caminho_segmento(self, segmento):
+        """
+        :param segmento: Número do segmento
+        :return: Caminho do arquivo do segmento
+        """
+        return os.path.join(self.diretorio, f'segmento-{segmento:06d}.log')
+
+    def _segmentos(self):
+        """
+        :return: Números dos segmentos existentes no diretório, em ordem
+        """
+        return sorted(int(m.group(1)) for m in map(_NOME_SEGMENTO.match, os.listdir(self.diretorio)) if m)
+
+    @staticmethod
+    def _abrir_arquivo(caminho, magic):
+        """
+        Abre um arquivo para leitura e escrita, criando-o com o cabeçalho se não existir.
+
+        :param caminho: Caminho do arquivo
+        :param magic: Magic esperado no cabeçalho
+        :return: Arquivo aberto
+        :raises ValueError: Se o arquivo existir com outro cabeçalho
+        """
+        try:
+            arquivo = open(caminho, 'r+b')
+        except FileNotFoundError:
+            arquivo = open(caminho, 'w+b')
+            arquivo.write(struct.pack(_FORMATO_ARQUIVO, magic, VERSAO))
+            return arquivo
+        cabecalho = arquivo.read(_TAMANHO_ARQUIVO)
+        if len(cabecalho) < _TAMANHO_ARQUIVO or struct.unpack(_FORMATO_ARQUIVO, cabecalho) != (magic, VERSAO):
+            arquivo.close()
+            raise ValueError(f"Arquivo de registros inválido ou de versão não suportada: {caminho}")
+        return arquivo
+
+    def _concluir_compactacao(self):
+        """
+        Conclui ou desfaz uma compactação interrompida e apaga temporários deixados para trás.
+
+        Se o índice já aponta para os segmentos novos, a troca do índice
+        aconteceu e só falta apagar os segmentos antigos; caso contrário os
+        segmentos novos são órfãos e são apagados.
+        """
+        for nome in os.listdir(self.diretorio):
+            if _NOME_TEMPORARIO.match(nome):
+                os.remove(os.path.join(self.diretorio, nome))
+        marcacao = os.path.join(self.diretorio, _NOME_COMPACTACAO)
+        try:
+            with open(marcacao, 'rb') as f:
+                primeiro_novo, = struct.unpack('>I', f.read())
+        except FileNotFoundError:
+            return
+        self._indice.seek(_TAMANHO_ARQUIVO)
+        entradas = self._indice.read(self._gravados * _TAMANHO_ENTRADA)
+        trocado = any(segmento >= primeiro_novo for segmento, _, _ in struct.iter_unpack(_FORMATO_ENTRADA, entradas))
+        for segmento in self._segmentos():
+            if (segmento < primeiro_novo) == trocado:
+                os.remove(self._caminho_segmento(segmento))
+        os.remove(marcacao)
+
+    def _fim_indexado(self):
+        """
+        Retorna a posição, no segmento atual, logo depois do último registro presente no índice.
+
+        :return: Posição no segmento atual (o início dos registros se nenhum registro indexado estiver nele)
+        :raises ValueError: Se o índice apontar para um segmento posterior ao atual
+        """
+        for record_id in range(self._gravados - 1, -1, -1):
+            segmento, posicao, tamanho = self._entrada(record_id)
+            if segmento > self._segmento:
+                raise ValueError(f"O índice aponta para o segmento inexistente {segmento}")
+            if segmento == self._segmento:
+                return posicao + tamanho
+            if segmento != 0:
+                break
+        return _TAMANHO_ARQUIVO
+
+    def _recuperar(self):
+        """
+        Indexa os registros do segmento atual gravados depois da última entrada do índice.
+
+        A varredura começa depois do último registro indexado, então um
+        registro corrompido entre os já indexados não afeta os demais (get()
+        o rejeita pelo tag). Depois desse ponto, cada registro só é indexado
+        se o identificador for o próximo e o tag conferir; um registro
+        incompleto ou inválido (escrita interrompida) é descartado com tudo o que vem depois.
+
+        :raises ValueError: Se o segmento atual terminar antes do último registro indexado
+        """
+        tamanho = self._escrita.seek(0, os.SEEK_END)
+        posicao = self._fim_indexado()
+        if posicao > tamanho:
+            raise ValueError(f"Segmento {self._segmento} menor do que o índice: registros indexados foram perdidos")
+        while posicao + _TAMANHO_REGISTRO <= tamanho:
+            self._escrita.seek(posicao)
+            record_id, n = struct.unpack(_FORMATO_REGISTRO, self._escrita.read(_TAMANHO_REGISTRO))
+            total = _TAMANHO_REGISTRO + 12 + n + aes_modos.TAMANHO_TAG
+            if posicao + total > tamanho:
+                break
+            if record_id == len(self):
+                self._escrita.seek(posicao)
+                try:
+                    self._decriptar(record_id, self._escrita.read(total))
+                except ValueError:
+                    break
+                self._pendentes += struct.pack(_FORMATO_ENTRADA, self._segmento, posicao, total)
+            elif record_id >= len(self) or self._entrada(record_id)[0] != 0:
+                # só registros já removidos do índice podem aparecer aqui
+                break
+            posicao += total
+        if posicao < tamanho:
+            self._escrita.truncate(posicao)
+        self._escrita.seek(posicao)
+        self.flush()
+
+    def __len__(self):
+        """
+        :return: Quantidade de identificadores atribuídos (incluindo registros removidos)
+        """
+        return self._gravados + len(self._pendentes) // _TAMANHO_ENTRADA
+
+    def _escrever(self, registro):
+        """
+        Acrescenta os bytes de um registro ao segmento atual, iniciando outro se ele estiver cheio.
+
+        :param registro: Registro completo (cabeçalho, nonce, texto cifrado e tag)
+        :return: Entrada do índice do registro
+        """
+        posicao = self._escrita.tell()
+        if posicao > _TAMANHO_ARQUIVO and posicao + len(registro) > self.tamanho_segmento:
+            self.flush()
+            self._escrita.close()
+            self._segmento += 1
+            self._escrita = self._abrir_arquivo(self._caminho_segmento(self._segmento), MAGIC_SEGMENTO)
+            posicao = self._escrita.tell()
+        self._escrita.write(registro)
+        return struct.pack(_FORMATO_ENTRADA, self._segmento, posicao, len(registro))
+
+    def append(self, data):
+        """
+        Encripta um registro e o acrescenta ao segmento atual.
+
+        :param data: Conteúdo do registro (bytes ou str, codificada em UTF-8)
+        :return: Identificador do registro
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self._trava:
+            record_id = len(self)
+            nonce = os.urandom(12)
+            ciphertext, tag = aes_modos.encrypt_gcm(data, self._key, nonce, struct.pack('>Q', record_id), self._engine)
+            self._pendentes += self._escrever(struct.pack(_FORMATO_REGISTRO, record_id, len(ciphertext)) + nonce
+                                              + ciphertext + tag)
+            if len(self._pendentes) >= self.fsync_lote * _TAMANHO_ENTRADA:
+                self.flush()
+            return record_id
+
+    def extend(self, registros):
+        """
+        Acrescenta vários registros.
+
+        :param registros: Iterável de conteúdos (bytes ou str)
+        :return: Lista dos identificadores atribuídos
+        """
+        return [self.append(data) for data in registros]
+
+    def flush(self):
+        """
+        Sincroniza o segmento atual com o disco e então grava e sincroniza as entradas pendentes do índice.
+        """
+        with self._trava:
+            self._escrita.flush()
+            os.fsync(self._escrita.fileno())
+            if self._pendentes:
+                self._indice.seek(_TAMANHO_ARQUIVO + self._gravados * _TAMANHO_ENTRADA)
+                self._indice.write(self._pendentes)
+                self._gravados += len(self._pendentes) // _TAMANHO_ENTRADA
+                self._pendentes.clear()
+                self._indice_alterado = True
+            if self._indice_alterado:
+                self._indice.flush()
+                os.fsync(self._indice.fileno())
+                self._indice_alterado = False
+
+    def _entrada(self, record_id):
+        """
+        Lê a entrada do índice de um registro.
+
+        :param record_id: Identificador do registro
+        :return: Tupla (segmento, posição, tamanho); segmento 0 indica registro removido
+        :raises ValueError: Se o identificador não existir
+        """
+        if not 0 <= record_id < len(self):
+            raise ValueError(f"Registro inexistente: {record_id}")
+        if record_id >= self._gravados:
+            inicio = (record_id - self._gravados) * _TAMANHO_ENTRADA
+            self._escrita.flush()
+            return struct.unpack_from(_FORMATO_ENTRADA, self._pendentes, inicio)
+        self._indice.seek(_TAMANHO_ARQUIVO + record_id * _TAMANHO_ENTRADA)
+        return struct.unpack(_FORMATO_ENTRADA, self._indice.read(_TAMANHO_ENTRADA))
+
+    def _leitor(self, segmento):
+        """
+        :param segmento: Número do segmento
+        :return: Arquivo do segmento aberto para leitura (mantido aberto para as próximas leituras)
+        """
+        leitor = self._leitores.get(segmento)
+        if leitor is None:
+            leitor = self._leitores[segmento] = open(self._caminho_segmento(segmento), 'rb')
+        return leitor
+
+    def _decriptar(self, record_id, registro):
+        """
+        Confere e decripta os bytes de um registro.
+
+        :param record_id: Identificador esperado
+        :param registro: Registro completo lido do segmento
+        :return: Conteúdo do registro
+        :raises ValueError: Se o registro estiver corrompido ou não for o esperado
+        """
+        gravado, n = struct.unpack_from(_FORMATO_REGISTRO, registro)
+        if gravado != record_id or len(registro) != _TAMANHO_REGISTRO + 12 + n + aes_modos.TAMANHO_TAG:
+            raise ValueError(f"Registro {record_id} corrompido")
+        inicio = _TAMANHO_REGISTRO + 12
+        try:
+            return aes_modos.decrypt_gcm(bytes(registro[inicio:inicio + n]), bytes(registro[inicio + n:]), self._key,
+                                         bytes(registro[_TAMANHO_REGISTRO:inicio]), struct.pack('>Q', record_id),
+                                         self._engine)
+        except ValueError:
+            raise ValueError(f"Registro {record_id} corrompido") from None
+
+    def get(self, record_id):
+        """
+        Lê e decripta um registro pelo identificador (uma leitura do índice e uma do segmento).
+
+        :param record_id: Identificador do registro
+        :return: Conteúdo do registro (bytes)
+        :raises ValueError: Se o registro não existir, tiver sido removido ou estiver corrompido
+        """
+        with self._trava:
+            segmento, posicao, tamanho = self._entrada(record_id)
+            if segmento == 0:
+                raise ValueError(f"Registro removido: {record_id}")
+            leitor = self._leitor(segmento)
+            leitor.seek(posicao)
+            registro = leitor.read(tamanho)
+        return self._decriptar(record_id, registro)
+
+    def delete(self, record_id):
+        """
+        Marca um registro como removido; o espaço é liberado na próxima compactação.
+
+        :param record_id: Identificador do registro
+        :raises ValueError: Se o identificador não existir
+        """
+        with self._trava:
+            self._entrada(record_id)
+            if record_id >= self._gravados:
+                inicio = (record_id - self._gravados) * _TAMANHO_ENTRADA
+                self._pendentes[inicio:inicio + _TAMANHO_ENTRADA] = _ENTRADA_REMOVIDA
+            else:
+                self._indice.seek(_TAMANHO_ARQUIVO + record_id * _TAMANHO_ENTRADA)
+                self._indice.write(_ENTRADA_REMOVIDA)
+                self._indice_alterado = True
+
+    def iterar(self, inicio=0, leitura_antecipada=LEITURA_ANTECIPADA_PADRAO):
+        """
+        Percorre os registros em ordem de identificador, decriptando-os em sequência.
+
+        Como os registros são gravados em ordem, o índice e os segmentos são
+        lidos em blocos grandes e cada registro é fatiado do bloco já lido.
+        Registros removidos são pulados; registros acrescentados durante a
+        iteração não são incluídos.
+
+        :param inicio: Primeiro identificador
+        :param leitura_antecipada: Quantidade de bytes lidos de uma vez de cada segmento
+        :return: Gerador de tuplas (identificador, conteúdo)
+        """
+        self.flush()
+        fim = len(self)
+        buffer, buffer_segmento, buffer_inicio = memoryview(b''), None, 0
+        for bloco in range(inicio, fim, _ENTRADAS_POR_LEITURA):
+            with self._trava:
+                self._indice.seek(_TAMANHO_ARQUIVO + bloco * _TAMANHO_ENTRADA)
+                entradas = self._indice.read(min(_ENTRADAS_POR_LEITURA, fim - bloco) * _TAMANHO_ENTRADA)
+            for i, (segmento, posicao, tamanho) in enumerate(struct.iter_unpack(_FORMATO_ENTRADA, entradas)):
+                if segmento == 0:
+                    continue
+                if (segmento != buffer_segmento or posicao < buffer_inicio
+                        or posicao + tamanho > buffer_inicio + len(buffer)):
+                    with self._trava:
+                        leitor = self._leitor(segmento)
+                        leitor.seek(posicao)
+                        buffer = memoryview(leitor.read(max(leitura_antecipada, tamanho)))
+                    buffer_segmento, buffer_inicio = segmento, posicao
+                deslocamento = posicao - buffer_inicio
+                yield bloco + i, self._decriptar(bloco + i, buffer[deslocamento:deslocamento + tamanho])
+
+    def __iter__(self):
+        """
+        :return: Gerador de tuplas (identificador, conteúdo) de todos os registros
+        """
+        return self.iterar()
+
+    def compactar(self):
+        """
+        Regrava os registros não removidos em novos segmentos e apaga os antigos.
+
+        Os registros são copiados ainda encriptados (o identificador
+        autenticado não depende da posição). O novo índice substitui o
+        antigo com rename antes que os segmentos antigos sejam apagados, de
+        modo que uma interrupção deixa sempre um índice consistente; o
+        arquivo de marcação permite que a abertura seguinte apague os
+        segmentos que sobraram (os novos, se o índice não foi trocado, ou os antigos).
+
+        :return: Quantidade de bytes liberados
+        """
+        with self._trava:
+            self.flush()
+            antigos = self._segmentos()
+            primeiro_novo = self._segmento + 1 if self._escrita.tell() > _TAMANHO_ARQUIVO else self._segmento
+            aes_stream.escrever_atomico(os.path.join(self.diretorio, _NOME_COMPACTACAO),
+                                        lambda f: f.write(struct.pack('>I', primeiro_novo)))
+            if primeiro_novo > self._segmento:
+                self._escrita.close()
+                self._segmento = primeiro_novo
+                self._escrita = self._abrir_arquivo(self._caminho_segmento(self._segmento), MAGIC_SEGMENTO)
+            else:
+                antigos.remove(self._segmento)
+            tamanho_antes = sum(os.path.getsize(self._caminho_segmento(s)) for s in antigos)
+
+            novo_indice = bytearray()
+            self._indice.seek(_TAMANHO_ARQUIVO)
+            for segmento, posicao, tamanho in struct.iter_unpack(_FORMATO_ENTRADA, self._indice.read()):
+                if segmento == 0:
+                    novo_indice += _ENTRADA_REMOVIDA
+                    continue
+                leitor = self._leitor(segmento)
+                leitor.seek(posicao)
+                novo_indice += self._escrever(leitor.read(tamanho))
+            self._escrita.flush()
+            os.fsync(self._escrita.fileno())
+
+            self._indice.close()
+            aes_stream.escrever_atomico(os.path.join(self.diretorio, 'indice.idx'),
+                                        lambda f: f.write(struct.pack(_FORMATO_ARQUIVO, MAGIC_INDICE, VERSAO) + novo_indice))
+            self._indice = self._abrir_arquivo(os.path.join(self.diretorio, 'indice.idx'), MAGIC_INDICE)
+
+            for segmento in antigos:
+                leitor = self._leitores.pop(segmento, None)
+                if leitor is not None:
+                    leitor.close()
+                os.remove(self._caminho_segmento(segmento))
+            os.remove(os.path.join(self.diretorio, _NOME_COMPACTACAO))
+            tamanho_depois = sum(os.path.getsize(self._caminho_segmento(s))
+                                 for s in range(primeiro_novo, self._segmento + 1))
+            return tamanho_antes - tamanho_depois
+
+    def close(self):
+        """
+        Sincroniza as pendências e fecha os arquivos.
+        """
+        with self._trava:
+            if self._escrita.closed:
+                return
+            self.flush()
+            self._escrita.close()
+            self._indice.close()
+            for leitor in self._leitores.values():
+                leitor.close()
+            self._leitores.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
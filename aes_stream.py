@@ -0,0 +1,451 @@
+"""
+Módulo para encriptação e decriptação em fluxo, com memória constante.
+
+Em vez de ler o arquivo inteiro e montar a lista de todos os blocos, os dados
+são processados em partes de tamanho fixo: os blocos completos de cada parte
+são cifrados imediatamente e o bloco parcial é guardado para a parte seguinte.
+O preenchimento (ECB) ou o tag de autenticação (GCM) só aparecem no final.
+Funciona com qualquer objeto com read()/write() em modo binário: arquivos,
+pipes (sys.stdin.buffer) e sockets (socket.makefile('rb') / makefile('wb')).
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-os é importada para gerar vetores de inicialização aleatórios e trocar o arquivo temporário pelo destino.
+-tempfile é importada para criar o arquivo temporário com nome único ao lado do destino.
+-aes_crypto e aes_modos fornecem a cifra de bloco e os modos CTR e GCM.
+
+Formatos:
+-"ecb": blocos cifrados com preenchimento no final (o mesmo formato de aes_crypto.encrypt).
+-"ctr": iv (16 bytes) seguido do texto cifrado, sem autenticação.
+-"gcm": iv (12 bytes), texto cifrado e tag (16 bytes) no final.
+
+Variáveis Globais:
+-MODOS: Modos de operação suportados.
+-MODO_PADRAO: Modo usado quando nenhum é especificado.
+-TAMANHO_CHUNK_PADRAO: Tamanho padrão das partes lidas da entrada.
+
+Classes:
+-EncriptadorFluxo(key, mode, iv, engine): Encriptação em fluxo que recebe os dados em partes.
+-DecriptadorFluxo(key, mode, engine): Decriptação em fluxo que recebe os dados em partes.
+
+Funções Principais:
+-ler_chunks(src, chunk_size): Lê um objeto de arquivo em partes.
+-escrever_atomico(destino, escrever): Grava um arquivo por meio de um temporário, trocado pelo destino só no sucesso.
+-encrypt_iter(chunks, key, mode, iv, engine): Gerador que encripta partes de dados.
+-decrypt_iter(chunks, key, mode, engine): Gerador que decripta partes de dados.
+-encrypt_stream(src, dst, key, chunk_size, mode, iv, engine): Encripta de um objeto de arquivo para outro.
+-decrypt_stream(src, dst, key, chunk_size, mode, engine): Decripta de um objeto de arquivo para outro.
+-encrypt_file(origem, destino, key, chunk_size, mode, engine): Encripta um arquivo em disco.
+-decrypt_file(origem, destino, key, chunk_size, mode, engine): Decripta um arquivo em disco.
+
+"""
+
+import os
+import tempfile
+
+import aes_crypto
+import aes_modos
+
+# Modos de operação suportados
+MODOS = ('ecb', 'ctr', 'gcm')
+
+# Modo usado quando nenhum é especificado
+MODO_PADRAO = 'gcm'
+
+# Tamanho padrão das partes lidas da entrada (1 MiB)
+TAMANHO_CHUNK_PADRAO = 1 << 20
+
+# Tamanho do iv gravado no início do fluxo em cada modo
+_TAMANHO_IV = {'ecb': 0, 'ctr': 16, 'gcm': 12}
+
+def _validar_modo(mode):
+    """
+    Confere se o modo de operação é suportado.
+
+    :param mode: Nome do modo
+    """
+    if mode not in MODOS:
+        raise ValueError(f"Modo desconhecido: {mode}")
+
+def _separar_blocos(pendente, reservar=0):
+    """
+    Retira do buffer os blocos completos, mantendo ao menos `reservar` bytes.
+
+    :param pendente: bytearray com os dados ainda não processados
+    :param reservar: Quantidade de bytes que deve permanecer no buffer
+    :return: Blocos completos retirados do buffer
+    """
+    n = len(pendente) - reservar
+    n -= n % 16
+    if n <= 0:
+        return b''
+    parte = bytes(pendente[:n])
+    del pendente[:n]
+    return parte
+
+def ler_chunks(src, chunk_size=TAMANHO_CHUNK_PADRAO):
+    """
+    Lê um objeto de arquivo em partes de até chunk_size bytes.
+
+    :param src: Objeto com read() em modo binário
+    :param chunk_size: Tamanho máximo de cada parte
+    :return: Gerador das partes lidas
+    """
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+class EncriptadorFluxo:
+    """
+    Encriptação em fluxo que recebe os dados em partes (interface de empurrar).
+
+    Cada chamada a atualizar() devolve a saída já disponível; finalizar()
+    devolve o restante, com o preenchimento ou o tag. É a base dos geradores
+    deste módulo e das funções assíncronas de aes_async.
+    """
+
+    def __init__(self, key, mode=MODO_PADRAO, iv=None, engine=None):
+        """
+        :param key: Chave de encriptação (bytes ou AESKey)
+        :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+        :param iv: Vetor de inicialização (16 bytes no CTR, 12 no GCM, nenhum no ECB); None gera um aleatório
+        :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+        :raises ValueError: Se o modo for desconhecido ou o iv não tiver o tamanho do modo
+        """
+        _validar_modo(mode)
+        if iv is None:
+            iv = os.urandom(_TAMANHO_IV[mode])
+        elif len(iv) != _TAMANHO_IV[mode]:
+            raise ValueError(f"O iv do modo {mode} deve ter {_TAMANHO_IV[mode]} bytes, e não {len(iv)}")
+        self._key = aes_crypto.expandir_chave(key)
+        self._mode = mode
+        self._engine = engine
+        self._iv = bytes(iv)
+        # O iv é escrito no início do fluxo, junto com a primeira saída
+        self._cabecalho = self._iv
+        self._pendente = bytearray()
+        self._offset = 0
+        if mode == 'gcm':
+            self._cifrador = aes_modos.CifradorGCM(self._key, self._iv, engine=engine)
+
+    def _com_cabecalho(self, saida):
+        """
+        Acrescenta o cabeçalho ainda não escrito à saída.
+
+        :param saida: Saída calculada
+        :return: Saída precedida do cabeçalho pendente
+        """
+        if self._cabecalho:
+            saida = self._cabecalho + saida
+            self._cabecalho = b''
+        return saida
+
+    def atualizar_em_etapas(self, data):
+        """
+        Encripta mais uma parte dos dados, produzindo a cifra como etapa sem estado.
+
+        O buffer, a posição do CTR e o estado do GCM são atualizados aqui; as
+        etapas recebem apenas a chave, os blocos e a posição (ver
+        aes_modos.conduzir).
+
+        :param data: Parte dos dados (qualquer tamanho)
+        :return: Gerador de etapas cujo resultado é a saída disponível até aqui
+        """
+        if self._mode == 'ecb':
+            self._pendente += data
+            parte = _separar_blocos(self._pendente)
+            saida = (yield aes_crypto.encrypt_blocks, (parte, self._key, self._engine)) if parte else b''
+        elif self._mode == 'ctr':
+            offset = self._offset
+            self._offset += len(data)
+            saida = yield aes_modos.encrypt_ctr, (data, self._key, self._iv, offset, self._engine)
+        else:
+            saida = yield from self._cifrador.atualizar_em_etapas(data)
+        return self._com_cabecalho(saida)
+
+    def atualizar(self, data):
+        """
+        Encripta mais uma parte dos dados.
+
+        :param data: Parte dos dados (qualquer tamanho)
+        :return: Saída disponível até aqui (pode ser vazia)
+        """
+        return aes_modos.conduzir(self.atualizar_em_etapas(data))
+
+    def finalizar(self):
+        """
+        Encerra o fluxo.
+
+        :return: Saída restante, com o preenchimento (ECB) ou o tag (GCM)
+        """
+        if self._mode == 'ecb':
+            saida = aes_crypto.encrypt_bytes(self._pendente, self._key, self._engine)
+            self._pendente.clear()
+        elif self._mode == 'ctr':
+            saida = b''
+        else:
+            saida = self._cifrador.finalizar() + self._cifrador.tag
+        return self._com_cabecalho(saida)
+
+class DecriptadorFluxo:
+    """
+    Decriptação em fluxo que recebe os dados em partes (interface de empurrar).
+
+    No ECB o último bloco e no GCM os últimos 16 bytes (o tag) ficam retidos
+    até finalizar(). No GCM o texto decriptado é entregue antes da
+    verificação do tag, que só é possível no final; se finalizar() lançar
+    ValueError, a saída já produzida deve ser descartada.
+    """
+
+    def __init__(self, key, mode=MODO_PADRAO, engine=None):
+        """
+        :param key: Chave de decriptação (bytes ou AESKey)
+        :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+        :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+        """
+        _validar_modo(mode)
+        self._key = aes_crypto.expandir_chave(key)
+        self._mode = mode
+        self._engine = engine
+        self._iv = None
+        self._pendente = bytearray()
+        self._offset = 0
+        self._cifrador = None
+
+    def atualizar_em_etapas(self, data):
+        """
+        Decripta mais uma parte dos dados, produzindo a cifra como etapa sem estado.
+
+        :param data: Parte dos dados cifrados (qualquer tamanho)
+        :return: Gerador de etapas cujo resultado é a saída disponível até aqui
+        """
+        self._pendente += data
+        if self._iv is None and self._mode != 'ecb':
+            tamanho_iv = _TAMANHO_IV[self._mode]
+            if len(self._pendente) < tamanho_iv:
+                return b''
+            self._iv = bytes(self._pendente[:tamanho_iv])
+            del self._pendente[:tamanho_iv]
+            if self._mode == 'gcm':
+                self._cifrador = aes_modos.CifradorGCM(self._key, self._iv, engine=self._engine, decriptar=True)
+
+        if self._mode == 'ecb':
+            parte = _separar_blocos(self._pendente, reservar=16)
+            return (yield aes_crypto.decrypt_blocks, (parte, self._key, self._engine)) if parte else b''
+        if self._mode == 'ctr':
+            parte = bytes(self._pendente)
+            self._pendente.clear()
+            offset = self._offset
+            self._offset += len(parte)
+            return (yield aes_modos.decrypt_ctr, (parte, self._key, self._iv, offset, self._engine))
+        n = len(self._pendente) - aes_modos.TAMANHO_TAG
+        if n <= 0:
+            return b''
+        parte = bytes(self._pendente[:n])
+        del self._pendente[:n]
+        return (yield from self._cifrador.atualizar_em_etapas(parte))
+
+    def atualizar(self, data):
+        """
+        Decripta mais uma parte dos dados.
+
+        :param data: Parte dos dados cifrados (qualquer tamanho)
+        :return: Saída disponível até aqui (pode ser vazia)
+        """
+        return aes_modos.conduzir(self.atualizar_em_etapas(data))
+
+    def finalizar(self):
+        """
+        Encerra o fluxo, removendo o preenchimento ou verificando o tag.
+
+        :return: Saída restante
+        :raises ValueError: Se o fluxo estiver truncado, o preenchimento for inválido ou o tag não conferir
+        """
+        if self._mode == 'ecb':
+            if len(self._pendente) != 16:
+                raise ValueError("Fluxo encriptado truncado")
+            ultimo = aes_crypto.decrypt_blocks(bytes(self._pendente), self._key, self._engine)
+            return ultimo[:16 - aes_crypto.tamanho_preenchimento(ultimo)]
+        if self._iv is None:
+            raise ValueError("Fluxo encriptado truncado")
+        if self._mode == 'ctr':
+            return b''
+        if len(self._pendente) != aes_modos.TAMANHO_TAG:
+            raise ValueError("Fluxo encriptado truncado")
+        final = self._cifrador.finalizar()
+        self._cifrador.verificar(bytes(self._pendente))
+        return final
+
+def _sincronizar_diretorio(diretorio):
+    """
+    Sincroniza a entrada de diretório, para que uma troca de nomes sobreviva a uma queda.
+
+    Em sistemas que não permitem abrir diretórios (Windows) não faz nada.
+
+    :param diretorio: Caminho do diretório
+    """
+    try:
+        fd = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def escrever_atomico(destino, escrever):
+    """
+    Grava um arquivo por meio de um temporário no mesmo diretório, trocado pelo destino só no sucesso.
+
+    Se escrever() lançar uma exceção (tag inválido, preenchimento inválido,
+    fluxo truncado), o temporário é removido e o destino não é criado nem
+    alterado, de modo que texto não autenticado nunca fica em disco. O
+    temporário tem nome único (gravações simultâneas no mesmo destino não se
+    misturam) e é sincronizado com fsync antes da troca, assim como o diretório depois dela.
+
+    :param destino: Caminho do arquivo final
+    :param escrever: Função que recebe o arquivo temporário aberto em modo binário
+    :return: Valor retornado por escrever
+    """
+    destino = os.fspath(destino)
+    diretorio = os.path.dirname(os.path.abspath(destino))
+    fd, temporario = tempfile.mkstemp(prefix='.' + os.path.basename(destino) + '.', suffix='.tmp', dir=diretorio)
+    try:
+        with open(fd, 'wb') as dst:
+            resultado = escrever(dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    _sincronizar_diretorio(diretorio)
+    return resultado
+
+def encrypt_iter(chunks, key, mode=MODO_PADRAO, iv=None, engine=None):
+    """
+    Encripta partes de dados, produzindo a saída à medida que é calculada.
+
+    :param chunks: Iterável de partes dos dados (bytes de qualquer tamanho)
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param iv: Vetor de inicialização (16 bytes no CTR, 12 no GCM, nenhum no ECB); None gera um aleatório
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Gerador das partes cifradas
+    """
+    encriptador = EncriptadorFluxo(key, mode, iv, engine)
+    for chunk in chunks:
+        parte = encriptador.atualizar(chunk)
+        if parte:
+            yield parte
+    yield encriptador.finalizar()
+
+def decrypt_iter(chunks, key, mode=MODO_PADRAO, engine=None):
+    """
+    Decripta partes de dados, produzindo a saída à medida que é calculada.
+
+    No modo GCM o texto decriptado é entregue antes da verificação do tag,
+    que só é possível no final; se o tag não conferir, ValueError é lançado
+    ao término e a saída já produzida deve ser descartada.
+
+    :param chunks: Iterável de partes dos dados cifrados
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Gerador das partes decriptadas
+    :raises ValueError: Se o fluxo estiver truncado, o preenchimento for inválido ou o tag não conferir
+    """
+    decriptador = DecriptadorFluxo(key, mode, engine)
+    for chunk in chunks:
+        parte = decriptador.atualizar(chunk)
+        if parte:
+            yield parte
+    yield decriptador.finalizar()
+
+def encrypt_stream(src, dst, key, chunk_size=TAMANHO_CHUNK_PADRAO, mode=MODO_PADRAO, iv=None, engine=None):
+    """
+    Encripta tudo o que for lido de src, escrevendo o resultado em dst.
+
+    :param src: Objeto com read() em modo binário
+    :param dst: Objeto com write() em modo binário
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param chunk_size: Tamanho das partes lidas de src
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param iv: Vetor de inicialização (16 bytes no CTR, 12 no GCM, nenhum no ECB); None gera um aleatório
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Quantidade de bytes escritos
+    """
+    escritos = 0
+    for parte in encrypt_iter(ler_chunks(src, chunk_size), key, mode, iv, engine):
+        dst.write(parte)
+        escritos += len(parte)
+    return escritos
+
+def decrypt_stream(src, dst, key, chunk_size=TAMANHO_CHUNK_PADRAO, mode=MODO_PADRAO, engine=None):
+    """
+    Decripta tudo o que for lido de src, escrevendo o resultado em dst.
+
+    A saída é escrita antes da verificação final (tag do GCM, preenchimento
+    do ECB); se ValueError for lançado, o que já foi escrito em dst deve ser
+    descartado. Para arquivos, decrypt_file já faz isso.
+
+    :param src: Objeto com read() em modo binário
+    :param dst: Objeto com write() em modo binário
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param chunk_size: Tamanho das partes lidas de src
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Quantidade de bytes escritos
+    :raises ValueError: Se o fluxo estiver truncado, o preenchimento for inválido ou o tag não conferir
+    """
+    escritos = 0
+    for parte in decrypt_iter(ler_chunks(src, chunk_size), key, mode, engine):
+        dst.write(parte)
+        escritos += len(parte)
+    return escritos
+
+def encrypt_file(origem, destino, key, chunk_size=TAMANHO_CHUNK_PADRAO, mode=MODO_PADRAO, engine=None):
+    """
+    Encripta um arquivo em disco sem carregá-lo inteiro na memória.
+
+    Assim como em decrypt_file, o destino só é substituído quando a encriptação termina.
+
+    :param origem: Caminho do arquivo original
+    :param destino: Caminho do arquivo encriptado
+    :param key: Chave de encriptação (bytes ou AESKey)
+    :param chunk_size: Tamanho das partes lidas do arquivo
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Quantidade de bytes escritos
+    """
+    with open(origem, 'rb') as src:
+        return escrever_atomico(destino, lambda dst: encrypt_stream(src, dst, key, chunk_size, mode, engine=engine))
+
+def decrypt_file(origem, destino, key, chunk_size=TAMANHO_CHUNK_PADRAO, mode=MODO_PADRAO, engine=None):
+    """
+    Decripta um arquivo em disco sem carregá-lo inteiro na memória.
+
+    O texto é escrito em um arquivo temporário ao lado do destino, que só
+    substitui o destino depois que o tag ou o preenchimento foi verificado.
+
+    :param origem: Caminho do arquivo encriptado
+    :param destino: Caminho do arquivo decriptado
+    :param key: Chave de decriptação (bytes ou AESKey)
+    :param chunk_size: Tamanho das partes lidas do arquivo
+    :param mode: Modo de operação ("ecb", "ctr" ou "gcm")
+    :param engine: Nome do engine de aes_crypto; None escolhe conforme o tamanho
+    :return: Quantidade de bytes escritos
+    :raises ValueError: Se o arquivo estiver truncado, o preenchimento for inválido ou o tag não conferir
+    """
+    with open(origem, 'rb') as src:
+        return escrever_atomico(destino, lambda dst: decrypt_stream(src, dst, key, chunk_size, mode, engine=engine))
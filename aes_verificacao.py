@@ -0,0 +1,495 @@
+"""
+Módulo de verificação da implementação própria do AES: vetores conhecidos, Monte Carlo e testes diferenciais.
+
+Antes de publicar um engine novo ou uma otimização, este módulo confere que
+todos os engines de aes_crypto e todos os modos (ECB, CTR, GCM, em lote e em
+fluxo) continuam produzindo exatamente o resultado esperado:
+
+- vetores conhecidos (KAT) do FIPS-197, do SP 800-38A (ECB e CTR) e da
+  especificação do GCM, passados por cada engine e por cada caminho;
+- o teste de Monte Carlo do ECB no formato do AESAVS (cada saída vira a
+  próxima entrada e a chave é atualizada a cada rodada externa), comparado
+  com a PyCryptodome;
+- testes diferenciais com dados, chaves e tamanhos aleatórios (incluindo os
+  limites de bloco) contra a PyCryptodome, em lote e em fluxo com partes de
+  tamanhos aleatórios, e a rejeição de preenchimento e tag inválidos.
+
+A vazão de cada engine é medida e gravada no mesmo relatório, de modo que
+cada mudança de desempenho vem acompanhada da prova de que o resultado
+continua correto.
+
+Uso:
+    python aes_verificacao.py
+    python aes_verificacao.py --engines ttable bitslice --casos 100 --saida verificacao.json
+    python aes_verificacao.py --mct-completo --semente 1234
+
+Autor: Filipe Nava
+Professor: Ronaldo Toshiaki Oikawa
+
+
+Descrição do Código:
+
+Bibliotecas Importadas:
+-argparse, json, random e sys são importadas para a linha de comando, o relatório e a geração dos casos.
+-aes_crypto, aes_modos e aes_stream fornecem os engines e modos verificados.
+-aes_benchmark fornece a medição de vazão.
+-Crypto.Cipher e Crypto.Util.Padding (opcionais) fornecem a PyCryptodome usada como referência.
+
+Variáveis Globais:
+-VETORES_FIPS197: Vetores do apêndice C do FIPS-197 (AES-128, 192 e 256).
+-VETORES_ECB / VETORES_CTR: Vetores do SP 800-38A (F.1 e F.5).
+-VETORES_GCM: Vetores da especificação do GCM.
+-TAMANHOS_LIMITE: Tamanhos de mensagem sempre testados (em torno dos limites de bloco).
+-MCT_RAPIDO / MCT_COMPLETO: Rodadas externas e internas do Monte Carlo.
+-CASOS_PADRAO: Quantidade de tamanhos aleatórios dos testes diferenciais.
+-TAMANHO_MAXIMO_PADRAO: Maior tamanho aleatório dos testes diferenciais.
+-TAMANHO_VAZAO: Tamanho das mensagens usadas na medição de vazão.
+
+Funções Principais:
+-verificar_kat(engines): Passa os vetores conhecidos por todos os engines e modos.
+-monte_carlo(cifrar_bloco, key, bloco, externas, internas): Executa o Monte Carlo do ECB no formato do AESAVS.
+-verificar_monte_carlo(engines, externas, internas): Compara o Monte Carlo de cada engine com a referência.
+-verificar_diferencial(engines, casos, tamanho_maximo, semente): Compara com a PyCryptodome em dados aleatórios.
+-medir_vazao(engines, tamanho, tempo_minimo): Mede a vazão de cada engine.
+-executar_verificacao(engines, casos, tamanho_maximo, semente, mct, vazao): Executa todas as verificações.
+-main(argv): Interface de linha de comando.
+
+"""
+
+import argparse
+import json
+import random
+import sys
+
+import aes_benchmark
+import aes_crypto
+import aes_modos
+import aes_stream
+
+try:
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import pad
+except ImportError:  # PyCryptodome é opcional; sem ela os testes diferenciais são omitidos
+    AES = None
+
+# FIPS-197, apêndice C: (chave, texto plano, texto cifrado)
+VETORES_FIPS197 = [
+    ('000102030405060708090a0b0c0d0e0f', '00112233445566778899aabbccddeeff', '69c4e0d86a7b0430d8cdb78070b4c55a'),
+    ('000102030405060708090a0b0c0d0e0f1011121314151617', '00112233445566778899aabbccddeeff',
+     'dda97ca4864cdfe06eaf70a0ec0d7191'),
+    ('000102030405060708090a0b0c0d0e0f101112131415161718191a1b1c1d1e1f', '00112233445566778899aabbccddeeff',
+     '8ea2b7ca516745bfeafc49904b496089'),
+]
+
+# Texto plano comum aos vetores do SP 800-38A (quatro blocos)
+_TEXTO_SP800_38A = ('6bc1bee22e409f96e93d7e117393172a' 'ae2d8a571e03ac9c9eb76fac45af8e51'
+                    '30c81c46a35ce411e5fbc1191a0a52ef' 'f69f2445df4f9b17ad2b417be66c3710')
+
+_CHAVES_SP800_38A = (
+    '2b7e151628aed2a6abf7158809cf4f3c',
+    '8e73b0f7da0e6452c810f32b809079e562f8ead2522c6b7b',
+    '603deb1015ca71be2b73aef0857d77811f352c073b6108d72d9810a30914dff4',
+)
+
+# SP 800-38A, F.1.1/F.1.3/F.1.5: (chave, texto plano, texto cifrado)
+VETORES_ECB = [
+    (_CHAVES_SP800_38A[0], _TEXTO_SP800_38A,
+     '3ad77bb40d7a3660a89ecaf32466ef97' 'f5d3d58503b9699de785895a96fdbaaf'
+     '43b1cd7f598ece23881b00e3ed030688' '7b0c785e27e8ad3f8223207104725dd4'),
+    (_CHAVES_SP800_38A[1], _TEXTO_SP800_38A,
+     'bd334f1d6e45f25ff712a214571fa5cc' '974104846d0ad3ad7734ecb3ecee4eef'
+     'ef7afd2270e2e60adce0ba2face6444e' '9a4b41ba738d6c72fb16691603c18e0e'),
+    (_CHAVES_SP800_38A[2], _TEXTO_SP800_38A,
+     'f3eed1bdb5d2a03c064b5a7e3db181f8' '591ccb10d410ed26dc5ba74a31362870'
+     'b6ed21b99ca6f4f9f153e7b1beafed1d' '23304b7a39f9f3ff067d8d8f9e24ecc7'),
+]
+
+# SP 800-38A, F.5.1/F.5.3/F.5.5: (chave, contador inicial, texto plano, texto cifrado)
+VETORES_CTR = [
+    (_CHAVES_SP800_38A[0], 'f0f1f2f3f4f5f6f7f8f9fafbfcfdfeff', _TEXTO_SP800_38A,
+     '874d6191b620e3261bef6864990db6ce' '9806f66b7970fdff8617187bb9fffdff'
+     '5ae4df3edbd5d35e5b4f09020db03eab' '1e031dda2fbe03d1792170a0f3009cee'),
+    (_CHAVES_SP800_38A[1], 'f0f1f2f3f4f5f6f7f8f9fafbfcfdfeff', _TEXTO_SP800_38A,
+     '1abc932417521ca24f2b0459fe7e6e0b' '090339ec0aa6faefd5ccc2c6f4ce8e94'
+     '1e36b26bd1ebc670d1bd1d665620abf7' '4f78a7f6d29809585a97daec58c6b050'),
+    (_CHAVES_SP800_38A[2], 'f0f1f2f3f4f5f6f7f8f9fafbfcfdfeff', _TEXTO_SP800_38A,
+     '601ec313775789a5b7a7f504bbf3d228' 'f443e3ca4d62b59aca84e990cacaf5c5'
+     '2b0930daa23de94ce87017ba2d84988d' 'dfc9c58db67aada613c2dd08457941a6'),
+]
+
+_TEXTO_GCM = ('d9313225f88406e5a55909c5aff5269a86a7a9531534f7da2e4c303d8a318a72'
+              '1c3c0c95956809532fcf0e2449a6b525b16aedf5aa0de657ba637b391aafd255')
+_CIFRADO_GCM = ('42831ec2217774244b7221b784d0d49ce3aa212f2c02a4e035c17e2329aca12e'
+                '21d514b25466931c7d8f6a5aac84aa051ba30b396a0aac973d58e091473f5985')
+
+# Especificação do GCM, casos 1 a 4, 13 e 14: (chave, iv, texto plano, aad, texto cifrado, tag)
+VETORES_GCM = [
+    ('00' * 16, '00' * 12, '', '', '', '58e2fccefa7e3061367f1d57a4e7455a'),
+    ('00' * 16, '00' * 12, '00' * 16, '', '0388dace60b6a392f328c2b971b2fe78', 'ab6e47d42cec13bdf53a67b21257bddf'),
+    ('feffe9928665731c6d6a8f9467308308', 'cafebabefacedbaddecaf888', _TEXTO_GCM, '', _CIFRADO_GCM,
+     '4d5c2af327cd64a62cf35abd2ba6fab4'),
+    ('feffe9928665731c6d6a8f9467308308', 'cafebabefacedbaddecaf888', _TEXTO_GCM[:120],
+     'feedfacedeadbeeffeedfacedeadbeefabaddad2', _CIFRADO_GCM[:120], '5bc94fbc3221a5db94fae95ae7121a47'),
+    ('00' * 32, '00' * 12, '', '', '', '530f8afbc74536b9a963b4f1c4cb738b'),
+    ('00' * 32, '00' * 12, '00' * 16, '', 'cea7403d4d606b6e074ec5d3baf39d18', 'd0d1c8a799996bf0265b98b5d48ab919'),
+]
+
+# Tamanhos sempre testados: vazio, em torno de um bloco e em torno de vários blocos
+TAMANHOS_LIMITE = [0, 1, 15, 16, 17, 31, 32, 33, 63, 64, 65, 255, 256, 257, 1023, 1024, 1025]
+
+# Monte Carlo (rodadas externas, rodadas internas): o AESAVS usa 100 x 1000
+MCT_COMPLETO = (100, 1000)
+MCT_RAPIDO = (5, 100)
+
+# Quantidade de tamanhos aleatórios e maior tamanho dos testes diferenciais
+CASOS_PADRAO = 20
+TAMANHO_MAXIMO_PADRAO = 64 * 1024
+
+# Tamanho das mensagens na medição de vazão
+TAMANHO_VAZAO = 64 * 1024
+
+def _resultado(grupo, caso, ok, detalhe=''):
+    """
+    Monta o registro de uma verificação.
+
+    :param grupo: Grupo da verificação ("kat", "mct" ou "diferencial")
+    :param caso: Descrição do caso
+    :param ok: True se o resultado conferiu
+    :param detalhe: Explicação da falha
+    :return: Dicionário de resultado
+    """
+    return {'grupo': grupo, 'caso': caso, 'ok': bool(ok), 'detalhe': detalhe}
+
+def _verificar(grupo, caso, funcao):
+    """
+    Executa uma verificação, registrando exceções como falhas em vez de interromper as demais.
+
+    :param grupo: Grupo da verificação
+    :param caso: Descrição do caso
+    :param funcao: Função sem argumentos que retorna True se o resultado conferiu
+    :return: Dicionário de resultado
+    """
+    try:
+        ok = funcao()
+    except Exception as e:
+        return _resultado(grupo, caso, False, f"{type(e).__name__}: {e}")
+    return _resultado(grupo, caso, ok, '' if ok else "resultado diferente do esperado")
+
+def _lancar_value_error(funcao):
+    """
+    Confere que uma operação é rejeitada com ValueError.
+
+    :param funcao: Função sem argumentos
+    :return: True se ValueError foi lançado
+    """
+    try:
+        funcao()
+    except ValueError:
+        return True
+    return False
+
+def _juntar_fluxo(gerador):
+    """
+    Junta as partes produzidas por um gerador de aes_stream.
+
+    :param gerador: Gerador de partes (bytes)
+    :return: Bytes concatenados
+    """
+    return b''.join(gerador)
+
+def _partes_aleatorias(data, rng):
+    """
+    Divide os dados em partes de tamanhos aleatórios (inclusive vazias), fora do alinhamento de bloco.
+
+    O maior tamanho de parte acompanha o tamanho dos dados (cerca de oito
+    partes por mensagem), para que os engines de lote, que têm custo fixo por
+    chamada, não processem mensagens grandes em milhares de partes minúsculas.
+
+    :param data: Dados a dividir
+    :param rng: Gerador random.Random
+    :return: Lista de partes
+    """
+    maximo = max(48, len(data) // 4)
+    partes = []
+    pos = 0
+    while pos < len(data):
+        tamanho = rng.randrange(maximo + 1)
+        partes.append(data[pos:pos + tamanho])
+        pos += tamanho
+    return partes
+
+def verificar_kat(engines):
+    """
+    Passa os vetores conhecidos por todos os engines e modos.
+
+    Os vetores do FIPS-197 passam pelas funções de bloco e de lote, os do SP
+    800-38A pelo ECB em lote, pelo CTR (inteiro e a partir de uma posição) e
+    pelos fluxos, e os do GCM pelas funções de aes_modos e pelo fluxo.
+
+    :param engines: Engines de aes_crypto a verificar
+    :return: Lista de dicionários de resultado
+    """
+    resultados = []
+    for engine in engines:
+        for chave, texto, cifrado in VETORES_FIPS197:
+            k, p, c = bytes.fromhex(chave), bytes.fromhex(texto), bytes.fromhex(cifrado)
+            caso = f"fips197 aes-{len(k) * 8} {engine}"
+            resultados.append(_verificar('kat', caso + ' bloco', lambda: aes_crypto.encrypt_block(p, k, engine) == c
+                                         and aes_crypto.decrypt_block(c, k, engine) == p))
+            resultados.append(_verificar('kat', caso + ' lote', lambda: aes_crypto.encrypt_blocks(p, k, engine) == c
+                                         and aes_crypto.decrypt_blocks(c, k, engine) == p))
+
+        for chave, texto, cifrado in VETORES_ECB:
+            k, p, c = bytes.fromhex(chave), bytes.fromhex(texto), bytes.fromhex(cifrado)
+            caso = f"sp800-38a ecb aes-{len(k) * 8} {engine}"
+            resultados.append(_verificar('kat', caso, lambda: aes_crypto.encrypt_blocks(p, k, engine) == c
+                                         and aes_crypto.decrypt_blocks(c, k, engine) == p))
+            resultados.append(_verificar('kat', caso + ' fluxo', lambda: _juntar_fluxo(
+                aes_stream.encrypt_iter([p[:20], p[20:]], k, 'ecb', engine=engine))[:len(c)] == c))
+
+        for chave, contador, texto, cifrado in VETORES_CTR:
+            k, iv, p, c = bytes.fromhex(chave), bytes.fromhex(contador), bytes.fromhex(texto), bytes.fromhex(cifrado)
+            caso = f"sp800-38a ctr aes-{len(k) * 8} {engine}"
+            resultados.append(_verificar('kat', caso, lambda: aes_modos.encrypt_ctr(p, k, iv, 0, engine) == c
+                                         and aes_modos.decrypt_ctr(c, k, iv, 0, engine) == p))
+            resultados.append(_verificar('kat', caso + ' offset', lambda: aes_modos.encrypt_ctr(p[23:], k, iv, 23, engine)
+                                         == c[23:]))
+            resultados.append(_verificar('kat', caso + ' fluxo', lambda: _juntar_fluxo(
+                aes_stream.encrypt_iter([p[:5], p[5:40], p[40:]], k, 'ctr', iv, engine)) == iv + c))
+
+        for chave, vetor, texto, aad, cifrado, tag in VETORES_GCM:
+            k, iv, p, a = bytes.fromhex(chave), bytes.fromhex(vetor), bytes.fromhex(texto), bytes.fromhex(aad)
+            c, t = bytes.fromhex(cifrado), bytes.fromhex(tag)
+            caso = f"gcm aes-{len(k) * 8} {len(p)}B aad {len(a)}B {engine}"
+            resultados.append(_verificar('kat', caso, lambda: aes_modos.encrypt_gcm(p, k, iv, a, engine) == (c, t)
+                                         and aes_modos.decrypt_gcm(c, t, k, iv, a, engine) == p))
+            if not a:
+                resultados.append(_verificar('kat', caso + ' fluxo', lambda: _juntar_fluxo(
+                    aes_stream.encrypt_iter([p[:7], p[7:]], k, 'gcm', iv, engine)) == iv + c + t))
+    return resultados
+
+def monte_carlo(cifrar_bloco, key, bloco, externas=MCT_COMPLETO[0], internas=MCT_COMPLETO[1]):
+    """
+    Executa o teste de Monte Carlo do ECB no formato do AESAVS.
+
+    Em cada rodada externa o bloco é cifrado `internas` vezes seguidas (cada
+    saída é a próxima entrada) e a chave recebe o XOR dos últimos bits de
+    saída: o último bloco (128 bits), os 64 bits finais do penúltimo mais o
+    último (192 bits) ou os dois últimos blocos (256 bits).
+
+    :param cifrar_bloco: Função (chave, bloco) -> bloco, de encriptação ou de decriptação
+    :param key: Chave inicial (16, 24 ou 32 bytes)
+    :param bloco: Bloco inicial (16 bytes)
+    :param externas: Quantidade de rodadas externas
+    :param internas: Quantidade de cifras por rodada externa
+    :return: Lista com o último bloco de cada rodada externa
+    """
+    saidas = []
+    anterior = bytes(16)
+    for _ in range(externas):
+        for _ in range(internas):
+            anterior, bloco = bloco, cifrar_bloco(key, bloco)
+        saidas.append(bloco)
+        material = (anterior + bloco)[32 - len(key):]
+        key = bytes(x ^ y for x, y in zip(key, material))
+    return saidas
+
+def verificar_monte_carlo(engines, externas=MCT_RAPIDO[0], internas=MCT_RAPIDO[1]):
+    """
+    Compara o Monte Carlo de cada engine com a referência, nos três tamanhos de chave e nos dois sentidos.
+
+    A referência é a PyCryptodome; sem ela, o engine "reference" (já conferido
+    pelos vetores conhecidos) é usado no lugar.
+
+    :param engines: Engines de aes_crypto a verificar
+    :param externas: Quantidade de rodadas externas
+    :param internas: Quantidade de cifras por rodada externa
+    :return: Lista de dicionários de resultado
+    """
+    if AES is not None:
+        referencias = (lambda k, b: AES.new(k, AES.MODE_ECB).encrypt(b), lambda k, b: AES.new(k, AES.MODE_ECB).decrypt(b))
+    else:
+        referencias = (lambda k, b: aes_crypto.encrypt_block(b, k, 'reference'),
+                       lambda k, b: aes_crypto.decrypt_block(b, k, 'reference'))
+    resultados = []
+    for chave, texto, _ in VETORES_FIPS197:
+        k, p = bytes.fromhex(chave), bytes.fromhex(texto)
+        for sentido, referencia in zip(('encrypt', 'decrypt'), referencias):
+            esperado = monte_carlo(referencia, k, p, externas, internas)
+            for engine in engines:
+                cifrar = getattr(aes_crypto, f"{sentido}_block")
+                caso = f"mct ecb {sentido} aes-{len(k) * 8} {engine} {externas}x{internas}"
+                resultados.append(_verificar('mct', caso, lambda: monte_carlo(lambda kk, b: cifrar(b, kk, engine), k, p,
+                                                                              externas, internas) == esperado))
+    return resultados
+
+def _verificar_tamanho(engine, data, key, iv, rng):
+    """
+    Compara todos os caminhos de um engine com a PyCryptodome para uma mensagem.
+
+    :param engine: Engine de aes_crypto
+    :param data: Mensagem aleatória
+    :param key: Chave aleatória
+    :param iv: Bloco aleatório de 16 bytes (contador do CTR; os 12 primeiros são o iv do GCM)
+    :param rng: Gerador random.Random usado para dividir os fluxos
+    :return: Lista de dicionários de resultado
+    """
+    caso = f"aes-{len(key) * 8} {len(data)}B {engine}"
+    alinhado = data[:len(data) - len(data) % 16]
+    offset = rng.randrange(len(data) + 1)
+    aad = data[:rng.randrange(min(len(data), 64) + 1)]
+    ecb = AES.new(key, AES.MODE_ECB)
+    ecb_pad = ecb.encrypt(pad(data, 16))
+    ctr = AES.new(key, AES.MODE_CTR, nonce=b'', initial_value=iv).encrypt(data)
+    gcm_ct, gcm_tag = AES.new(key, AES.MODE_GCM, nonce=iv[:12]).update(aad).encrypt_and_digest(data)
+    gcm_fluxo, gcm_fluxo_tag = AES.new(key, AES.MODE_GCM, nonce=iv[:12]).encrypt_and_digest(data)
+    esperado_fluxo = {'ecb': ecb_pad, 'ctr': iv + ctr, 'gcm': iv[:12] + gcm_fluxo + gcm_fluxo_tag}
+    iv_fluxo = {'ecb': None, 'ctr': iv, 'gcm': iv[:12]}
+
+    resultados = [
+        _verificar('diferencial', f"ecb lote {caso}", lambda: aes_crypto.encrypt_blocks(alinhado, key, engine)
+                   == ecb.encrypt(alinhado) and aes_crypto.decrypt_blocks(ecb.encrypt(alinhado), key, engine) == alinhado),
+        _verificar('diferencial', f"ecb pkcs7 {caso}", lambda: aes_crypto.encrypt_bytes(data, key, engine) == ecb_pad
+                   and aes_crypto.decrypt_bytes(ecb_pad, key, engine) == data),
+        _verificar('diferencial', f"ctr {caso}", lambda: aes_modos.encrypt_ctr(data, key, iv, 0, engine) == ctr
+                   and aes_modos.decrypt_ctr(ctr, key, iv, 0, engine) == data),
+        _verificar('diferencial', f"ctr offset {offset} {caso}",
+                   lambda: aes_modos.encrypt_ctr(data[offset:], key, iv, offset, engine) == ctr[offset:]),
+        _verificar('diferencial', f"gcm aad {len(aad)}B {caso}",
+                   lambda: aes_modos.encrypt_gcm(data, key, iv[:12], aad, engine) == (gcm_ct, gcm_tag)
+                   and aes_modos.decrypt_gcm(gcm_ct, gcm_tag, key, iv[:12], aad, engine) == data),
+        _verificar('diferencial', f"gcm tag adulterado {caso}", lambda: _lancar_value_error(
+            lambda: aes_modos.decrypt_gcm(gcm_ct, bytes([gcm_tag[0] ^ 1]) + gcm_tag[1:], key, iv[:12], aad, engine))),
+    ]
+    for mode in aes_stream.MODOS:
+        partes = _partes_aleatorias(data, rng)
+        resultados.append(_verificar('diferencial', f"fluxo {mode} {len(partes)} partes {caso}", lambda: _juntar_fluxo(
+            aes_stream.encrypt_iter(partes, key, mode, iv_fluxo[mode], engine)) == esperado_fluxo[mode]
+            and _juntar_fluxo(aes_stream.decrypt_iter(_partes_aleatorias(esperado_fluxo[mode], rng), key, mode, engine))
+            == data))
+    return resultados
+
+def verificar_diferencial(engines, casos=CASOS_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, semente=None):
+    """
+    Compara os engines com a PyCryptodome em mensagens, chaves e partições aleatórias.
+
+    São usados os tamanhos de TAMANHOS_LIMITE mais `casos` tamanhos
+    aleatórios até tamanho_maximo, cada um com uma chave de 128, 192 ou 256
+    bits sorteada. A mesma semente reproduz exatamente os mesmos casos.
+
+    :param engines: Engines de aes_crypto a verificar
+    :param casos: Quantidade de tamanhos aleatórios
+    :param tamanho_maximo: Maior tamanho aleatório, em bytes
+    :param semente: Semente do gerador; None sorteia uma
+    :return: Lista de dicionários de resultado (vazia se a PyCryptodome não estiver instalada)
+    """
+    if AES is None:
+        return []
+    rng = random.Random(semente)
+    tamanhos = TAMANHOS_LIMITE + [rng.randrange(tamanho_maximo + 1) for _ in range(casos)]
+    resultados = []
+    for tamanho in tamanhos:
+        key = rng.randbytes(rng.choice(aes_crypto.TAMANHOS_CHAVE))
+        data = rng.randbytes(tamanho)
+        iv = rng.randbytes(16)
+        for engine in engines:
+            resultados.extend(_verificar_tamanho(engine, data, key, iv, rng))
+
+    # O preenchimento inválido deve ser rejeitado, e não ignorado ou decodificado pela metade
+    key = rng.randbytes(16)
+    bloco = rng.randbytes(15) + b'\x00'
+    for engine in engines:
+        cifrado = aes_crypto.encrypt_blocks(bloco, key, engine)
+        resultados.append(_verificar('diferencial', f"preenchimento inválido {engine}", lambda: _lancar_value_error(
+            lambda: aes_crypto.decrypt_bytes(cifrado, key, engine))))
+    return resultados
+
+def medir_vazao(engines, tamanho=TAMANHO_VAZAO, tempo_minimo=aes_benchmark.TEMPO_MINIMO_PADRAO):
+    """
+    Mede a vazão da encriptação e da decriptação em lote de cada engine.
+
+    :param engines: Engines de aes_crypto a medir
+    :param tamanho: Tamanho das mensagens, em bytes
+    :param tempo_minimo: Tempo mínimo de medição de cada caso, em segundos
+    :return: Lista de dicionários com engine, operação e as medidas de aes_benchmark.medir
+    """
+    data = bytes(range(256)) * (tamanho // 256)
+    key = aes_crypto.expandir_chave(bytes(range(16)))
+    vazao = []
+    for engine in engines:
+        for operacao, funcao in (('encrypt', aes_crypto.encrypt_blocks), ('decrypt', aes_crypto.decrypt_blocks)):
+            medida = aes_benchmark.medir(lambda: funcao(data, key, engine), len(data), tempo_minimo)
+            vazao.append({'engine': engine, 'operacao': operacao, 'tamanho': len(data), **medida})
+    return vazao
+
+def executar_verificacao(engines=None, casos=CASOS_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, semente=None,
+                         mct=MCT_RAPIDO, vazao=True):
+    """
+    Executa todas as verificações e monta o relatório.
+
+    :param engines: Engines de aes_crypto a verificar; None verifica todos
+    :param casos: Quantidade de tamanhos aleatórios dos testes diferenciais
+    :param tamanho_maximo: Maior tamanho aleatório dos testes diferenciais
+    :param semente: Semente dos testes diferenciais; None sorteia uma (registrada no relatório)
+    :param mct: Tupla (rodadas externas, rodadas internas) do Monte Carlo
+    :param vazao: Mede também a vazão de cada engine
+    :return: Dicionário com as verificações, a quantidade de falhas e a vazão medida
+    """
+    engines = list(engines or aes_crypto.ENGINES)
+    if semente is None:
+        semente = random.randrange(1 << 32)
+    verificacoes = verificar_kat(engines)
+    verificacoes += verificar_monte_carlo(engines, *mct)
+    verificacoes += verificar_diferencial(engines, casos, tamanho_maximo, semente)
+    return {
+        'python': sys.version.split()[0],
+        'numpy': aes_crypto.carregar_numpy() is not None,
+        'pycryptodome': AES is not None,
+        'semente': semente,
+        'engines': engines,
+        'verificacoes': verificacoes,
+        'falhas': sum(not v['ok'] for v in verificacoes),
+        'vazao': medir_vazao(engines) if vazao else [],
+    }
+
+def main(argv=None):
+    """
+    Interface de linha de comando da verificação.
+
+    :param argv: Argumentos (None usa sys.argv)
+    :return: Código de saída (1 se alguma verificação falhar)
+    """
+    parser = argparse.ArgumentParser(description="Vetores conhecidos, Monte Carlo e testes diferenciais do AES próprio")
+    parser.add_argument('--engines', nargs='+', choices=list(aes_crypto.ENGINES), help="engines a verificar (padrão: todos)")
+    parser.add_argument('--casos', type=int, default=CASOS_PADRAO, help="quantidade de tamanhos aleatórios")
+    parser.add_argument('--tamanho-maximo', type=int, default=TAMANHO_MAXIMO_PADRAO, help="maior tamanho aleatório, em bytes")
+    parser.add_argument('--semente', type=int, help="semente dos testes diferenciais, para reproduzir uma falha")
+    parser.add_argument('--mct-completo', action='store_true', help="Monte Carlo com 100 x 1000 rodadas, como no AESAVS")
+    parser.add_argument('--sem-vazao', action='store_true', help="não mede a vazão dos engines")
+    parser.add_argument('--saida', help="arquivo JSON do relatório (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+
+    if AES is None:
+        print("PyCryptodome não instalada: testes diferenciais omitidos", file=sys.stderr)
+    relatorio = executar_verificacao(args.engines, args.casos, args.tamanho_maximo, args.semente,
+                                     MCT_COMPLETO if args.mct_completo else MCT_RAPIDO, not args.sem_vazao)
+
+    for verificacao in relatorio['verificacoes']:
+        if not verificacao['ok']:
+            print(f"FALHA {verificacao['grupo']} {verificacao['caso']}: {verificacao['detalhe']}", file=sys.stderr)
+    for medida in relatorio['vazao']:
+        print(f"{medida['operacao']:<8} {medida['engine']:<10} {medida['mb_s']:10.2f} MB/s", file=sys.stderr)
+    print(f"{len(relatorio['verificacoes']) - relatorio['falhas']}/{len(relatorio['verificacoes'])} verificações "
+          f"corretas (semente {relatorio['semente']})", file=sys.stderr)
+
+    destino = open(args.saida, 'w') if args.saida else sys.stdout
+    try:
+        json.dump(relatorio, destino, indent=2)
+        destino.write('\n')
+    finally:
+        if args.saida:
+            destino.close()
+    return 1 if relatorio['falhas'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Testes da API assíncrona: ida e volta por um socket local com executores de threads e de processos.
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+
+import pytest
+
+import aes_async
+import aes_stream
+
+# Maior que LIMIAR_EXECUTOR, para que as partes sejam de fato enviadas ao executor
+TAMANHO_PARTE = 20000
+
+@pytest.fixture(scope='module', params=['threads', 'processos'])
+def executor(request):
+    if request.param == 'threads':
+        executor = concurrent.futures.ThreadPoolExecutor(2)
+    else:
+        # spawn: processos criados por fork herdariam os sockets abertos e impediriam o fim da conexão
+        executor = concurrent.futures.ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn'))
+    with executor:
+        yield executor
+
+def _leitor(data):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+async def _ida_volta_socket(data, key, mode, executor):
+    """
+    Encripta no cliente, envia por um socket local e devolve o que o servidor decriptar.
+    """
+    async def servidor(reader, writer):
+        await aes_async.decrypt_stream_async(reader, writer, key, TAMANHO_PARTE, mode, executor=executor)
+        writer.close()
+
+    server = await asyncio.start_server(servidor, '127.0.0.1', 0)
+    porta = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', porta)
+        escritos = await aes_async.encrypt_stream_async(_leitor(data), writer, key, TAMANHO_PARTE, mode,
+                                                        executor=executor)
+        writer.write_eof()
+        recebido = await reader.read()
+        writer.close()
+    return escritos, recebido
+
+@pytest.mark.parametrize('mode', aes_stream.MODOS)
+def test_ida_volta_socket(mode, executor):
+    key = os.urandom(16)
+    data = os.urandom(3 * TAMANHO_PARTE + 123)
+    escritos, recebido = asyncio.run(_ida_volta_socket(data, key, mode, executor))
+    assert recebido == data
+    assert escritos == len(b''.join(aes_stream.encrypt_iter([data], key, mode)))
+
+@pytest.mark.parametrize('mode', ['ctr', 'gcm'])
+def test_executor_nao_altera_o_formato(mode, executor):
+    # O iv é emitido uma única vez e o contador segue entre as partes, como no caminho síncrono
+    key = os.urandom(32)
+    iv = os.urandom(16 if mode == 'ctr' else 12)
+    data = os.urandom(2 * TAMANHO_PARTE)
+
+    async def partes():
+        for i in range(0, len(data), TAMANHO_PARTE):
+            yield data[i:i + TAMANHO_PARTE]
+
+    async def encriptar():
+        return b''.join([p async for p in aes_async.encrypt_aiter(partes(), key, mode, iv, executor=executor)])
+
+    assert asyncio.run(encriptar()) == b''.join(aes_stream.encrypt_iter([data], key, mode, iv))
@@ -0,0 +1,84 @@
+"""
+Testes do chaveiro: armazéns, identificadores repetidos, rotação e reencriptação de contêineres.
+"""
+
+import os
+
+import pytest
+
+import aes_chaveiro
+import aes_container
+
+@pytest.fixture(params=['memoria', 'json', 'sqlite'])
+def armazem(request, tmp_path):
+    if request.param == 'memoria':
+        yield aes_chaveiro.ArmazemMemoria()
+    elif request.param == 'json':
+        yield aes_chaveiro.ArmazemJSON(tmp_path / 'chaves.json')
+    else:
+        armazem = aes_chaveiro.ArmazemSQLite(str(tmp_path / 'chaves.db'))
+        yield armazem
+        armazem.fechar()
+
+def test_selar_e_abrir(armazem):
+    chaveiro = aes_chaveiro.Chaveiro(armazem)
+    key_id = chaveiro.adicionar(ativar=True)
+    mensagem = aes_chaveiro.selar(b'mensagem', chaveiro)
+    assert aes_chaveiro.ler_key_id(mensagem) == key_id
+    assert aes_chaveiro.abrir(mensagem, chaveiro) == b'mensagem'
+
+def test_identificador_repetido(armazem):
+    chaveiro = aes_chaveiro.Chaveiro(armazem)
+    chaveiro.adicionar(os.urandom(16), 'k1')
+    mensagem = aes_chaveiro.selar(b'mensagem', chaveiro, 'k1')
+    with pytest.raises(ValueError):
+        chaveiro.adicionar(os.urandom(16), 'k1')
+    # a chave original continua valendo, inclusive em um chaveiro novo sobre o mesmo armazém
+    assert aes_chaveiro.abrir(mensagem, chaveiro) == b'mensagem'
+    assert aes_chaveiro.abrir(mensagem, aes_chaveiro.Chaveiro(armazem)) == b'mensagem'
+
+def test_armazem_json_persistente(tmp_path):
+    caminho = tmp_path / 'chaves.json'
+    chaveiro = aes_chaveiro.Chaveiro(aes_chaveiro.ArmazemJSON(caminho))
+    key_id = chaveiro.adicionar(ativar=True)
+    mensagem = aes_chaveiro.selar(b'mensagem', chaveiro)
+
+    recarregado = aes_chaveiro.Chaveiro(aes_chaveiro.ArmazemJSON(caminho))
+    assert recarregado.ativa == key_id
+    assert aes_chaveiro.abrir(mensagem, recarregado) == b'mensagem'
+    assert [p.name for p in tmp_path.iterdir()] == ['chaves.json']
+    if os.name == 'posix':
+        assert os.stat(caminho).st_mode & 0o777 == 0o600
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_rotacao_e_reencriptacao(tmp_path, workers):
+    chaveiro = aes_chaveiro.Chaveiro()
+    antiga = chaveiro.adicionar(ativar=True)
+    dados = {}
+    for nome in ('a', 'b', 'c'):
+        dados[nome] = os.urandom(10000)
+        (tmp_path / nome).write_bytes(dados[nome])
+        aes_chaveiro.encrypt_file(str(tmp_path / nome), str(tmp_path / (nome + '.aesc')), chaveiro, chunk_size=4096)
+
+    nova = chaveiro.rotacionar()
+    assert chaveiro.ativa == nova and antiga in chaveiro
+    aes_chaveiro.encrypt_file(str(tmp_path / 'a'), str(tmp_path / 'd.aesc'), chaveiro)
+    caminhos = [str(tmp_path / (nome + '.aesc')) for nome in ('a', 'b', 'c', 'd')]
+    resumo = aes_chaveiro.reencriptar_lote(caminhos, chaveiro, workers=workers)
+    assert resumo == {'reencriptados': 3, 'pulados': 1, 'erros': 0}
+
+    chaveiro.remover(antiga)
+    for nome in ('a', 'b', 'c'):
+        assert aes_container.ler_cabecalho(tmp_path / (nome + '.aesc')).key_id == nova.encode()
+        aes_chaveiro.decrypt_file(tmp_path / (nome + '.aesc'), tmp_path / (nome + '.saida'), chaveiro)
+        assert (tmp_path / (nome + '.saida')).read_bytes() == dados[nome]
+
+def test_reencriptar_com_chave_errada_preserva_o_arquivo(tmp_path):
+    key = os.urandom(16)
+    (tmp_path / 'original').write_bytes(os.urandom(5000))
+    aes_container.encrypt_container(tmp_path / 'original', tmp_path / 'container', key, 'k1')
+    antes = (tmp_path / 'container').read_bytes()
+    with pytest.raises(ValueError):
+        aes_chaveiro.reencriptar_arquivo(str(tmp_path / 'container'), os.urandom(16), os.urandom(16), 'k2')
+    assert (tmp_path / 'container').read_bytes() == antes
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['container', 'original']
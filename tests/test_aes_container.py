@@ -0,0 +1,97 @@
+"""
+Testes do contêiner: ida e volta, read_range e rejeição de rodapé ou chunks adulterados.
+"""
+
+import os
+import struct
+
+import pytest
+
+import aes_container
+
+CHUNK = 4096
+
+@pytest.fixture
+def container(tmp_path):
+    key = os.urandom(16)
+    data = os.urandom(10 * CHUNK + 123)
+    origem, destino = tmp_path / 'original', tmp_path / 'container'
+    origem.write_bytes(data)
+    aes_container.encrypt_container(origem, destino, key, 'k1', CHUNK)
+    return destino, key, data
+
+def _alterar_tamanho_rodape(caminho, tamanho):
+    bruto = bytearray(caminho.read_bytes())
+    inicio = len(bruto) - struct.calcsize(aes_container._FORMATO_RODAPE) + 8
+    bruto[inicio:inicio + 8] = struct.pack('>Q', tamanho)
+    caminho.write_bytes(bytes(bruto))
+
+def test_ida_volta(container, tmp_path):
+    caminho, key, data = container
+    aes_container.decrypt_container(caminho, tmp_path / 'saida', key)
+    assert (tmp_path / 'saida').read_bytes() == data
+    assert aes_container.read_range(caminho, CHUNK - 10, 3 * CHUNK, key) == data[CHUNK - 10:4 * CHUNK - 10]
+    assert aes_container.read_range(caminho, len(data) - 5, 5, key) == data[-5:]
+    assert aes_container.read_range(caminho, len(data), 0, key) == b''
+
+@pytest.mark.parametrize('tamanho', [100, 10 ** 7])
+def test_rodape_com_tamanho_adulterado(container, tamanho):
+    caminho, key, _ = container
+    _alterar_tamanho_rodape(caminho, tamanho)
+    with pytest.raises(ValueError):
+        aes_container.read_range(caminho, 0, 10, key)
+
+@pytest.mark.parametrize('offset, length', [(-1, 1), (0, -1), (300000, 10), (10 * CHUNK + 120, 10)])
+def test_read_range_fora_do_conteudo(container, offset, length):
+    caminho, key, _ = container
+    with pytest.raises(ValueError):
+        aes_container.read_range(caminho, offset, length, key)
+
+def test_ler_chunk_inexistente(container):
+    caminho, key, _ = container
+    with open(caminho, 'rb') as src:
+        leitor = aes_container.LeitorContainer(src, key)
+        with pytest.raises(ValueError):
+            leitor.ler_chunk(len(leitor.indice))
+
+def test_chunk_adulterado(container):
+    caminho, key, _ = container
+    bruto = bytearray(caminho.read_bytes())
+    bruto[len(aes_container.ler_cabecalho(caminho).dados) + 5] ^= 1
+    caminho.write_bytes(bytes(bruto))
+    assert aes_container.read_range(caminho, 2 * CHUNK, 10, key)
+    with pytest.raises(ValueError):
+        aes_container.read_range(caminho, 0, 10, key)
+
+def test_excecao_durante_a_gravacao_nao_finaliza(tmp_path):
+    key = os.urandom(16)
+    caminho = tmp_path / 'container'
+    with open(caminho, 'wb') as dst:
+        with pytest.raises(RuntimeError):
+            with aes_container.EscritorContainer(dst, key, b'', CHUNK) as escritor:
+                escritor.write(os.urandom(100000))
+                raise RuntimeError("falha no meio da gravação")
+    with open(caminho, 'rb') as src:
+        with pytest.raises(ValueError):
+            aes_container.LeitorContainer(src, key)
+
+def test_encrypt_container_com_erro_nao_altera_destino(tmp_path):
+    (tmp_path / 'original').write_bytes(os.urandom(3 * CHUNK))
+    (tmp_path / 'container').write_bytes(b'conteudo anterior')
+    with pytest.raises(ValueError):
+        aes_container.encrypt_container(tmp_path / 'original', tmp_path / 'container', os.urandom(16), 'k1', 0)
+    assert (tmp_path / 'container').read_bytes() == b'conteudo anterior'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['container', 'original']
+
+def test_decrypt_container_com_chunk_adulterado_nao_altera_destino(container, tmp_path):
+    caminho, key, _ = container
+    with open(caminho, 'rb') as src:
+        posicao = aes_container.LeitorContainer(src, key).indice[-1][0]
+    bruto = bytearray(caminho.read_bytes())
+    bruto[posicao] ^= 1
+    caminho.write_bytes(bytes(bruto))
+    (tmp_path / 'saida').write_bytes(b'conteudo anterior')
+    with pytest.raises(ValueError):
+        aes_container.decrypt_container(caminho, tmp_path / 'saida', key)
+    assert (tmp_path / 'saida').read_bytes() == b'conteudo anterior'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['container', 'original', 'saida']
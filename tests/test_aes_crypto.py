@@ -0,0 +1,40 @@
+"""
+Testes do escalonamento de chaves: resultado igual ao da S-Box em tabela, sem consultá-la.
+"""
+
+import os
+
+import pytest
+
+import aes_crypto
+
+class _TabelaProibida:
+    def __getitem__(self, indice):
+        raise AssertionError("a expansão da chave consultou uma tabela indexada pela chave")
+
+def _expansao_com_tabela(key):
+    nk = len(key) // 4
+    w = [list(key[4 * i:4 * i + 4]) for i in range(nk)]
+    for i in range(nk, 4 * (nk + 7)):
+        t = list(w[i - 1])
+        if i % nk == 0:
+            t = [aes_crypto.Sbox[b] for b in t[1:] + t[:1]]
+            t[0] ^= aes_crypto.Rcon[i // nk]
+        elif nk > 6 and i % nk == 4:
+            t = [aes_crypto.Sbox[b] for b in t]
+        w.append([a ^ b for a, b in zip(w[i - nk], t)])
+    return bytes(b for palavra in w for b in palavra)
+
+@pytest.mark.parametrize('tamanho', aes_crypto.TAMANHOS_CHAVE)
+def test_expansao_sem_tabelas(tamanho, monkeypatch):
+    key = os.urandom(tamanho)
+    esperado = _expansao_com_tabela(key)
+    monkeypatch.setattr(aes_crypto, 'Sbox', _TabelaProibida())
+    monkeypatch.setattr(aes_crypto, 'InvSbox', _TabelaProibida())
+    expandida = aes_crypto.AESKey(key)
+    assert expandida.round_keys == esperado
+
+def test_xtime():
+    for a in range(256):
+        esperado = ((a << 1) ^ 0x1b) & 0xff if a & 0x80 else a << 1
+        assert aes_crypto.xtime(a) == esperado
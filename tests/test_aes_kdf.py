@@ -0,0 +1,61 @@
+"""
+Testes da encriptação de arquivos com senha.
+"""
+
+import hashlib
+import io
+import os
+import struct
+
+import pytest
+
+import aes_crypto
+import aes_kdf
+
+def test_senha_errada_nao_altera_destino(tmp_path):
+    data = os.urandom(5000)
+    (tmp_path / 'original').write_bytes(data)
+    aes_kdf.encrypt_file_senha(tmp_path / 'original', tmp_path / 'cifrado', 'senha', 'pbkdf2', 1000)
+    (tmp_path / 'saida').write_bytes(b'conteudo anterior')
+
+    with pytest.raises(ValueError):
+        aes_kdf.decrypt_file_senha(tmp_path / 'cifrado', tmp_path / 'saida', 'errada', cache=None)
+    assert (tmp_path / 'saida').read_bytes() == b'conteudo anterior'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cifrado', 'original', 'saida']
+
+    aes_kdf.decrypt_file_senha(tmp_path / 'cifrado', tmp_path / 'saida', 'senha', cache=None)
+    assert (tmp_path / 'saida').read_bytes() == data
+
+def test_cache_so_guarda_chave_autenticada(tmp_path):
+    (tmp_path / 'original').write_bytes(b'dados')
+    aes_kdf.encrypt_file_senha(tmp_path / 'original', tmp_path / 'cifrado', 'senha', 'pbkdf2', 1000)
+    cache = aes_kdf.CacheChaves()
+    with pytest.raises(ValueError):
+        aes_kdf.decrypt_file_senha(tmp_path / 'cifrado', tmp_path / 'saida', 'errada', cache=cache)
+    assert len(cache) == 0
+    aes_kdf.decrypt_file_senha(tmp_path / 'cifrado', tmp_path / 'saida', 'senha', cache=cache)
+    assert len(cache) == 1
+    with open(tmp_path / 'cifrado', 'rb') as src:
+        parametros = aes_kdf.ParametrosKDF.ler(src)
+    assert cache.obter(b'senha', parametros) == aes_kdf.derivar_chave('senha', parametros, None)
+
+def test_indice_do_cache_nao_e_hash_da_senha():
+    parametros = aes_kdf.ParametrosKDF('pbkdf2', 1000)
+    a, b = aes_kdf.CacheChaves(), aes_kdf.CacheChaves()
+    assert a._indice(b'senha', parametros) != b._indice(b'senha', parametros)
+    assert a._indice(b'senha', parametros) != hashlib.sha256(parametros.para_bytes() + b'senha').digest()
+
+def test_chave_derivada_fora_do_cache_lru(tmp_path):
+    (tmp_path / 'original').write_bytes(b'dados')
+    aes_crypto._chave_em_cache.cache_clear()
+    aes_kdf.encrypt_file_senha(tmp_path / 'original', tmp_path / 'cifrado', 'senha', 'pbkdf2', 1000)
+    aes_kdf.decrypt_file_senha(tmp_path / 'cifrado', tmp_path / 'saida', 'senha', cache=None)
+    assert aes_crypto._chave_em_cache.cache_info().currsize == 0
+
+def test_custo_scrypt_acima_do_maximo():
+    with pytest.raises(ValueError):
+        aes_kdf.ParametrosKDF('scrypt', 22)
+    cabecalho = aes_kdf.ParametrosKDF('scrypt', 15).para_bytes()
+    adulterado = cabecalho[:7] + struct.pack('>I', 22) + cabecalho[11:]
+    with pytest.raises(ValueError):
+        aes_kdf.ParametrosKDF.ler(io.BytesIO(adulterado))
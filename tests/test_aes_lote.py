@@ -0,0 +1,75 @@
+"""
+Testes da ferramenta de lote: ida e volta de diretórios, manifesto e isolamento das falhas.
+"""
+
+import os
+
+import pytest
+
+import aes_lote
+
+KEY = bytes(range(16))
+
+@pytest.fixture
+def arvore(tmp_path):
+    dados = {}
+    for relativo in ('a.txt', 'sub/b.bin', 'sub/c/d.bin'):
+        caminho = tmp_path / 'dados' / relativo
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        dados[relativo] = os.urandom(len(relativo) * 1000)
+        caminho.write_bytes(dados[relativo])
+    return tmp_path, dados
+
+@pytest.mark.parametrize('mode', ['gcm', 'container'])
+@pytest.mark.parametrize('workers', [1, 2])
+def test_ida_volta_diretorio(arvore, mode, workers, monkeypatch):
+    tmp_path, dados = arvore
+    monkeypatch.setenv('AES_CHAVE', KEY.hex())
+    manifesto = str(tmp_path / 'manifesto.json')
+    argumentos = ['--modo', mode, '--workers', str(workers), '--manifesto', manifesto]
+    assert aes_lote.main(['encrypt', str(tmp_path / 'dados'), '--destino', str(tmp_path / 'cifrados')] + argumentos) == 0
+    assert aes_lote.main(['decrypt', str(tmp_path / 'cifrados'), '--destino', str(tmp_path / 'saida')] + argumentos) == 0
+    for relativo, data in dados.items():
+        assert (tmp_path / 'saida' / relativo).read_bytes() == data
+
+    tarefas = aes_lote.planejar('encrypt', [str(tmp_path / 'dados')], str(tmp_path / 'cifrados'))
+    resumo = aes_lote.executar_lote('encrypt', tarefas, KEY, mode, workers, manifesto)
+    assert resumo['pulados'] == len(dados) and resumo['processados'] == 0
+
+def test_destino_igual_a_origem_e_recusado(tmp_path):
+    (tmp_path / 'original').write_bytes(b'dados' * 1000)
+    aes_lote.processar_arquivo('encrypt', str(tmp_path / 'original'), str(tmp_path / 'arquivo'), KEY, 'container')
+    antes = (tmp_path / 'arquivo').read_bytes()
+    tarefas = aes_lote.planejar('decrypt', [str(tmp_path / 'arquivo')], str(tmp_path), sufixo='')
+    assert tarefas == [(str(tmp_path / 'arquivo'), str(tmp_path / 'arquivo'))]
+    resumo = aes_lote.executar_lote('decrypt', tarefas, KEY, 'container', workers=1)
+    assert resumo['erros'] == 1
+    assert (tmp_path / 'arquivo').read_bytes() == antes
+
+def test_falha_em_um_arquivo_nao_interrompe_o_lote(arvore, monkeypatch):
+    tmp_path, dados = arvore
+    original = aes_lote.processar_arquivo
+
+    def processar(operacao, origem, destino, key, mode):
+        if origem.endswith('b.bin'):
+            raise RuntimeError("falha inesperada")
+        return original(operacao, origem, destino, key, mode)
+
+    monkeypatch.setattr(aes_lote, 'processar_arquivo', processar)
+    tarefas = aes_lote.planejar('encrypt', [str(tmp_path / 'dados')], str(tmp_path / 'cifrados'))
+    resumo = aes_lote.executar_lote('encrypt', tarefas, KEY, 'gcm', workers=1)
+    assert resumo['processados'] == len(dados) - 1 and resumo['erros'] == 1
+
+def test_arquivo_corrompido_nao_deixa_saida(arvore):
+    tmp_path, _ = arvore
+    tarefas = aes_lote.planejar('encrypt', [str(tmp_path / 'dados' / 'a.txt')], str(tmp_path / 'cifrados'))
+    aes_lote.executar_lote('encrypt', tarefas, KEY, 'gcm', workers=1)
+    cifrado = tmp_path / 'cifrados' / 'a.txt.aes'
+    bruto = bytearray(cifrado.read_bytes())
+    bruto[-1] ^= 1
+    cifrado.write_bytes(bytes(bruto))
+
+    tarefas = aes_lote.planejar('decrypt', [str(cifrado)], str(tmp_path / 'saida'))
+    resumo = aes_lote.executar_lote('decrypt', tarefas, KEY, 'gcm', workers=1)
+    assert resumo['erros'] == 1
+    assert list((tmp_path / 'saida').iterdir()) == []
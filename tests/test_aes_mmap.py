@@ -0,0 +1,85 @@
+"""
+Testes dos arquivos via mmap: compatibilidade com aes_stream, iv e reencriptação segura.
+"""
+
+import os
+
+import pytest
+
+import aes_mmap
+import aes_modos
+import aes_stream
+
+KEY_ANTIGA = bytes(16)
+KEY_NOVA = bytes(range(16))
+KEY_ERRADA = b'\x01' * 16
+
+@pytest.mark.parametrize('mode', aes_mmap.MODOS_MMAP)
+@pytest.mark.parametrize('tamanho', [0, 15, 16, 100000])
+def test_ida_volta(mode, tamanho, tmp_path):
+    data = os.urandom(tamanho)
+    (tmp_path / 'original').write_bytes(data)
+    aes_mmap.encrypt_file_mmap(tmp_path / 'original', tmp_path / 'cifrado', KEY_ANTIGA, mode, chunk_size=4096)
+    aes_stream.decrypt_file(tmp_path / 'cifrado', tmp_path / 'stream', KEY_ANTIGA, mode=mode)
+    aes_mmap.decrypt_file_mmap(tmp_path / 'cifrado', tmp_path / 'saida', KEY_ANTIGA, mode, chunk_size=4096)
+    assert (tmp_path / 'stream').read_bytes() == data
+    assert (tmp_path / 'saida').read_bytes() == data
+
+@pytest.mark.parametrize('mode, iv', [('ctr', b''), ('ctr', bytes(12)), ('ecb', bytes(16))])
+def test_iv_invalido(mode, iv, tmp_path):
+    (tmp_path / 'original').write_bytes(b'dados')
+    with pytest.raises(ValueError):
+        aes_mmap.encrypt_file_mmap(tmp_path / 'original', tmp_path / 'cifrado', KEY_ANTIGA, mode, iv)
+    assert not (tmp_path / 'cifrado').exists()
+
+def _cifrar(tmp_path, mode):
+    data = os.urandom(50000)
+    caminho = tmp_path / 'cifrado'
+    if mode == 'gcm':
+        (tmp_path / 'original').write_bytes(data)
+        aes_stream.encrypt_file(tmp_path / 'original', caminho, KEY_ANTIGA, mode=mode)
+    else:
+        (tmp_path / 'original').write_bytes(data)
+        aes_mmap.encrypt_file_mmap(tmp_path / 'original', caminho, KEY_ANTIGA, mode)
+    return caminho, data
+
+@pytest.mark.parametrize('mode', aes_mmap.MODOS_REENCRIPTACAO)
+def test_reencriptar(mode, tmp_path):
+    caminho, data = _cifrar(tmp_path, mode)
+    aes_mmap.reencrypt_file_mmap(caminho, KEY_ANTIGA, KEY_NOVA, mode, chunk_size=4096, sem_verificacao=True)
+    aes_stream.decrypt_file(caminho, tmp_path / 'saida', KEY_NOVA, mode=mode)
+    assert (tmp_path / 'saida').read_bytes() == data
+
+@pytest.mark.parametrize('mode', ['gcm', 'ecb'])
+def test_reencriptar_com_chave_antiga_errada(mode, tmp_path):
+    caminho, _ = _cifrar(tmp_path, mode)
+    antes = caminho.read_bytes()
+    with pytest.raises(ValueError):
+        aes_mmap.reencrypt_file_mmap(caminho, KEY_ERRADA, KEY_NOVA, mode)
+    assert caminho.read_bytes() == antes
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cifrado', 'original']
+
+def test_reencriptar_ctr_exige_confirmacao(tmp_path):
+    caminho, _ = _cifrar(tmp_path, 'ctr')
+    antes = caminho.read_bytes()
+    with pytest.raises(ValueError):
+        aes_mmap.reencrypt_file_mmap(caminho, KEY_ANTIGA, KEY_NOVA, 'ctr')
+    assert caminho.read_bytes() == antes
+
+def test_reencriptacao_interrompida_preserva_o_arquivo(tmp_path, monkeypatch):
+    caminho, data = _cifrar(tmp_path, 'ctr')
+    antes = caminho.read_bytes()
+    original = aes_modos.encrypt_ctr
+    chamadas = []
+
+    def falhar(*args):
+        chamadas.append(1)
+        if len(chamadas) > 2:
+            raise KeyboardInterrupt
+        return original(*args)
+
+    monkeypatch.setattr(aes_modos, 'encrypt_ctr', falhar)
+    with pytest.raises(KeyboardInterrupt):
+        aes_mmap.reencrypt_file_mmap(caminho, KEY_ANTIGA, KEY_NOVA, 'ctr', chunk_size=4096, sem_verificacao=True)
+    assert caminho.read_bytes() == antes
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cifrado', 'original']
@@ -0,0 +1,92 @@
+"""
+Testes da encriptação paralela: ida e volta comparada ao caminho serial e liberação da memória compartilhada.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import types
+from multiprocessing import shared_memory
+
+import pytest
+
+import aes_crypto
+import aes_modos
+import aes_paralelo
+
+KEY = bytes(range(32))
+IV = bytes(range(100, 116))
+
+# Segmentos pequenos, para que mesmo entradas curtas sejam divididas entre vários processos
+SEGMENTO = 4096
+
+@pytest.fixture(scope='module')
+def executor():
+    with concurrent.futures.ProcessPoolExecutor(2, mp_context=multiprocessing.get_context('spawn')) as executor:
+        yield executor
+
+@pytest.fixture
+def memorias(monkeypatch):
+    """
+    Registra os nomes das memórias compartilhadas criadas pelo processo principal.
+    """
+    nomes = []
+
+    def criar(*args, **kwargs):
+        memoria = shared_memory.SharedMemory(*args, **kwargs)
+        nomes.append(memoria.name)
+        return memoria
+
+    monkeypatch.setattr(aes_paralelo, 'shared_memory', types.SimpleNamespace(SharedMemory=criar))
+    return nomes
+
+def _liberadas(nomes):
+    for nome in nomes:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=nome)
+    return True
+
+@pytest.mark.parametrize('tamanho', [16, SEGMENTO, 10 * SEGMENTO + 48])
+def test_ecb_igual_ao_serial(executor, memorias, tamanho):
+    data = os.urandom(tamanho)
+    cifrado = aes_paralelo.encrypt_blocks_paralelo(data, KEY, chunk_size=SEGMENTO, limiar=0, executor=executor)
+    assert cifrado == aes_crypto.encrypt_blocks(data, KEY)
+    assert aes_paralelo.decrypt_blocks_paralelo(cifrado, aes_crypto.AESKey(KEY), chunk_size=SEGMENTO, limiar=0,
+                                                executor=executor) == data
+    assert len(memorias) == 4 and _liberadas(memorias)
+
+@pytest.mark.parametrize('tamanho', [1, SEGMENTO - 1, 10 * SEGMENTO + 5])
+def test_ctr_igual_ao_serial(executor, memorias, tamanho):
+    data = os.urandom(tamanho)
+    cifrado = aes_paralelo.encrypt_ctr_paralelo(data, KEY, IV, chunk_size=SEGMENTO, limiar=0, executor=executor)
+    assert cifrado == aes_modos.encrypt_ctr(data, KEY, IV)
+    assert aes_paralelo.encrypt_ctr_paralelo(cifrado, KEY, IV, chunk_size=SEGMENTO, limiar=0,
+                                             executor=executor) == data
+    assert _liberadas(memorias)
+
+def test_pool_proprio(memorias):
+    data = os.urandom(8 * SEGMENTO)
+    assert aes_paralelo.encrypt_ctr_paralelo(data, KEY, IV, workers=2, chunk_size=SEGMENTO,
+                                             limiar=0) == aes_modos.encrypt_ctr(data, KEY, IV)
+    assert len(memorias) == 2 and _liberadas(memorias)
+
+def test_abaixo_do_limiar_nao_usa_memoria_compartilhada(memorias):
+    data = os.urandom(SEGMENTO)
+    assert aes_paralelo.encrypt_blocks_paralelo(data, KEY, workers=2) == aes_crypto.encrypt_blocks(data, KEY)
+    assert memorias == []
+
+def test_falha_no_processo_libera_memoria(executor, memorias):
+    with pytest.raises(ValueError):
+        aes_paralelo.encrypt_blocks_paralelo(os.urandom(4 * SEGMENTO), KEY, chunk_size=SEGMENTO, limiar=0,
+                                             engine='inexistente', executor=executor)
+    assert len(memorias) == 2 and _liberadas(memorias)
+
+@pytest.mark.parametrize('operacao, data, iv', [
+    ('cbc', bytes(32), None),
+    ('encrypt_ecb', bytes(17), None),
+    ('ctr', bytes(32), None),
+])
+def test_parametros_invalidos(memorias, operacao, data, iv):
+    with pytest.raises(ValueError):
+        aes_paralelo.processar_paralelo(data, KEY, operacao, iv, limiar=0)
+    assert memorias == []
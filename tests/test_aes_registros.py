@@ -0,0 +1,128 @@
+"""
+Testes do log de registros: ida e volta, recuperação após interrupção e compactação interrompida.
+"""
+
+import os
+import struct
+
+import pytest
+
+import aes_registros
+
+KEY = bytes(range(16))
+
+def _abandonar(log):
+    """
+    Simula uma queda: fecha os arquivos sem gravar as entradas pendentes do índice.
+    """
+    log._escrita.close()
+    log._indice.close()
+    for leitor in log._leitores.values():
+        leitor.close()
+
+def _preencher(diretorio, quantidade, **opcoes):
+    with aes_registros.LogRegistros(diretorio, KEY, **opcoes) as log:
+        log.extend(f'registro {i}' for i in range(quantidade))
+
+def test_ida_volta(tmp_path):
+    with aes_registros.LogRegistros(tmp_path, KEY, tamanho_segmento=1024) as log:
+        ids = log.extend(f'registro {i}' for i in range(100))
+        log.delete(7)
+    with aes_registros.LogRegistros(tmp_path, KEY) as log:
+        assert len(log) == 100 and ids == list(range(100))
+        assert log.get(99) == b'registro 99'
+        with pytest.raises(ValueError):
+            log.get(7)
+        assert [i for i, _ in log] == [i for i in range(100) if i != 7]
+
+def test_recupera_registros_fora_do_indice(tmp_path):
+    log = aes_registros.LogRegistros(tmp_path, KEY, fsync_lote=1000)
+    log.extend(f'registro {i}' for i in range(20))
+    _abandonar(log)
+    with aes_registros.LogRegistros(tmp_path, KEY) as log:
+        assert len(log) == 20
+        assert log.get(19) == b'registro 19'
+
+def test_descarta_final_incompleto_ou_invalido(tmp_path):
+    _preencher(tmp_path, 10)
+    caminho = tmp_path / 'segmento-000001.log'
+    with open(caminho, 'ab') as f:
+        f.write(struct.pack('>QI', 10, 5) + os.urandom(12 + 5 + 16))  # registro completo com tag inválido
+        f.write(b'\x00' * 7)
+    with aes_registros.LogRegistros(tmp_path, KEY) as log:
+        assert len(log) == 10
+        assert log.append('novo') == 10
+    with aes_registros.LogRegistros(tmp_path, KEY) as log:
+        assert log.get(10) == b'novo'
+
+def test_cabecalho_corrompido_nao_trunca_registros_indexados(tmp_path):
+    _preencher(tmp_path, 10)
+    caminho = tmp_path / 'segmento-000001.log'
+    with aes_registros.LogRegistros(tmp_path, KEY) as log:
+        _, posicao, _ = log._entrada(3)
+    bruto = bytearray(caminho.read_bytes())
+    bruto[posicao + 8:posicao + 12] = struct.pack('>I', 0xffffffff)
+    caminho.write_bytes(bytes(bruto))
+
+    with aes_registros.LogRegistros(tmp_path, KEY) as log:
+        assert len(log) == 10
+        assert log.get(9) == b'registro 9'
+        with pytest.raises(ValueError):
+            log.get(3)
+        log.append('novo')
+    assert caminho.stat().st_size > len(bruto)
+
+def test_segmento_menor_que_o_indice(tmp_path):
+    _preencher(tmp_path, 10)
+    caminho = tmp_path / 'segmento-000001.log'
+    with open(caminho, 'r+b') as f:
+        f.truncate(caminho.stat().st_size - 10)
+    with pytest.raises(ValueError):
+        aes_registros.LogRegistros(tmp_path, KEY)
+    assert caminho.stat().st_size > 0
+
+@pytest.mark.parametrize('falha', ['replace', 'remove'])
+def test_compactacao_interrompida(tmp_path, monkeypatch, falha):
+    _preencher(tmp_path, 50, tamanho_segmento=512)
+    with aes_registros.LogRegistros(tmp_path, KEY, tamanho_segmento=512) as log:
+        for i in range(0, 50, 2):
+            log.delete(i)
+    antigos = sorted(p.name for p in tmp_path.glob('segmento-*.log'))
+
+    log = aes_registros.LogRegistros(tmp_path, KEY, tamanho_segmento=512)
+    original = getattr(os, falha)
+
+    def queda(*args):
+        # replace: queda antes da troca do índice; remove: queda ao apagar os segmentos antigos
+        if os.fspath(args[-1]).endswith('indice.idx' if falha == 'replace' else '.log'):
+            raise KeyboardInterrupt
+        return original(*args)
+
+    monkeypatch.setattr(os, falha, queda)
+    with pytest.raises(KeyboardInterrupt):
+        log.compactar()
+    monkeypatch.undo()
+    _abandonar(log)
+
+    with aes_registros.LogRegistros(tmp_path, KEY, tamanho_segmento=512) as log:
+        assert [i for i, _ in log] == list(range(1, 50, 2))
+        assert log.get(49) == b'registro 49'
+    restantes = sorted(p.name for p in tmp_path.iterdir())
+    assert 'compactacao' not in restantes and not [nome for nome in restantes if nome.endswith('.tmp')]
+    segmentos = [nome for nome in restantes if nome.startswith('segmento-')]
+    if falha == 'replace':
+        assert segmentos == antigos
+    else:
+        assert segmentos and not set(segmentos) & set(antigos)
+
+def test_compactar(tmp_path):
+    with aes_registros.LogRegistros(tmp_path, KEY, tamanho_segmento=512) as log:
+        log.extend(f'registro {i}' for i in range(50))
+        for i in range(0, 50, 2):
+            log.delete(i)
+        assert log.compactar() > 0
+        log.append('novo')
+    assert not (tmp_path / 'compactacao').exists()
+    with aes_registros.LogRegistros(tmp_path, KEY) as log:
+        assert [i for i, _ in log] == list(range(1, 50, 2)) + [50]
+        assert log.get(50) == b'novo'
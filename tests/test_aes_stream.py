@@ -0,0 +1,72 @@
+"""
+Testes da encriptação em fluxo: ida e volta, arquivos com tag ou preenchimento inválidos e validação do iv.
+"""
+
+import os
+
+import pytest
+
+import aes_stream
+
+@pytest.mark.parametrize('mode', aes_stream.MODOS)
+def test_ida_volta_arquivo(mode, tmp_path):
+    key = os.urandom(24)
+    data = os.urandom(100000)
+    (tmp_path / 'original').write_bytes(data)
+    aes_stream.encrypt_file(tmp_path / 'original', tmp_path / 'cifrado', key, 4096, mode)
+    aes_stream.decrypt_file(tmp_path / 'cifrado', tmp_path / 'saida', key, 1000, mode)
+    assert (tmp_path / 'saida').read_bytes() == data
+
+@pytest.mark.parametrize('mode, adulterar', [('gcm', -1), ('gcm', 20), ('ecb', None)])
+def test_decrypt_file_invalido_nao_deixa_texto_em_disco(mode, adulterar, tmp_path):
+    key = os.urandom(16)
+    data = os.urandom(3 * 4096 + 5)
+    (tmp_path / 'original').write_bytes(data)
+    aes_stream.encrypt_file(tmp_path / 'original', tmp_path / 'cifrado', key, 4096, mode)
+    if adulterar is None:
+        key = os.urandom(16)  # chave errada: o preenchimento do ECB fica inválido
+    else:
+        bruto = bytearray((tmp_path / 'cifrado').read_bytes())
+        bruto[adulterar] ^= 1
+        (tmp_path / 'cifrado').write_bytes(bytes(bruto))
+    (tmp_path / 'saida').write_bytes(b'conteudo anterior')
+
+    with pytest.raises(ValueError):
+        aes_stream.decrypt_file(tmp_path / 'cifrado', tmp_path / 'saida', key, 1024, mode)
+    assert (tmp_path / 'saida').read_bytes() == b'conteudo anterior'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cifrado', 'original', 'saida']
+
+@pytest.mark.parametrize('mode, iv', [('ctr', b''), ('ctr', bytes(12)), ('gcm', b''), ('gcm', bytes(16)),
+                                      ('ecb', bytes(16))])
+def test_iv_com_tamanho_errado(mode, iv):
+    with pytest.raises(ValueError):
+        aes_stream.EncriptadorFluxo(os.urandom(16), mode, iv)
+
+@pytest.mark.parametrize('mode', ['ctr', 'gcm'])
+def test_iv_fornecido_e_usado(mode):
+    key = os.urandom(16)
+    iv = os.urandom(16 if mode == 'ctr' else 12)
+    cifrado = b''.join(aes_stream.encrypt_iter([b'abc'], key, mode, iv))
+    assert cifrado.startswith(iv)
+    assert b''.join(aes_stream.decrypt_iter([cifrado], key, mode)) == b'abc'
+
+def test_escrever_atomico_temporarios_unicos(tmp_path):
+    destino = tmp_path / 'saida'
+
+    def externo(dst):
+        dst.write(b'externo')
+        # outra gravação no mesmo destino enquanto esta ainda está aberta
+        aes_stream.escrever_atomico(destino, lambda interno: interno.write(b'interno'))
+        return 7
+
+    assert aes_stream.escrever_atomico(destino, externo) == 7
+    assert destino.read_bytes() == b'externo'
+    assert [p.name for p in tmp_path.iterdir()] == ['saida']
+
+def test_encrypt_file_com_erro_nao_altera_destino(tmp_path):
+    (tmp_path / 'original').write_bytes(b'dados')
+    (tmp_path / 'cifrado').write_bytes(b'conteudo anterior')
+    with pytest.raises(ValueError):
+        aes_stream.encrypt_file(tmp_path / 'original', tmp_path / 'cifrado', os.urandom(16), mode='cbc')
+    assert (tmp_path / 'cifrado').read_bytes() == b'conteudo anterior'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cifrado', 'original']
@@ -0,0 +1,49 @@
+"""
+Executa pelo pytest as verificações de aes_verificacao: vetores conhecidos,
+Monte Carlo e testes diferenciais contra a PyCryptodome, para cada engine.
+
+Os casos de regressão dos fluxos ficam junto dos módulos: test_aes_stream
+(arquivo decriptado só substituído após o tag conferir, tamanho do iv),
+test_aes_container (tamanho derivado do índice autenticado, limites de
+read_range) e test_aes_async (executor de processos).
+"""
+
+import pytest
+
+import aes_crypto
+import aes_verificacao
+
+ENGINES = list(aes_crypto.ENGINES)
+
+# Diferencial reduzido e com semente fixa, para que uma falha seja reproduzível
+CASOS = 4
+TAMANHO_MAXIMO = 4096
+SEMENTE = 2021
+
+def _falhas(resultados):
+    """
+    Descreve as verificações que não conferiram.
+
+    :param resultados: Lista de dicionários de resultado
+    :return: Lista de mensagens
+    """
+    return [f"{r['grupo']} {r['caso']}: {r['detalhe']}" for r in resultados if not r['ok']]
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_vetores_conhecidos(engine):
+    resultados = aes_verificacao.verificar_kat([engine])
+    assert resultados
+    assert not _falhas(resultados)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_monte_carlo(engine):
+    resultados = aes_verificacao.verificar_monte_carlo([engine], *aes_verificacao.MCT_RAPIDO)
+    assert resultados
+    assert not _falhas(resultados)
+
+@pytest.mark.skipif(aes_verificacao.AES is None, reason="PyCryptodome não instalada")
+@pytest.mark.parametrize('engine', ENGINES)
+def test_diferencial(engine):
+    resultados = aes_verificacao.verificar_diferencial([engine], CASOS, TAMANHO_MAXIMO, SEMENTE)
+    assert resultados
+    assert not _falhas(resultados)
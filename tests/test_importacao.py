@@ -0,0 +1,30 @@
+"""
+Testes da importação: cada módulo é importado em um interpretador novo
+com `python -X importtime` (ver aes_benchmark.medir_importacao).
+
+A ausência de dependências pesadas é sempre verificada. Os limites de tempo
+dependem da máquina e só são conferidos com AES_TESTAR_TEMPO_IMPORTACAO=1
+(o mesmo que `python aes_benchmark.py --importacao`).
+"""
+
+import os
+
+import pytest
+
+import aes_benchmark
+
+MODULOS = sorted(aes_benchmark.LIMITES_IMPORTACAO)
+
+@pytest.mark.parametrize('modulo', MODULOS)
+def test_importacao_sem_dependencias_pesadas(modulo):
+    _, importados = aes_benchmark.medir_importacao(modulo, repeticoes=1)
+    pesados = sorted({nome.split('.')[0] for nome in importados} & set(aes_benchmark.MODULOS_PROIBIDOS_IMPORTACAO))
+    assert not pesados, f"import {modulo} carregou {', '.join(pesados)}"
+
+@pytest.mark.skipif(not os.environ.get('AES_TESTAR_TEMPO_IMPORTACAO'),
+                    reason="limites de tempo dependem da máquina; defina AES_TESTAR_TEMPO_IMPORTACAO=1")
+@pytest.mark.parametrize('modulo', MODULOS)
+def test_importacao_rapida(modulo):
+    segundos, _ = aes_benchmark.medir_importacao(modulo)
+    limite = aes_benchmark.LIMITES_IMPORTACAO[modulo]
+    assert segundos <= limite, f"import {modulo} levou {segundos * 1000:.1f} ms (limite {limite * 1000:.0f} ms)"